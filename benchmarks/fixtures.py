@@ -0,0 +1,109 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import numpy as np
+from core.utils.tfrecord import TFRecordWriter, encode_example
+
+# synthetic files for the benchmarks, the parameters are part of the file names so
+# that fixtures which have been generated before are reused
+
+def _get_file_name(directory, prefix, extension, **parameters):
+    name = "-".join([prefix] + ["{0}{1}".format(key, value) for key, value in sorted(parameters.items())])
+    return os.path.join(directory, name + extension)
+
+def _create_image(rng, size):
+    # smooth gradients with noise, which compress like photos rather than like noise
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    channels = [np.sin(x * rng.uniform(1, 8) + y * rng.uniform(1, 8)) for _ in range(3)]
+    image = (np.stack(channels, axis=-1) * 100 + 128 + rng.normal(0, 8, (size, size, 3)))
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+def create_hdf5_tree(directory, depth, width, datasets=2, dataset_size=16):
+    # `width` groups in each of `depth` levels, each group at the bottom contains `datasets`
+    # small float datasets, e.g. depth 1 and a large width gives a wide tree
+    import h5py as h5
+
+    file_name = _get_file_name(directory, "hdf5-tree", ".h5", depth=depth, width=width, datasets=datasets, size=dataset_size)
+    if os.path.exists(file_name):
+        return file_name
+
+    rng = np.random.default_rng(0)
+    temporary_file_name = file_name + ".tmp"
+    with h5.File(temporary_file_name, "w") as f:
+        groups = [f]
+        for level in range(depth):
+            groups = [group.create_group("group_{0}".format(i)) for group in groups for i in range(width)]
+        for group in groups:
+            for i in range(datasets):
+                group.create_dataset("data_{0}".format(i), data=rng.standard_normal(dataset_size).astype(np.float32))
+    os.replace(temporary_file_name, file_name)
+    return file_name
+
+def create_hdf5_dataset(directory, size_mb, columns=1024, dtype="float32", chunk_rows=256):
+    # one chunked dataset of about `size_mb` megabytes, written in blocks to bound the memory
+    import h5py as h5
+
+    file_name = _get_file_name(directory, "hdf5-dataset", ".h5", mb=size_mb, columns=columns, dtype=dtype)
+    if os.path.exists(file_name):
+        return file_name
+
+    dtype = np.dtype(dtype)
+    rows = max(1, size_mb * 1024 * 1024 // (columns * dtype.itemsize))
+    rng = np.random.default_rng(0)
+    temporary_file_name = file_name + ".tmp"
+    with h5.File(temporary_file_name, "w") as f:
+        dataset = f.create_dataset("data", shape=(rows, columns), dtype=dtype, chunks=(min(rows, chunk_rows), columns))
+        block_rows = max(chunk_rows, 16 * 1024 * 1024 // (columns * dtype.itemsize))
+        for start in range(0, rows, block_rows):
+            stop = min(rows, start + block_rows)
+            dataset[start:stop] = rng.standard_normal((stop - start, columns)).astype(dtype)
+    os.replace(temporary_file_name, file_name)
+    return file_name
+
+def create_tfrecord_shards(directory, shards, examples, image_size=64, floats=128, ints=16):
+    # `shards` files with `examples` examples each, every example has a JPEG image,
+    # a float vector, an int64 vector and a label
+    import cv2
+
+    shard_directory = _get_file_name(directory, "tfrecord", "", shards=shards, examples=examples, image=image_size, floats=floats, ints=ints)
+    file_names = [os.path.join(shard_directory, "shard-{0:05d}-of-{1:05d}.tfrecord".format(i, shards)) for i in range(shards)]
+    if all(os.path.exists(x) for x in file_names):
+        return file_names
+
+    os.makedirs(shard_directory, exist_ok=True)
+    rng = np.random.default_rng(0)
+    # encoding is the slow part, so a few images are shared by all examples
+    images = [cv2.imencode(".jpg", _create_image(rng, image_size))[1].tobytes() for _ in range(16)]
+    for shard, file_name in enumerate(file_names):
+        if os.path.exists(file_name):
+            continue
+
+        temporary_file_name = file_name + ".tmp"
+        with TFRecordWriter(temporary_file_name) as writer:
+            for i in range(examples):
+                writer.write(encode_example({
+                    "image": images[i % len(images)],
+                    "embedding": rng.standard_normal(floats).astype(np.float32),
+                    "ids": rng.integers(0, 1 << 40, ints),
+                    "label": np.array([(shard * examples + i) % 1000])
+                }))
+        os.replace(temporary_file_name, file_name)
+    return file_names
\ No newline at end of file
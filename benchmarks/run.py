@@ -0,0 +1,278 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from benchmarks import fixtures
+
+# runs the adapters and parsers without the GUI on synthetic fixtures, each case runs in a
+# process of its own so that its peak memory is not hidden by the other cases, e.g.
+#   python -m benchmarks.run --size small --output results.json --baseline baseline.json
+
+_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the sizes of the fixtures, single values can be overridden on the command line
+SIZES = {
+    "small": {"depth": 3, "width": 6, "wide_width": 2000, "dataset_mb": 64, "shards": 4, "examples": 1000},
+    "medium": {"depth": 4, "width": 8, "wide_width": 20000, "dataset_mb": 512, "shards": 16, "examples": 5000},
+    "large": {"depth": 5, "width": 10, "wide_width": 100000, "dataset_mb": 4096, "shards": 64, "examples": 10000}
+}
+
+# metrics which are compared to the baseline, larger values are worse
+COMPARED_METRICS = ["open_time", "cached_open_time", "tree_build_time", "tree_walk_time", "peak_rss_bytes"]
+
+def _get_peak_rss():
+    # the peak resident set size of the process in bytes
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _get_cases(size, fixture_directory):
+    return [
+        ("hdf5-deep-tree", lambda: [fixtures.create_hdf5_tree(fixture_directory, size["depth"], size["width"])]),
+        ("hdf5-wide-tree", lambda: [fixtures.create_hdf5_tree(fixture_directory, 1, size["wide_width"])]),
+        ("hdf5-large-dataset", lambda: [fixtures.create_hdf5_dataset(fixture_directory, size["dataset_mb"])]),
+        ("tfrecord-file", lambda: fixtures.create_tfrecord_shards(fixture_directory, 1, size["examples"] * size["shards"])),
+        ("tfrecord-shards", lambda: fixtures.create_tfrecord_shards(fixture_directory, size["shards"], size["examples"]))
+    ]
+
+def _walk(item):
+    yield item
+    if not item.has_data() and item.has_children():
+        for child in item.children:
+            for result in _walk(child):
+                yield result
+
+def _summarize(latencies):
+    if len(latencies) == 0:
+        return None
+    latencies = np.asarray(latencies)
+    return {"count": len(latencies), "median": float(np.median(latencies)), "p95": float(np.percentile(latencies, 95)),
+            "max": float(latencies.max())}
+
+def _create_visualizer_container():
+    from PyQt5 import QtWidgets
+
+    if QtWidgets.QApplication.instance() is None:
+        _create_visualizer_container.application = QtWidgets.QApplication([])
+    container = QtWidgets.QWidget()
+    QtWidgets.QGridLayout(container)
+    return container
+
+def _clear_container(container):
+    for child in container.children():
+        if child is not container.layout():
+            child.deleteLater()
+
+def run_case(name, file_names, items, visualizers):
+    # executed in a process of its own, the metadata cache starts empty so that the
+    # first open is a cold one
+    cache_directory = tempfile.mkdtemp(prefix="data-viewer-benchmark-")
+    os.environ["DATA_VIEWER_CACHE_DIR"] = cache_directory
+    if visualizers:
+        # the visualizers need a GUI platform, but no display
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    try:
+        return _measure(name, file_names, items, visualizers)
+    finally:
+        shutil.rmtree(cache_directory, ignore_errors=True)
+
+def _measure(name, file_names, items, visualizers):
+    sys.path.insert(0, _DIRECTORY)
+    import cli
+    from core.plugins import PluginRegistry
+
+    cli.load_registries()
+    if visualizers:
+        PluginRegistry.load_plugins(os.path.join(_DIRECTORY, "plugins"))
+
+    result = {"name": name, "files": len(file_names), "bytes": sum(os.path.getsize(x) for x in file_names)}
+
+    start = time.perf_counter()
+    adapter = cli.open_adapter(file_names)
+    result["open_time"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top_level_items = 0
+    for batch, _ in adapter.iter_treeview_items():
+        top_level_items += len(batch)
+    result["tree_build_time"] = time.perf_counter() - start
+    result["top_level_items"] = top_level_items
+
+    # every item of the tree is created, e.g. as if all groups got expanded
+    start = time.perf_counter()
+    tree_items = 0
+    for top_level_item in adapter.get_treeview_items():
+        for item in _walk(top_level_item):
+            tree_items += 1
+    result["tree_walk_time"] = time.perf_counter() - start
+    result["tree_items"] = tree_items
+    adapter.close_file()
+
+    # the second open uses the metadata which the first one has cached
+    start = time.perf_counter()
+    adapter = cli.open_adapter(file_names)
+    for _ in adapter.iter_treeview_items():
+        pass
+    result["cached_open_time"] = time.perf_counter() - start
+    adapter.close_file()
+
+    # the payloads are fetched once, so that the parsers are measured on their own
+    adapter = cli.open_adapter(file_names)
+    data = []
+    fetch_latencies = []
+    for top_level_item in adapter.get_treeview_items():
+        for item in _walk(top_level_item):
+            if len(data) >= items:
+                break
+            if item.has_data():
+                start = time.perf_counter()
+                data.append(item.data)
+                fetch_latencies.append(time.perf_counter() - start)
+        if len(data) >= items:
+            break
+    result["fetch_time"] = _summarize(fetch_latencies)
+
+    container = _create_visualizer_container() if visualizers else None
+    result["parsers"] = {}
+    for index, parser_name in enumerate(PluginRegistry.get_parser_names()):
+        parser = PluginRegistry.get_parser(index)()
+        latencies = []
+        visualize_latencies = []
+        failures = 0
+        for value in data:
+            try:
+                start = time.perf_counter()
+                parsed_data = parser.parse(value)
+                latency = time.perf_counter() - start
+            except Exception:
+                failures += 1
+                continue
+            if parsed_data is None or parsed_data.get_data() is None:
+                failures += 1
+                continue
+            latencies.append(latency)
+
+            if container is not None:
+                visualizer_type = PluginRegistry.get_visualizer(type(parsed_data))
+                if visualizer_type is not None:
+                    start = time.perf_counter()
+                    visualizer_type().visualize_data(parsed_data, container)
+                    visualize_latencies.append(time.perf_counter() - start)
+                    _clear_container(container)
+
+        result["parsers"][parser_name] = {"parse_time": _summarize(latencies), "failures": failures}
+        if container is not None:
+            result["parsers"][parser_name]["visualize_time"] = _summarize(visualize_latencies)
+    adapter.close_file()
+
+    result["peak_rss_bytes"] = _get_peak_rss()
+    return result
+
+def compare(results, baseline, threshold):
+    # the metrics which got worse than the baseline by more than the threshold
+    baseline_cases = dict((case["name"], case) for case in baseline.get("cases", []))
+    regressions = []
+    for case in results["cases"]:
+        baseline_case = baseline_cases.get(case["name"])
+        if baseline_case is None:
+            continue
+
+        metrics = [(x, case.get(x), baseline_case.get(x)) for x in COMPARED_METRICS]
+        for parser_name, parser_result in case["parsers"].items():
+            baseline_parser = baseline_case.get("parsers", {}).get(parser_name, {})
+            for key in ["parse_time", "visualize_time"]:
+                if parser_result.get(key) and baseline_parser.get(key):
+                    metrics.append(("{0}.{1}".format(parser_name, key), parser_result[key]["median"], baseline_parser[key]["median"]))
+
+        for metric, value, baseline_value in metrics:
+            if value is None or not baseline_value:
+                continue
+            ratio = value / baseline_value
+            print("{0:20} {1:28} {2:8.2f}x".format(case["name"], metric, ratio))
+            if ratio > threshold:
+                regressions.append((case["name"], metric, ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the adapters and parsers on synthetic fixtures.")
+    parser.add_argument("--size", choices=sorted(SIZES.keys()), default="small", help="size of the fixtures")
+    for key in SIZES["small"].keys():
+        parser.add_argument("--" + key.replace("_", "-"), type=int, default=None, help="overrides the {0} of the size".format(key.replace("_", " ")))
+    parser.add_argument("--cases", default=None, help="comma separated names of the cases which are run, all by default")
+    parser.add_argument("--items", type=int, default=50, help="number of items which are parsed per case")
+    parser.add_argument("--visualizers", action="store_true", help="also measure the visualizers on an offscreen Qt platform")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "data-viewer-fixtures"), help="directory of the generated fixtures")
+    parser.add_argument("-o", "--output", default=None, help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=None, help="JSON file of an earlier run the results are compared to")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio to the baseline which counts as a regression")
+    args = parser.parse_args()
+
+    size = dict(SIZES[args.size])
+    for key in size.keys():
+        if getattr(args, key) is not None:
+            size[key] = getattr(args, key)
+    os.makedirs(args.fixtures, exist_ok=True)
+
+    selected_cases = args.cases.split(",") if args.cases else None
+    results = {"size": size, "items": args.items, "python": platform.python_version(), "platform": platform.platform(),
+               "cpu_count": os.cpu_count(), "cases": []}
+    for name, create_fixture in _get_cases(size, args.fixtures):
+        if selected_cases is not None and name not in selected_cases:
+            continue
+
+        print("{0}: generating fixture".format(name), file=sys.stderr)
+        file_names = create_fixture()
+        print("{0}: running".format(name), file=sys.stderr)
+        # a fresh process per case, spawned so that it does not inherit the memory of this one
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results["cases"].append(executor.submit(run_case, name, file_names, args.items, args.visualizers).result())
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, metric, ratio in regressions:
+            print("regression: {0} {1} is {2:.2f}x slower than the baseline".format(name, metric, ratio), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
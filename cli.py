@@ -0,0 +1,200 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import argparse
+import fnmatch
+import multiprocessing
+import os
+import re
+import sys
+import numpy as np
+from core.adapters.adapter_base import LazyDataItem
+from core.adapters.adapter_registry import AdapterRegistry
+from core.plugins import PluginRegistry
+from core.utils.lazy_array import LazyArray
+from core.utils.statistics import compute_statistics
+
+# the engine of the viewer without its GUI, so PyQt5 is never imported
+
+_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+def load_registries():
+    PluginRegistry.load_plugins(os.path.join(_DIRECTORY, "plugins"), load_visualizers=False)
+    AdapterRegistry.load_adapters(os.path.join(_DIRECTORY, "core", "adapters"))
+
+def open_adapter(file_names):
+    file_name = file_names[0] if len(file_names) == 1 else file_names
+    adapter_class = AdapterRegistry.get_collection_adapter(file_name) or AdapterRegistry.get_adapter(file_name)
+
+    adapter = adapter_class() if adapter_class else None
+    if adapter is None or not adapter.open_file(file_name):
+        raise IOError("The file `{0}´ could not be opened.".format(file_name))
+    return adapter
+
+def get_parser(ui_name):
+    # only the module of the requested parser is imported
+    for index, name in enumerate(PluginRegistry.get_parser_names()):
+        if name.lower() == ui_name.lower():
+            return PluginRegistry.get_parser(index)()
+    raise ValueError("There is no parser named `{0}´.".format(ui_name))
+
+def _walk(item, path):
+    yield path, item
+    if not item.has_data() and item.has_children():
+        for child in item.children:
+            for result in _walk(child, path + (child.name,)):
+                yield result
+
+def _format_shape(shape):
+    return "x".join(str(x) for x in shape) if len(shape) > 0 else "scalar"
+
+def _get_description(data):
+    if hasattr(data, "shape") and hasattr(data, "dtype"):
+        return "{0} {1}".format(_format_shape(data.shape), data.dtype)
+    if isinstance(data, (bytes, str)):
+        return "{0} {1}".format(len(data), type(data).__name__)
+    return type(data).__name__
+
+def _describe_item(item):
+    # lazy items are described by their layout, reading them only to print it would make
+    # listing a file as slow as reading all of it
+    if isinstance(item, LazyDataItem):
+        if item.shape is None or item.dtype is None:
+            return "not read"
+        return "{0} {1}".format(_format_shape(item.shape), np.dtype(item.dtype))
+    return _get_description(item.data)
+
+def _get_statistics(data):
+    if isinstance(data, (bytes, str)):
+        return "length={0}".format(len(data))
+
+    if not isinstance(data, (np.ndarray, LazyArray)):
+        data = np.asarray(data)
+    if data.dtype.kind not in "biuf" or data.size == 0:
+        return _get_description(data)
+
+    # lazy datasets are read in blocks, so their size is not limited by the memory
+    statistics = compute_statistics(data)
+    if statistics["count"] == 0:
+        return "shape={0} dtype={1} nan={2}".format(_format_shape(data.shape), data.dtype, statistics["nan"])
+    return "shape={0} dtype={1} min={2:g} max={3:g} mean={4:g} std={5:g} nan={6}".format(
+        _format_shape(data.shape), data.dtype, statistics["min"], statistics["max"], statistics["mean"], statistics["std"], statistics["nan"])
+
+def _get_output_file_name(output_directory, path, extension):
+    # characters which are not allowed in file names on some platforms are replaced
+    components = [re.sub(r'[<>:"/\\|?*\x00-\x1f]', "_", x) for x in path]
+    return os.path.join(output_directory, *components) + extension
+
+# each worker opens the file itself, the tasks only consist of the index of a top level item
+_worker_state = {}
+
+def _init_worker(file_names, command, pattern, parser_name, output_directory):
+    load_registries()
+    _worker_state["items"] = open_adapter(file_names).get_treeview_items()
+    _worker_state["command"] = command
+    _worker_state["pattern"] = pattern
+    _worker_state["parser"] = get_parser(parser_name) if parser_name else None
+    _worker_state["output_directory"] = output_directory
+
+def _process_item(index):
+    # returns the lines which have to be printed for the top level item
+    item = _worker_state["items"][index]
+    command = _worker_state["command"]
+
+    lines = []
+    for path, item in _walk(item, (item.name,)):
+        path_name = "/".join(path)
+        if not fnmatch.fnmatchcase(path_name, _worker_state["pattern"]):
+            continue
+
+        try:
+            if command == "list":
+                lines.append("{0}\t{1}".format(path_name, _describe_item(item) if item.has_data() else "group"))
+            elif not item.has_data():
+                continue
+            elif command == "stats":
+                lines.append("{0}\t{1}".format(path_name, _get_statistics(item.data)))
+            elif command == "export":
+                parsed_data = _worker_state["parser"].parse(item.data)
+                if parsed_data is None or parsed_data.get_data() is None:
+                    lines.append("{0}\tnot parsable".format(path_name))
+                    continue
+                file_name = _get_output_file_name(_worker_state["output_directory"], path, parsed_data.get_file_extension())
+                os.makedirs(os.path.dirname(file_name), exist_ok=True)
+                parsed_data.save(file_name)
+                lines.append("{0}\t{1}".format(path_name, file_name))
+        except Exception as error:
+            lines.append("{0}\terror: {1}".format(path_name, error))
+
+    return lines
+
+def run(file_names, command, pattern="*", parser_name=None, output_directory=None, workers=None):
+    # the top level items are streamed to a pool of workers, which read, decode and
+    # write them independently, the results are printed in the order of the items
+    adapter = open_adapter(file_names)
+    count = len(adapter.get_treeview_items())
+    adapter.close_file()
+
+    initargs = (file_names, command, pattern, parser_name, output_directory)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(*initargs)
+        results = (_process_item(i) for i in range(count))
+        for lines in results:
+            for line in lines:
+                print(line)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        for lines in pool.imap(_process_item, range(count), chunksize=max(1, min(64, count // (workers * 8)))):
+            for line in lines:
+                print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspects and exports data files without a GUI.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    for command, help_text in [("list", "list the items of the files"), ("stats", "print statistics of the items"), ("export", "write the parsed items to files")]:
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument("files", nargs="+", help="a file, several shards, a directory or a glob pattern")
+        subparser.add_argument("-p", "--pattern", default="*", help="glob pattern the item paths have to match, e.g. '*/image'")
+        subparser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes, all cores by default")
+        if command == "export":
+            subparser.add_argument("-o", "--output", required=True, help="directory the files are written to")
+            subparser.add_argument("--parser", default="Array", help="name of the parser, e.g. Image, Array or String")
+
+    args = parser.parse_args()
+
+    load_registries()
+    parser_name = args.parser if args.command == "export" else None
+    if parser_name:
+        # fails early for unknown names
+        get_parser(parser_name)
+
+    try:
+        run(args.files, args.command, args.pattern, parser_name, getattr(args, "output", None), args.workers)
+    except (IOError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -16,7 +16,4 @@
 # AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-# THE SOFTWARE.
-
-from core.adapters.hdf5_adapter import HDF5Adapter
-from core.adapters.tfrecord_adapter import TFRecordAdapter
\ No newline at end of file
+# THE SOFTWARE.
\ No newline at end of file
@@ -19,8 +19,12 @@
 # THE SOFTWARE.
 
 from abc import ABC, abstractclassmethod
+from core.utils.user_cache import get_file_stamp
 
 class Adapter(ABC):
+    # limits the number of open files if set, see `set_handle_pool`
+    _handle_pool = None
+
     def __init__(self):
         pass
 
@@ -40,6 +44,12 @@ class Adapter(ABC):
     def get_treeview_items(self):
         raise NotImplementedError("This method has to be defined in the inherited class. There is no base definition available.")
 
+    def iter_treeview_items(self):
+        # yields batches of top level items together with the fraction of the file which
+        # has been read so far, adapters which discover their items step by step override
+        # this so that the first items can be shown while the rest is still being read
+        yield self.get_treeview_items(), 1.0
+
     @abstractclassmethod
     def is_file_opened(self):
         raise NotImplementedError("This method has to be defined in the inherited class. There is no base definition available.")
@@ -52,8 +62,78 @@ class Adapter(ABC):
     def can_open_file(self, file_name):
         raise NotImplementedError("This method has to be defined in the inherited class. There is no base definition available.")
 
+    def get_file_stamp(self):
+        # identifies the opened version of the data, e.g. for caches of derived data
+        return get_file_stamp(self.get_file_name())
+
+    def set_handle_pool(self, handle_pool):
+        # adapters which keep files open register them with the pool, which releases the
+        # least recently used ones, and open them again when they are used the next time
+        self._handle_pool = handle_pool
+
+    @staticmethod
+    def get_item_name(index):
+        # adapters whose top level items are numbered return the name of the item with
+        # the given index, this allows to number the items of several files globally
+        return None
+
+    @staticmethod
+    def needs_layout():
+        # adapters of files without a header return True, the layout of the values has
+        # to be set with `set_layout` before the file gets opened
+        return False
+
+    @staticmethod
+    def sniff(header):
+        # decides from the first bytes of a file whether the adapter can open it,
+        # returning None means that `can_open_file` has to be asked instead
+        return None
+
 class DataItem(object):
     def __init__(self, name, data=None):
         self.name = name
-        self.data = data
-        self.children = []
\ No newline at end of file
+        self._data = data
+        self._children = None
+
+    @property
+    def children(self):
+        # children can be created on first access by overriding `_load_children`
+        if self._children is None:
+            self._children = self._load_children()
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+
+    def _load_children(self):
+        return []
+
+    def has_children(self):
+        return len(self.children) > 0
+
+    @property
+    def data(self):
+        return self.load_data()
+
+    def load_data(self):
+        return self._data
+
+    def has_data(self):
+        return self._data is not None
+
+class LazyDataItem(DataItem):
+    # only keeps a lightweight handle to the data, the payload is read by
+    # the loader each time the data is requested
+    def __init__(self, name, loader, shape=None, dtype=None, chunks=None):
+        super(LazyDataItem, self).__init__(name)
+        self._loader = loader
+        self.shape = shape
+        self.dtype = dtype
+        self.chunks = chunks
+
+    def load_data(self):
+        return self._loader()
+
+    def has_data(self):
+        return True
\ No newline at end of file
@@ -19,37 +19,100 @@
 # THE SOFTWARE.
 
 from core.adapters.adapter_base import Adapter
-from glob import glob
+from core.utils.module_loader import load_modules, read_manifest, register_class, add_entries
 import os
-import importlib.machinery
-import inspect
-import sys
 
 class AdapterRegistry(object):
     _adapters = []
+    # adapters which open several files as one, they are asked before the other adapters
+    _collection_adapters = []
+
+    # number of bytes which are handed to `Adapter.sniff`
+    SNIFF_SIZE = 4096
 
     @staticmethod
     def adapter(adapter_class):
         if not issubclass(adapter_class, Adapter):
             raise ValueError("The class `{0}´ does not inherit from `Adapter` class. Therefore, it cannot be registered as a data adapter.".format(adapter_class))
-        if not adapter_class in AdapterRegistry._adapters:
-            AdapterRegistry._adapters.append(adapter_class)
+        register_class(AdapterRegistry._adapters, adapter_class)
+
+        return adapter_class
 
     @staticmethod
     def get_adapters():
-        for adapter in AdapterRegistry._adapters:
-            yield adapter
+        # the adapters are imported, use `get_file_extensions` to only list them
+        for entry in AdapterRegistry._adapters:
+            yield entry.get_class()
+
+    @staticmethod
+    def get_file_extensions():
+        return [entry.describe("file_extensions") or entry.get_class().get_file_extensions() for entry in AdapterRegistry._adapters]
+
+    @staticmethod
+    def read_header(file_name):
+        try:
+            with open(file_name, "rb") as f:
+                return f.read(AdapterRegistry.SNIFF_SIZE)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _sniff(entry, header):
+        magic = entry.describe("magic")
+        if magic is not None:
+            # an empty list means that the format has no signature at all
+            if len(magic) == 0:
+                return None
+            # files without one of the signatures are ruled out without importing the adapter
+            if not any(header[offset:offset + len(bytes.fromhex(signature))] == bytes.fromhex(signature) for offset, signature in magic):
+                return False
+        return entry.get_class().sniff(header)
+
+    @staticmethod
+    def _can_open_file(entry, file_name):
+        extensions = entry.describe("extensions")
+        if extensions is not None and os.path.splitext(file_name)[1].lower() not in extensions:
+            return False
+        return entry.get_class().can_open_file(file_name)
 
     @staticmethod
     def get_adapter(file_name):
-        for adapter in AdapterRegistry._adapters:
-            if adapter.can_open_file(file_name):
-                return adapter
+        # the header is read once and shared by all adapters
+        header = AdapterRegistry.read_header(file_name)
+        if header is None:
+            return None
+
+        undecided_adapters = []
+        for entry in AdapterRegistry._adapters:
+            result = AdapterRegistry._sniff(entry, header)
+            if result:
+                return entry.get_class()
+            elif result is None:
+                undecided_adapters.append(entry)
+
+        # adapters without a sniffer have to inspect the file themselves
+        for entry in undecided_adapters:
+            if AdapterRegistry._can_open_file(entry, file_name):
+                return entry.get_class()
+        return None
+
+    @staticmethod
+    def get_collection_adapter(file_name):
+        # file_name can also be a list of files, a directory or a glob pattern
+        for entry in AdapterRegistry._collection_adapters:
+            if entry.get_class().can_open_file(file_name):
+                return entry.get_class()
         return None
 
     @staticmethod
     def load_adapters(adapter_directory):
-        for file_name in glob(os.path.join(adapter_directory, "*.py")):
-            module_name = file_name[:-3].replace("\\", "/").replace("/",".").replace("..", "")
+        # the adapters of the manifest are imported when a file needs them, all other
+        # modules are imported right away, modules which have already been imported,
+        # e.g. core.adapters.adapter_base, are not executed again
+        entries = read_manifest(adapter_directory, "adapters")
+        add_entries(AdapterRegistry._adapters, entries)
+        collection_entries = read_manifest(adapter_directory, "collections")
+        add_entries(AdapterRegistry._collection_adapters, collection_entries)
 
-            sys.modules[module_name] = importlib.machinery.SourceFileLoader(module_name, file_name).load_module()
\ No newline at end of file
+        manifest_modules = set(entry.describe("module") for entry in entries + collection_entries)
+        load_modules(adapter_directory, lambda name: name not in manifest_modules)
\ No newline at end of file
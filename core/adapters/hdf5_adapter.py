@@ -18,73 +18,185 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from core.adapters.adapter_base import Adapter, DataItem
+from core.adapters.adapter_base import Adapter, DataItem, LazyDataItem
 from core.adapters.adapter_registry import AdapterRegistry
+from core.utils.lazy_array import LazyArray
+from core.utils.metadata_cache import MetadataCache
+import threading
 import h5py as h5
-from PyQt5 import QtCore, QtGui, QtWidgets
-from windows.ui.mainwindow import Ui_MainWindow
-from PyQt5.QtWidgets import QMessageBox
 
 @AdapterRegistry.adapter
 class HDF5Adapter(Adapter):
+    # the superblock may be preceded by a user block of 512 * 2^n bytes
+    _SIGNATURE = b"\x89HDF\r\n\x1a\n"
+    _SIGNATURE_OFFSETS = (0, 512, 1024, 2048)
+
+    # datasets larger than this are not read at once when they get selected
+    LAZY_ARRAY_SIZE = 64 * 1024 * 1024
+
     def __init__(self):
         self._file = None
+        self._tree = None
+        self._released = False
+        # the file can be released by the pool while another thread reads from it
+        self._lock = threading.RLock()
 
     def open_file(self, file_name):
         try:
             self._file = h5.File(file_name, "r")
             self._file_name = file_name
-            return True
         except:
             return False
 
+        if self._handle_pool is not None:
+            self._handle_pool.touch(self)
+
+        # the structure of files which have been opened before is not walked again
+        self._tree = MetadataCache().get(file_name, "hdf5-tree")
+        return True
+
     def close_file(self):
-        self._file.close()
-        del self._file
-        self._file = None
+        self.release()
+        self._released = False
+        self._tree = None
+        if self._handle_pool is not None:
+            self._handle_pool.remove(self)
+
+    def release(self):
+        # closes the file, it is opened again by the next read
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._released = True
+
+    def _touch(self):
+        # outside of the lock, as the pool might release other adapters
+        if self._handle_pool is not None and self.is_file_opened():
+            self._handle_pool.touch(self)
+
+    def _get_file(self):
+        # the lock has to be held while the file is used
+        if self._file is None and self._released:
+            self._file = h5.File(self._file_name, "r")
+            self._released = False
+        return self._file
 
     def get_file_name(self):
         return self._file_name
 
     def get_treeview_items(self):
-        def create_dataset(dataset):
-            return DataItem(name=dataset.name.split("/")[-1], data=dataset.value)
+        if not self.is_file_opened():
+            return []
+
+        if self._tree is None:
+            for _ in self.iter_treeview_items():
+                pass
+
+        return self._create_items(self._tree, "")
 
-        def create_group(group):
-            item = DataItem(name=group.name.split("/")[-1])
+    def iter_treeview_items(self):
+        if not self.is_file_opened():
+            return
 
-            for child_group_name in group:
-                if not isinstance(group[child_group_name], h5.Dataset):
-                    item.children.append(create_group(group[child_group_name]))
-                else:
-                    item.children.append(create_dataset(group[child_group_name]))
+        if self._tree is not None:
+            yield self._create_items(self._tree, ""), 1.0
+            return
 
-            return item
+        # the members at the top level are handed out as soon as their subtree has been read
+        tree = []
+        self._touch()
+        with self._lock:
+            names = list(self._get_file())
+        for i, name in enumerate(names):
+            self._touch()
+            with self._lock:
+                member_tree = HDF5Adapter._read_tree(self._get_file(), [name])
+            tree += member_tree
+            yield self._create_items(member_tree, ""), (i + 1) / float(len(names))
+
+        self._tree = tree
+        MetadataCache().put(self._file_name, "hdf5-tree", self._tree)
+
+    @staticmethod
+    def _read_tree(group, names=None):
+        # one (name, shape, dtype, chunks, members) tuple per member of the group,
+        # the members are None for datasets
+        tree = []
+        for child_name in (names if names is not None else group):
+            child = group[child_name]
+            if isinstance(child, h5.Dataset):
+                tree.append((child_name, child.shape, child.dtype, child.chunks, None))
+            elif isinstance(child, h5.Group):
+                tree.append((child_name, None, None, None, HDF5Adapter._read_tree(child)))
 
+        return tree
+
+    def _create_items(self, tree, path):
         items = []
-        if self._file:
-            
-            for group_name in self._file:
-                if not isinstance(self._file[group_name], h5.Dataset):
-                    items.append(create_group(self._file[group_name]))
-                else:
-                    items.append(create_dataset(self._file[group_name]))
+        for child_name, shape, dtype, chunks, members in tree:
+            child_path = "{0}/{1}".format(path, child_name)
+            if members is None:
+                # keep only the path and the layout, the values are read on selection
+                items.append(LazyDataItem(name=child_name, loader=lambda path=child_path: self._load_dataset(path),
+                                          shape=shape, dtype=dtype, chunks=chunks))
+            else:
+                items.append(HDF5GroupItem(self, child_path, members))
 
         return items
 
+    def _load_dataset(self, path):
+        self._touch()
+        with self._lock:
+            file = self._get_file()
+            if not file:
+                return None
+
+            dataset = file[path]
+            if dataset.dtype.kind in "biuf" and dataset.size * dataset.dtype.itemsize > HDF5Adapter.LAZY_ARRAY_SIZE:
+                # large numeric datasets are handed out as a handle which reads hyperslabs on demand
+                return LazyArray(lambda selection: self._read_dataset(path, selection), dataset.shape, dataset.dtype, dataset.chunks,
+                                 source=(self._file_name, path))
+
+            return dataset[()]
+
+    def _read_dataset(self, path, selection=()):
+        self._touch()
+        with self._lock:
+            file = self._get_file()
+            if not file:
+                return None
+            return file[path][selection]
+
     def is_file_opened(self):
-        return self._file != None
+        return self._file != None or self._released
 
     @staticmethod
     def get_file_extensions():
         return "HDF5 (*.h5 *.hdf *.hdf5)"
 
+    @staticmethod
+    def sniff(header):
+        for offset in HDF5Adapter._SIGNATURE_OFFSETS:
+            if header[offset:offset + len(HDF5Adapter._SIGNATURE)] == HDF5Adapter._SIGNATURE:
+                return True
+        return False
+
     @staticmethod
     def can_open_file(file_name):
-        try:
-            test_file = h5.File(file_name)
-            test_file.close()
-            del test_file
-            return True
-        except:
-            return False
\ No newline at end of file
+        header = AdapterRegistry.read_header(file_name)
+        return header is not None and HDF5Adapter.sniff(header)
+
+class HDF5GroupItem(DataItem):
+    # the items of the members are only created once the group gets expanded
+    def __init__(self, adapter, path, tree):
+        super(HDF5GroupItem, self).__init__(name=path.split("/")[-1])
+        self._adapter = adapter
+        self._path = path
+        self._tree = tree
+
+    def _load_children(self):
+        return self._adapter._create_items(self._tree, self._path)
+
+    def has_children(self):
+        return len(self._tree) > 0
\ No newline at end of file
@@ -0,0 +1,79 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import bisect
+
+class ItemBatches(object):
+    # concatenation of the batches of items which have been appended so far,
+    # the batches themselves may be lazy sequences
+    def __init__(self, items):
+        self._batches = []
+        self._ends = []
+        self.append(items)
+
+    def append(self, items):
+        if len(items) == 0:
+            return
+        self._batches.append(items)
+        self._ends.append(len(self) + len(items))
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("Item index {0} is out of range.".format(index))
+
+        batch = bisect.bisect_right(self._ends, index)
+        start = self._ends[batch - 1] if batch > 0 else 0
+        return self._batches[batch][index - start]
+
+class ItemCollection(object):
+    # items of a file which are shown together, e.g. all children of a group or the
+    # item with the same name in each of the groups, they are resolved row by row
+    def __init__(self, file_stamp, items, base_path=(), leaf_name=None):
+        # the stamp identifies the version of the file the items belong to
+        self.file_stamp = file_stamp
+        self._items = items
+        self._base_path = tuple(base_path)
+        self._leaf_name = leaf_name
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_name(self, row):
+        return self._items[row].name
+
+    def resolve(self, row):
+        # returns the path and the item holding the data of the row, groups are
+        # represented by the named child or by their first child with data
+        item = self._items[row]
+        path = self._base_path + (item.name,)
+
+        if self._leaf_name is None and item.has_data():
+            return path, item
+
+        for child in item.children:
+            if child.name == self._leaf_name or (self._leaf_name is None and child.has_data()):
+                return path + (child.name,), child
+
+        return path, None
\ No newline at end of file
@@ -0,0 +1,284 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from core.adapters.adapter_base import Adapter, DataItem, LazyDataItem
+from core.adapters.adapter_registry import AdapterRegistry
+import ast
+import mmap
+import os
+import struct
+import zipfile
+import numpy as np
+
+# the same bound as numpy uses, larger headers could be used to make `literal_eval` slow
+_MAX_HEADER_SIZE = 10000
+
+def _read_array_header_3_0(f):
+    # version 3.0 only differs from 2.0 by its utf-8 encoded header, e.g. for field names
+    # which are not latin-1, numpy has no public function which reads it
+    header_length, = struct.unpack("<I", f.read(4))
+    if header_length > _MAX_HEADER_SIZE:
+        raise ValueError("The .npy header of {0} bytes is too large.".format(header_length))
+    header = f.read(header_length)
+    if len(header) != header_length:
+        raise IOError("The .npy header is truncated.")
+
+    description = ast.literal_eval(header.decode("utf-8"))
+    if not isinstance(description, dict) or set(description) != {"descr", "fortran_order", "shape"}:
+        raise ValueError("The .npy header `{0}´ is not valid.".format(description))
+    shape = description["shape"]
+    if not isinstance(shape, tuple) or not all(isinstance(x, int) and x >= 0 for x in shape):
+        raise ValueError("The shape `{0}´ of the .npy header is not valid.".format(shape))
+    if not isinstance(description["fortran_order"], bool):
+        raise ValueError("The .npy header `{0}´ is not valid.".format(description))
+    return shape, description["fortran_order"], np.lib.format.descr_to_dtype(description["descr"])
+
+class _MappedFile(object):
+    # one read-only mapping of a file which is shared by all arrays of the file, only
+    # the pages which get touched are read
+    def __init__(self, file_name):
+        self._file = open(file_name, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # empty files cannot be mapped
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b""
+
+    def get_array(self, dtype, shape, offset, fortran_order=False):
+        count = int(np.prod(shape, dtype=np.int64))
+        if offset + count * dtype.itemsize > len(self._buffer):
+            raise IOError("The array at offset {0} exceeds the end of the file.".format(offset))
+        if count == 0:
+            return np.empty(shape, dtype=dtype)
+        # unlike `np.ndarray(buffer=...)`, `np.frombuffer` keeps the buffer exported, so the
+        # mapping cannot be closed while the array is still in use
+        array = np.frombuffer(self._buffer, dtype=dtype, count=count, offset=offset)
+        return array.reshape(shape, order="F" if fortran_order else "C")
+
+    def read(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def read_npy_header(self, offset):
+        # returns dtype, shape, fortran order and the offset of the data of an array in the .npy format
+        f = self._file
+        f.seek(offset)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        elif version == (3, 0):
+            shape, fortran_order, dtype = _read_array_header_3_0(f)
+        else:
+            raise ValueError("The .npy format version {0}.{1} is not supported.".format(*version))
+        return dtype, shape, fortran_order, f.tell()
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                # arrays of the file are still in use, the mapping is closed once they are gone
+                pass
+        self._buffer = None
+        self._file.close()
+
+@AdapterRegistry.adapter
+class NumpyAdapter(Adapter):
+    # .npy files and the uncompressed members of .npz files are mapped instead of read
+    _NPY_MAGIC = b"\x93NUMPY"
+    _ZIP_MAGIC = b"PK\x03\x04"
+
+    def __init__(self):
+        self._file = None
+
+    def open_file(self, file_name):
+        try:
+            self._file = _MappedFile(file_name)
+            self._file_name = file_name
+            if zipfile.is_zipfile(file_name):
+                self._items = self._create_npz_items(file_name)
+            else:
+                dtype, shape, fortran_order, offset = self._file.read_npy_header(0)
+                name = os.path.splitext(os.path.basename(file_name))[0]
+                self._items = [self._create_item(name, dtype, shape, fortran_order, offset)]
+            return True
+        except:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            return False
+
+    def _create_item(self, name, dtype, shape, fortran_order, offset):
+        if dtype.hasobject:
+            # pickled objects cannot be mapped and are not unpickled, as that can run arbitrary code
+            return LazyDataItem(name=name, loader=lambda: NumpyAdapter._refuse_objects(name), shape=shape, dtype=dtype)
+        return DataItem(name=name, data=self._file.get_array(dtype, shape, offset, fortran_order))
+
+    def _create_npz_items(self, file_name):
+        items = []
+        with zipfile.ZipFile(file_name) as archive:
+            for info in archive.infolist():
+                name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+                if info.compress_type != zipfile.ZIP_STORED:
+                    # compressed members have to be decompressed once they get selected
+                    items.append(LazyDataItem(name=name, loader=lambda member=info.filename: self._load_member(member)))
+                    continue
+
+                # the member starts after its local header, which has a name and extra field of its own
+                local_header = self._file.read(info.header_offset, 30)
+                name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+                dtype, shape, fortran_order, offset = self._file.read_npy_header(info.header_offset + 30 + name_length + extra_length)
+                items.append(self._create_item(name, dtype, shape, fortran_order, offset))
+
+        return items
+
+    @staticmethod
+    def _refuse_objects(name):
+        raise ValueError("The array `{0}´ contains Python objects, which would have to be unpickled to be loaded.".format(name))
+
+    def _load_member(self, member):
+        with zipfile.ZipFile(self._file_name) as archive:
+            with archive.open(member) as f:
+                return np.lib.format.read_array(f, allow_pickle=False)
+
+    def close_file(self):
+        self._items = None
+        self._file.close()
+        self._file = None
+
+    def get_file_name(self):
+        return self._file_name
+
+    def get_treeview_items(self):
+        if self._file is None:
+            return []
+        return self._items
+
+    def is_file_opened(self):
+        return self._file != None
+
+    @staticmethod
+    def get_file_extensions():
+        return "NumPy (*.npy *.npz)"
+
+    @staticmethod
+    def sniff(header):
+        if header.startswith(NumpyAdapter._NPY_MAGIC):
+            return True
+        # other zip archives are not arrays, the name of the first member tells them apart
+        if header.startswith(NumpyAdapter._ZIP_MAGIC) and len(header) >= 30:
+            name_length, = struct.unpack("<H", header[26:28])
+            return header[30:30 + name_length].endswith(b".npy")
+        return False
+
+    @staticmethod
+    def can_open_file(file_name):
+        header = AdapterRegistry.read_header(file_name)
+        return header is not None and NumpyAdapter.sniff(header)
+
+@AdapterRegistry.adapter
+class RawBinaryAdapter(Adapter):
+    # dumps without a header, the layout of the array has to be set with `set_layout`
+    # before the file gets opened
+    _EXTENSIONS = (".raw", ".bin", ".dat")
+
+    def __init__(self):
+        self._file = None
+        self._dtype = np.dtype(np.uint8)
+        self._shape = None
+        self._offset = 0
+
+    @staticmethod
+    def parse_layout(text):
+        # e.g. "float32, 1024x768, 128", one dimension may be -1, without a shape the
+        # whole file is a vector and the offset defaults to 0
+        parts = [x.strip() for x in text.split(",")]
+        if len(parts) == 0 or len(parts) > 3 or not parts[0]:
+            raise ValueError("The layout `{0}´ has to consist of dtype, shape and offset.".format(text))
+
+        try:
+            dtype = np.dtype(parts[0])
+        except TypeError:
+            raise ValueError("The dtype `{0}´ is not known.".format(parts[0]))
+        shape = tuple(int(x) for x in parts[1].lower().split("x")) if len(parts) > 1 and parts[1] else None
+        offset = int(parts[2]) if len(parts) > 2 and parts[2] else 0
+        if shape is not None and (shape.count(-1) > 1 or any(x < -1 for x in shape)):
+            raise ValueError("The shape `{0}´ may only contain one -1 and no other negative dimensions.".format(parts[1]))
+        if offset < 0:
+            raise ValueError("The offset {0} is negative.".format(offset))
+        return dtype, shape, offset
+
+    @staticmethod
+    def needs_layout():
+        return True
+
+    def set_layout(self, dtype, shape=None, offset=0):
+        self._dtype = np.dtype(dtype)
+        self._shape = shape
+        self._offset = offset
+
+    def open_file(self, file_name):
+        try:
+            self._file = _MappedFile(file_name)
+            self._file_name = file_name
+
+            count = (os.path.getsize(file_name) - self._offset) // self._dtype.itemsize
+            shape = self._shape if self._shape is not None else (-1,)
+            if shape.count(-1) == 1:
+                known = int(np.prod([x for x in shape if x != -1], dtype=np.int64))
+                shape = tuple(count // known if x == -1 else x for x in shape)
+
+            name = os.path.splitext(os.path.basename(file_name))[0]
+            self._items = [DataItem(name=name, data=self._file.get_array(self._dtype, shape, self._offset))]
+            return True
+        except:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            return False
+
+    def close_file(self):
+        self._items = None
+        self._file.close()
+        self._file = None
+
+    def get_file_name(self):
+        return self._file_name
+
+    def get_treeview_items(self):
+        if self._file is None:
+            return []
+        return self._items
+
+    def is_file_opened(self):
+        return self._file != None
+
+    @staticmethod
+    def get_file_extensions():
+        return "Raw binary (*.raw *.bin *.dat)"
+
+    @staticmethod
+    def sniff(header):
+        # raw dumps have no signature, only their extension identifies them
+        return None
+
+    @staticmethod
+    def can_open_file(file_name):
+        return os.path.splitext(file_name)[1].lower() in RawBinaryAdapter._EXTENSIONS
\ No newline at end of file
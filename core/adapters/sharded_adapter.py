@@ -0,0 +1,213 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from core.adapters.adapter_base import Adapter, DataItem
+from core.adapters.adapter_registry import AdapterRegistry
+from core.adapters.item_collection import ItemBatches
+from core.utils.handle_pool import HandlePool
+from core.utils.user_cache import get_file_stamp
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
+import threading
+
+class ShardedAdapter(Adapter):
+    # opens a list of files, a directory or a glob pattern as one dataset, the shards
+    # are opened by the adapters of their formats when they are used the first time
+    # number of shards whose files are kept open at the same time
+    MAX_OPEN_SHARDS = 64
+    # number of shards which are indexed in parallel
+    INDEX_WORKERS = 8
+
+    def __init__(self):
+        self._shards = None
+        self._adapters = None
+        self._lock = threading.Lock()
+        self._shard_handle_pool = HandlePool(ShardedAdapter.MAX_OPEN_SHARDS)
+
+    @staticmethod
+    def get_shard_file_names(file_name):
+        if isinstance(file_name, (list, tuple)):
+            file_names = file_name
+        elif os.path.isdir(file_name):
+            file_names = [os.path.join(file_name, x) for x in os.listdir(file_name) if not x.startswith(".")]
+        else:
+            file_names = glob.glob(file_name)
+
+        return sorted(x for x in file_names if os.path.isfile(x))
+
+    def open_file(self, file_name):
+        shards = []
+        for shard_file_name in ShardedAdapter.get_shard_file_names(file_name):
+            # files which no adapter can open, e.g. notes next to the shards, are skipped, files
+            # of other formats are opened by their adapters and shown as groups
+            adapter_class = AdapterRegistry.get_adapter(shard_file_name)
+            if adapter_class is not None:
+                shards.append((shard_file_name, adapter_class))
+
+        if len(shards) == 0:
+            return False
+
+        if isinstance(file_name, (list, tuple)):
+            self._file_name = "{0} ({1} files)".format(os.path.commonpath([os.path.abspath(x) for x, _ in shards]), len(shards))
+        else:
+            self._file_name = file_name
+        self._file_stamp = (self._file_name, tuple(get_file_stamp(x) for x, _ in shards))
+        self._shards = shards
+        self._adapters = [None] * len(shards)
+        return True
+
+    def close_file(self):
+        with self._lock:
+            for adapter in self._adapters:
+                if adapter is not None:
+                    adapter.close_file()
+            self._shards = None
+            self._adapters = None
+
+    def get_file_name(self):
+        return self._file_name
+
+    def get_file_stamp(self):
+        return self._file_stamp
+
+    def get_treeview_items(self):
+        items = ItemBatches([])
+        for batch, _ in self.iter_treeview_items():
+            items.append(batch)
+        return items
+
+    def iter_treeview_items(self):
+        if self._shards is None:
+            return
+
+        # each shard is indexed by a worker, the indices are also kept in the metadata
+        # cache so that opening the shards later on does not scan them again
+        with ThreadPoolExecutor(max_workers=ShardedAdapter.INDEX_WORKERS) as executor:
+            futures = [executor.submit(ShardedAdapter._count_items, file_name, adapter_class) for file_name, adapter_class in self._shards]
+            try:
+                start = 0
+                for i, future in enumerate(futures):
+                    count = future.result()
+                    yield self._create_shard_items(i, start, count), (i + 1) / float(len(futures))
+                    # only the numbered items count towards the global index
+                    if self._is_numbered(i):
+                        start += count
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    @staticmethod
+    def _count_items(file_name, adapter_class):
+        adapter = adapter_class()
+        if not adapter.open_file(file_name):
+            raise IOError("The shard `{0}´ could not be opened.".format(file_name))
+        try:
+            return len(adapter.get_treeview_items())
+        finally:
+            adapter.close_file()
+
+    def _is_numbered(self, shard_index):
+        return self._shards[shard_index][1].get_item_name(0) is not None
+
+    def _create_shard_items(self, shard_index, start, count):
+        # numbered items, e.g. the examples of TFRecord files, are numbered across all
+        # shards of numbered items, other items are grouped by their shard
+        if self._is_numbered(shard_index):
+            return ShardItemList(self, shard_index, start, count)
+        return [ShardItem(self, shard_index)]
+
+    def get_shard_adapter(self, shard_index):
+        with self._lock:
+            if self._adapters is None:
+                return None
+
+            adapter = self._adapters[shard_index]
+            if adapter is None:
+                file_name, adapter_class = self._shards[shard_index]
+                adapter = adapter_class()
+                adapter.set_handle_pool(self._shard_handle_pool)
+                if not adapter.open_file(file_name):
+                    raise IOError("The shard `{0}´ could not be opened.".format(file_name))
+                self._adapters[shard_index] = adapter
+
+            return adapter
+
+    def get_shard_name(self, shard_index):
+        return os.path.basename(self._shards[shard_index][0])
+
+    def get_shard_item_name(self, shard_index, index):
+        return self._shards[shard_index][1].get_item_name(index)
+
+    def is_file_opened(self):
+        return self._shards != None
+
+    @staticmethod
+    def get_file_extensions():
+        return "Sharded datasets (*.*)"
+
+    @staticmethod
+    def sniff(header):
+        return False
+
+    @staticmethod
+    def can_open_file(file_name):
+        # several files, a directory or a glob pattern
+        if isinstance(file_name, (list, tuple)):
+            return len(file_name) > 1
+        # an existing file is opened by the adapter of its format, even if its name
+        # contains characters of a glob pattern, e.g. `data[1].h5`
+        if os.path.isfile(file_name):
+            return False
+        return os.path.isdir(file_name) or glob.has_magic(file_name)
+
+class ShardItemList(object):
+    # the top level items of a shard, renamed according to their global index
+    def __init__(self, adapter, shard_index, start, count):
+        self._adapter = adapter
+        self._shard_index = shard_index
+        self._start = start
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError("Item index {0} is out of range.".format(index))
+
+        item = self._adapter.get_shard_adapter(self._shard_index).get_treeview_items()[index]
+        item.name = self._adapter.get_shard_item_name(self._shard_index, self._start + index)
+        return item
+
+class ShardItem(DataItem):
+    # a shard shown as a group, its file is only opened once the group gets expanded
+    def __init__(self, adapter, shard_index):
+        super(ShardItem, self).__init__(name=adapter.get_shard_name(shard_index))
+        self._adapter = adapter
+        self._shard_index = shard_index
+
+    def _load_children(self):
+        return self._adapter.get_shard_adapter(self._shard_index).get_treeview_items()
+
+    def has_children(self):
+        return True
\ No newline at end of file
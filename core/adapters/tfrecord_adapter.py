@@ -20,11 +20,8 @@
 
 from core.adapters.adapter_base import Adapter, DataItem
 from core.adapters.adapter_registry import AdapterRegistry
-import h5py as h5
-from PyQt5 import QtCore, QtGui, QtWidgets
-from windows.ui.mainwindow import Ui_MainWindow
-from PyQt5.QtWidgets import QMessageBox
-from core.utils.tfrecord import TFRecord
+from core.utils.tfrecord import TFRecord, is_tfrecord_header
+from core.utils.metadata_cache import MetadataCache
 
 @AdapterRegistry.adapter
 class TFRecordAdapter(Adapter):
@@ -33,7 +30,9 @@ class TFRecordAdapter(Adapter):
 
     def open_file(self, file_name):
         try:
-            self._file = TFRecord(file_name)
+            # the record offsets of files which have been opened before are not scanned again
+            offsets = MetadataCache().get(file_name, "tfrecord-offsets")
+            self._file = TFRecord(file_name, offsets=offsets, build_index=False, handle_pool=self._handle_pool)
             self._file_name = file_name
             return True
         except:
@@ -48,33 +47,34 @@ class TFRecordAdapter(Adapter):
         return self._file_name
 
     def get_treeview_items(self):
-        def create_feature(example, feature_name):
-            feature_value = example.features.feature.get(feature_name)
+        if self._file is None:
+            return []
 
-            # TODO: Add support for multiple sub-fields
-            value = feature_value.ListFields()[0][1].value
+        if not self._file.has_index():
+            for _ in self._file.iter_index():
+                pass
+            self._save_offsets()
 
-            if len(value) == 1:
-                value = value[0]
-
-            item = DataItem(name=feature_name, data=value)
+        return TFRecordExampleList(self._file)
 
-            return item
+    def iter_treeview_items(self):
+        if self._file is None:
+            return
 
-        def create_example(example, index):
-            item = DataItem(name="Example #{0}".format(index))
+        if self._file.has_index():
+            yield TFRecordExampleList(self._file), 1.0
+            return
 
-            for feature in example.features.feature:
-                item.children.append(create_feature(example, feature))
+        # the examples are handed out while the record headers are still being scanned
+        start = 0
+        for count, progress in self._file.iter_index():
+            yield TFRecordExampleList(self._file, start, count), progress
+            start = count
 
-            return item
+        self._save_offsets()
 
-        items = []
-        if self._file:
-            for i, example in enumerate(self._file):
-                items.append(create_example(example, i))
-
-        return items
+    def _save_offsets(self):
+        MetadataCache().put(self._file_name, "tfrecord-offsets", self._file.get_offsets())
 
     def is_file_opened(self):
         return self._file != None
@@ -83,12 +83,58 @@ class TFRecordAdapter(Adapter):
     def get_file_extensions():
         return "tfrecord (*.tfrecord)"
 
+    @staticmethod
+    def get_item_name(index):
+        return "Example #{0}".format(index)
+
+    @staticmethod
+    def sniff(header):
+        return is_tfrecord_header(header)
+
     @staticmethod
     def can_open_file(file_name):
-        try:
-            test_file = TFRecord(file_name)
-            test_file.close()
-            del test_file
-            return True
-        except:
-            return False
\ No newline at end of file
+        header = AdapterRegistry.read_header(file_name)
+        return header is not None and TFRecordAdapter.sniff(header)
+
+class TFRecordExampleList(object):
+    # sequence of the examples in the file which creates the items on access,
+    # it may be limited to a range of the examples
+    def __init__(self, record_file, start=0, stop=None):
+        self._record_file = record_file
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        stop = self._stop if self._stop is not None else len(self._record_file)
+        return stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("Example index {0} is out of range.".format(index))
+        return TFRecordExampleItem(self._record_file, self._start + index)
+
+class TFRecordExampleItem(DataItem):
+    # the record is only read and parsed once its features are requested
+    def __init__(self, record_file, index):
+        super(TFRecordExampleItem, self).__init__(name=TFRecordAdapter.get_item_name(index))
+        self._record_file = record_file
+        self._index = index
+
+    def _load_children(self):
+        example = self._record_file[self._index]
+
+        children = []
+        for feature_name, value in example.items():
+            if value is not None and len(value) == 1:
+                value = value[0]
+
+            children.append(DataItem(name=feature_name, data=value))
+
+        return children
+
+    def has_children(self):
+        return True
\ No newline at end of file
@@ -19,6 +19,8 @@
 # THE SOFTWARE.
 
 from abc import ABC, abstractclassmethod
+import sys
+import numpy as np
 
 class ParsedData(ABC):
     def __init__(self, raw_value):
@@ -26,4 +28,30 @@ class ParsedData(ABC):
         
     @abstractclassmethod
     def get_data(self):
-        pass
\ No newline at end of file
+        pass
+
+    def get_nbytes(self):
+        data = self.get_data()
+        if hasattr(data, "nbytes"):
+            return data.nbytes
+        return sys.getsizeof(data)
+
+    def get_file_extension(self):
+        # the extension of the files written by `save`
+        data = self.get_data()
+        if isinstance(data, str):
+            return ".txt"
+        if isinstance(data, bytes):
+            return ".bin"
+        return ".npy"
+
+    def save(self, file_name):
+        data = self.get_data()
+        if isinstance(data, str):
+            with open(file_name, "w", encoding="utf-8") as f:
+                f.write(data)
+        elif isinstance(data, bytes):
+            with open(file_name, "wb") as f:
+                f.write(data)
+        else:
+            np.save(file_name, np.asarray(data))
\ No newline at end of file
@@ -32,6 +32,28 @@ class Parser(ABC):
     def parse(self, data):
         pass
 
+    def can_parse_collection(self):
+        # whether `parse_collection` is implemented, the thumbnails are only offered then
+        return False
+
+    def parse_collection(self, collection):
+        # parsers which can summarize many items at once, e.g. as thumbnails, return
+        # the parsed data of the whole `ItemCollection` here
+        return None
+
+    def get_settings(self):
+        # the settings which influence the result of `parse`, they have to be hashable
+        return {}
+
+    def set_settings_changed_callback(self, callback):
+        self._settings_changed_callback = callback
+
+    def _settings_changed(self):
+        # has to be called by the parser whenever one of its settings got changed
+        callback = getattr(self, "_settings_changed_callback", None)
+        if callback is not None:
+            callback()
+
     @staticmethod
     def get_ui_name():
         pass
\ No newline at end of file
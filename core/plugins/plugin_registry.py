@@ -20,52 +20,83 @@
 
 from core.plugins.visualizer_base import Visualizer
 from core.plugins.parser_base import Parser
-from glob import glob
-import os
-import imp
-import inspect
+from core.utils.module_loader import load_modules, read_manifest, register_class, add_entries
 
 class PluginRegistry(object):
     _visualizers = []
     _parsers = []
 
+    # visualizers are kept in modules of their own as they need a GUI
+    VISUALIZER_MODULE_SUFFIX = "_visualizer"
+
     @staticmethod
     def visualizer(visualizer_class):
         if not issubclass(visualizer_class, Visualizer):
             raise ValueError("The class `{0}´ does not inherit from Visualizer class. Therefore, it cannot be registered as a visualizer plugin.".format(visualizer_class))
-        if not visualizer_class in PluginRegistry._visualizers:
-            PluginRegistry._visualizers.append(visualizer_class)
+        register_class(PluginRegistry._visualizers, visualizer_class)
+
+        return visualizer_class
 
     @staticmethod
     def get_visualizers():
-        for visualizer in PluginRegistry._visualizers:
-            yield visualizer
+        for entry in PluginRegistry._visualizers:
+            yield entry.get_class()
 
     @staticmethod
-    def get_visualizer(parsed_data_type):
-        for visualizer_type in PluginRegistry._visualizers:
-            if visualizer_type.validate_input_format(parsed_data_type):
+    def get_compatible_visualizers(parsed_data_type):
+        visualizers = []
+        for entry in PluginRegistry._visualizers:
+            # visualizers of other data types are not imported
+            parsed_data_types = entry.describe("parsed_data_types")
+            if parsed_data_types is not None and parsed_data_type.__name__ not in parsed_data_types:
+                continue
+            if entry.get_class().validate_input_format(parsed_data_type):
+                visualizers.append(entry.get_class())
+        return visualizers
+
+    @staticmethod
+    def get_visualizer(parsed_data_type, ui_name=None):
+        # the first compatible visualizer unless one is picked by its name
+        visualizers = PluginRegistry.get_compatible_visualizers(parsed_data_type)
+        for visualizer_type in visualizers:
+            if ui_name is None or visualizer_type.get_ui_name() == ui_name:
                 return visualizer_type
-        else:
-            return None
+        return visualizers[0] if visualizers else None
 
     @staticmethod
     def parser(parser_class):
         if not issubclass(parser_class, Parser):
             raise ValueError("The class `{0}´ does not inherit from Parser class. Therefore, it cannot be registered as a parser plugin.".format(parser_class))
-        if not parser_class in PluginRegistry._parsers:
-            PluginRegistry._parsers.append(parser_class)
+        register_class(PluginRegistry._parsers, parser_class)
+
+        return parser_class
 
     @staticmethod
     def get_parsers():
-        for plugin in PluginRegistry._parsers:
-            yield plugin
+        for entry in PluginRegistry._parsers:
+            yield entry.get_class()
+
+    @staticmethod
+    def get_parser_names():
+        return [entry.describe("ui_name") or entry.get_class().get_ui_name() for entry in PluginRegistry._parsers]
 
     @staticmethod
     def get_parser(index):
-        return PluginRegistry._parsers[index]
+        return PluginRegistry._parsers[index].get_class()
 
     @staticmethod
-    def load_plugins(plugin_directory):
-        for file_name in glob(os.path.join(plugin_directory, "*.py")):
-            imp.load_source(os.path.basename(file_name), file_name)
\ No newline at end of file
+    def load_plugins(plugin_directory, load_visualizers=True):
+        # the plugins are imported as modules of a package so that visualizers can
+        # import the data types of their parsers, without the visualizers PyQt5 is not needed,
+        # plugins of the manifest are only imported once they are used
+        manifest_modules = set()
+        sections = ["parsers", "visualizers"] if load_visualizers else ["parsers"]
+        for section in sections:
+            entries = read_manifest(plugin_directory, section)
+            add_entries(PluginRegistry._parsers if section == "parsers" else PluginRegistry._visualizers, entries)
+            manifest_modules.update(entry.describe("module") for entry in entries)
+
+        if load_visualizers:
+            load_modules(plugin_directory, lambda name: name not in manifest_modules)
+        else:
+            load_modules(plugin_directory, lambda name: name not in manifest_modules and not name.endswith(PluginRegistry.VISUALIZER_MODULE_SUFFIX))
\ No newline at end of file
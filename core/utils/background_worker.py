@@ -0,0 +1,67 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from PyQt5 import QtCore
+
+class BackgroundWorker(QtCore.QObject):
+    # runs the long computations of a widget, e.g. of a visualizer, in a background thread,
+    # the worker belongs to the widget and is cancelled once the widget gets removed, after
+    # which nothing is emitted anymore, derived classes declare the executor they run on,
+    # so the workers of one kind wait for each other but not for the ones of other kinds
+    progress = QtCore.pyqtSignal(float)
+    failed = QtCore.pyqtSignal(object)
+
+    _executor = None
+
+    def __init__(self, parent):
+        super(BackgroundWorker, self).__init__(parent)
+        self._cancelled = False
+        parent.destroyed.connect(self.cancel)
+
+    def submit(self, function, *args):
+        # exceptions of the function are emitted by `failed`
+        type(self)._executor.submit(self._run, function, args)
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def _run(self, function, args):
+        if self._cancelled:
+            return
+
+        try:
+            function(*args)
+        except Exception as error:
+            self.emit_signal(self.failed, error)
+
+    def emit_progress(self, progress):
+        self.emit_signal(self.progress, progress)
+
+    def emit_signal(self, signal, *args):
+        if self._cancelled:
+            return
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            # the widget has been removed in the meantime
+            pass
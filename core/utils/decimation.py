@@ -0,0 +1,266 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import math
+import numpy as np
+from core.utils.lazy_array import LazyArray
+
+def _align_read_size(read_size, block_size, chunk_size):
+    # reads are aligned to the blocks and to the chunks of the dataset as well, unless the
+    # common multiple exceeds the read size
+    chunk_alignment = chunk_size * block_size // math.gcd(chunk_size, block_size)
+    alignment = chunk_alignment if chunk_alignment <= read_size else block_size
+    return max(alignment, read_size - read_size % alignment)
+
+class MinMaxPyramid(object):
+    # minima and maxima of a 1-d signal over blocks of growing size, so that the envelope
+    # of any range can be drawn from at most a few values per pixel, e.g. a signal with
+    # millions of samples needs only one pass over its values
+    # number of samples of the blocks of the first level
+    BASE_BLOCK = 16
+    # number of blocks of a level which are merged into one block of the next level
+    FACTOR = 4
+    # number of bytes which are read at once while building the first level
+    READ_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, array):
+        self._array = array
+        self._length = len(array)
+        # (block size, minima, maxima) of each level, the finest first
+        self._levels = []
+
+    def __len__(self):
+        return self._length
+
+    def build(self, progress=None, is_cancelled=None):
+        # returns False if it has been cancelled
+        chunk = self._array.get_chunk_shape()[0] if isinstance(self._array, LazyArray) else 1
+        read_size = _align_read_size(max(1, MinMaxPyramid.READ_SIZE // self._array.dtype.itemsize), MinMaxPyramid.BASE_BLOCK, chunk)
+
+        minima = []
+        maxima = []
+        # samples at the end of a read which do not fill a block, they are prepended to the next read
+        remainder = np.empty(0)
+        for start in range(0, self._length, read_size):
+            if is_cancelled is not None and is_cancelled():
+                return False
+
+            stop = min(self._length, start + read_size)
+            values = np.asarray(self._array[start:stop], dtype=np.float64)
+            if len(remainder) > 0:
+                values = np.concatenate([remainder, values])
+            if stop < self._length:
+                full = len(values) - len(values) % MinMaxPyramid.BASE_BLOCK
+                values, remainder = values[:full], values[full:]
+
+            if len(values) > 0:
+                block_minima, block_maxima = MinMaxPyramid._reduce(values, values, MinMaxPyramid.BASE_BLOCK)
+                minima.append(block_minima)
+                maxima.append(block_maxima)
+            if progress is not None:
+                progress(stop / self._length)
+
+        if len(minima) == 0:
+            return True
+
+        levels = [(MinMaxPyramid.BASE_BLOCK, np.concatenate(minima), np.concatenate(maxima))]
+        while len(levels[-1][1]) > 1:
+            block_size, level_minima, level_maxima = levels[-1]
+            levels.append((block_size * MinMaxPyramid.FACTOR,) + MinMaxPyramid._reduce(level_minima, level_maxima, MinMaxPyramid.FACTOR))
+        self._levels = levels
+        return True
+
+    @staticmethod
+    def _reduce(minima, maxima, factor):
+        # NaN values are ignored unless a block consists of NaN values only
+        starts = np.arange(0, len(minima), factor)
+        return np.fmin.reduceat(minima, starts), np.fmax.reduceat(maxima, starts)
+
+    def is_built(self):
+        return len(self._levels) > 0 or self._length == 0
+
+    def get_range(self):
+        # minimum and maximum of the whole signal
+        if len(self._levels) == 0:
+            return None
+        return float(self._levels[-1][1][0]), float(self._levels[-1][2][0])
+
+    def get_envelope(self, start, stop, columns):
+        # returns the sample positions, minima and maxima of at most `columns` columns
+        # covering the samples [start, stop), ranges with only a few samples per column
+        # are returned as the samples themselves
+        start = max(0, int(start))
+        stop = min(self._length, int(np.ceil(stop)))
+        count = stop - start
+        if count <= 0 or columns <= 0:
+            return np.empty(0), np.empty(0), np.empty(0)
+
+        if count <= 2 * columns:
+            values = np.asarray(self._array[start:stop], dtype=np.float64)
+            return np.arange(start, stop, dtype=np.float64), values, values
+
+        # the coarsest level whose blocks are still smaller than a column
+        samples_per_column = count / columns
+        block_size, minima, maxima = 1, None, None
+        for level_block_size, level_minima, level_maxima in self._levels:
+            if level_block_size > samples_per_column:
+                break
+            block_size, minima, maxima = level_block_size, level_minima, level_maxima
+
+        first = start // block_size
+        last = (stop + block_size - 1) // block_size
+        if minima is None:
+            # fewer samples per column than the blocks of the first level have
+            minima = maxima = np.asarray(self._array[start:stop], dtype=np.float64)
+            first, last = start, stop
+            offset = start
+        else:
+            minima, maxima = minima[first:last], maxima[first:last]
+            offset = first * block_size
+
+        # the first block of each column, the columns are as wide as the blocks allow
+        edges = start + np.arange(columns) * (count / columns)
+        starts = np.unique(np.clip((edges - offset) // block_size, 0, len(minima) - 1).astype(np.intp))
+        positions = offset + (starts + 0.5) * block_size
+        return positions, np.fmin.reduceat(minima, starts), np.fmax.reduceat(maxima, starts)
+
+def _get_pixel_starts(start, stop, pixels, block_size, first, count):
+    # the first of the `count` blocks of each pixel, beginning with block `first`, the
+    # pixels are as wide as the blocks allow
+    edges = start + np.arange(pixels) * ((stop - start) / pixels)
+    return np.unique(np.clip(edges // block_size - first, 0, count - 1).astype(np.intp))
+
+class MinMaxPyramid2D(object):
+    # minima and maxima of a 2-d array over tiles of growing size, so that any range of it
+    # can be drawn from about one tile per pixel without reading the array again, e.g. a
+    # zoomed out view of a large dataset, in which strided reads would also miss peaks
+    # number of values of each axis of the tiles of the first level
+    BASE_BLOCK = 4
+    # number of tiles of each axis of a level which are merged into one tile of the next level
+    FACTOR = 2
+    # axes with at most this many tiles are not reduced any further
+    MIN_SIZE = 256
+    # number of bytes which are read at once while building the first level
+    READ_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, array):
+        self._array = array
+        self.shape = tuple(array.shape)
+        # (tile rows, tile columns, minima, maxima) of each level, the finest first
+        self._levels = []
+        self._built = False
+
+    def build(self, progress=None, is_cancelled=None):
+        # returns False if it has been cancelled
+        rows, columns = self.shape
+        row_block = MinMaxPyramid2D.BASE_BLOCK if rows > MinMaxPyramid2D.MIN_SIZE else 1
+        column_block = MinMaxPyramid2D.BASE_BLOCK if columns > MinMaxPyramid2D.MIN_SIZE else 1
+        if row_block == 1 and column_block == 1:
+            # small enough to be drawn from the array itself
+            self._built = True
+            return True
+
+        # the array is read in tiles of whole tiles of the first level, which are as wide
+        # as the read size allows
+        read_size = max(1, MinMaxPyramid2D.READ_SIZE // self._array.dtype.itemsize)
+        chunk_rows, chunk_columns = self._array.get_chunk_shape() if isinstance(self._array, LazyArray) else (1, 1)
+        read_columns = _align_read_size(max(column_block, min(columns, read_size // row_block)), column_block, chunk_columns)
+        read_rows = _align_read_size(max(row_block, read_size // read_columns), row_block, chunk_rows)
+
+        minima = []
+        maxima = []
+        for start in range(0, rows, read_rows):
+            band_minima = []
+            band_maxima = []
+            for column_start in range(0, columns, read_columns):
+                if is_cancelled is not None and is_cancelled():
+                    return False
+
+                values = np.asarray(self._array[start:start + read_rows, column_start:column_start + read_columns], dtype=np.float64)
+                tile_minima, tile_maxima = MinMaxPyramid2D._reduce(values, values, row_block, column_block)
+                band_minima.append(tile_minima)
+                band_maxima.append(tile_maxima)
+            minima.append(np.concatenate(band_minima, axis=1))
+            maxima.append(np.concatenate(band_maxima, axis=1))
+            if progress is not None:
+                progress(min(rows, start + read_rows) / rows)
+
+        levels = [(row_block, column_block, np.concatenate(minima), np.concatenate(maxima))]
+        while True:
+            level_row_block, level_column_block, level_minima, level_maxima = levels[-1]
+            row_factor = MinMaxPyramid2D.FACTOR if level_minima.shape[0] > MinMaxPyramid2D.MIN_SIZE else 1
+            column_factor = MinMaxPyramid2D.FACTOR if level_minima.shape[1] > MinMaxPyramid2D.MIN_SIZE else 1
+            if row_factor == 1 and column_factor == 1:
+                break
+            levels.append((level_row_block * row_factor, level_column_block * column_factor) +
+                          MinMaxPyramid2D._reduce(level_minima, level_maxima, row_factor, column_factor))
+        self._levels = levels
+        self._built = True
+        return True
+
+    @staticmethod
+    def _reduce_tiles(values, function, row_factor, column_factor):
+        # the values are padded to whole tiles with NaN values, which are ignored unless
+        # a tile consists of NaN values only, reducing the axes of a reshaped array is
+        # much faster than `reduceat` along the columns
+        rows, columns = -(-values.shape[0] // row_factor), -(-values.shape[1] // column_factor)
+        if values.shape != (rows * row_factor, columns * column_factor):
+            padded = np.full((rows * row_factor, columns * column_factor), np.nan)
+            padded[:values.shape[0], :values.shape[1]] = values
+            values = padded
+        tiles = function.reduce(values.reshape(rows, row_factor, columns, column_factor), axis=1)
+        return function.reduce(tiles, axis=2)
+
+    @staticmethod
+    def _reduce(minima, maxima, row_factor, column_factor):
+        return (MinMaxPyramid2D._reduce_tiles(minima, np.fmin, row_factor, column_factor),
+                MinMaxPyramid2D._reduce_tiles(maxima, np.fmax, row_factor, column_factor))
+
+    def is_built(self):
+        return self._built
+
+    def get_tiles(self, rows, columns, height, width):
+        # returns the minima and maxima of at most `height` x `width` tiles covering the
+        # (start, stop) ranges of the rows and columns, ranges with only a few values per
+        # pixel are read from the array
+        rows_per_pixel = max(1.0, (rows[1] - rows[0]) / max(1, height))
+        columns_per_pixel = max(1.0, (columns[1] - columns[0]) / max(1, width))
+
+        # the coarsest level whose tiles are still smaller than a pixel
+        row_block, column_block, minima, maxima = 1, 1, None, None
+        for level_row_block, level_column_block, level_minima, level_maxima in self._levels:
+            if level_row_block > rows_per_pixel or level_column_block > columns_per_pixel:
+                break
+            row_block, column_block, minima, maxima = level_row_block, level_column_block, level_minima, level_maxima
+
+        first_row, last_row = rows[0] // row_block, -(-rows[1] // row_block)
+        first_column, last_column = columns[0] // column_block, -(-columns[1] // column_block)
+        if minima is None:
+            minima = maxima = np.asarray(self._array[rows[0]:rows[1], columns[0]:columns[1]], dtype=np.float64)
+        else:
+            minima = minima[first_row:last_row, first_column:last_column]
+            maxima = maxima[first_row:last_row, first_column:last_column]
+        if minima.size == 0:
+            return minima, maxima
+
+        row_starts = _get_pixel_starts(rows[0], rows[1], max(1, height), row_block, first_row, minima.shape[0])
+        column_starts = _get_pixel_starts(columns[0], columns[1], max(1, width), column_block, first_column, minima.shape[1])
+        return (np.fmin.reduceat(np.fmin.reduceat(minima, row_starts, axis=0), column_starts, axis=1),
+                np.fmax.reduceat(np.fmax.reduceat(maxima, row_starts, axis=0), column_starts, axis=1))
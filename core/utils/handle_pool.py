@@ -0,0 +1,52 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from collections import OrderedDict
+import threading
+
+class HandlePool(object):
+    # limits the number of files which are open at the same time, the handles of the
+    # least recently used file get released and are opened again on its next use
+    def __init__(self, max_open):
+        self._max_open = max(1, max_open)
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, handle):
+        # has to be called whenever the handle is used, `handle.release()` closes the file
+        released = []
+        with self._lock:
+            if handle in self._handles:
+                self._handles.move_to_end(handle)
+            else:
+                self._handles[handle] = True
+                while len(self._handles) > self._max_open:
+                    released.append(self._handles.popitem(last=False)[0])
+
+        # released outside of the lock as the handles use locks of their own
+        for handle in released:
+            handle.release()
+
+    def remove(self, handle):
+        with self._lock:
+            self._handles.pop(handle, None)
+
+    def __len__(self):
+        return len(self._handles)
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import math
+import numpy as np
+
+NORMALIZATION_AUTO = "Auto"
+NORMALIZATION_MIN_MAX = "Min/Max"
+NORMALIZATION_PERCENTILE = "Percentile"
+NORMALIZATION_WINDOW = "Window/Level"
+
+NORMALIZATIONS = [NORMALIZATION_AUTO, NORMALIZATION_MIN_MAX, NORMALIZATION_PERCENTILE, NORMALIZATION_WINDOW]
+
+# number of pixels the intensity range is estimated from
+SAMPLE_SIZE = 256 * 256
+# number of values which are converted at once
+BLOCK_SIZE = 256 * 1024
+
+def estimate_range(image, normalization, percentiles=(1.0, 99.0)):
+    # the range is estimated on a strided subsample instead of the full image
+    stride = max(1, int(math.sqrt(image.shape[0] * image.shape[1] / SAMPLE_SIZE)))
+    sample = image[::stride, ::stride]
+    if sample.dtype.kind == "f":
+        # single NaN or infinite pixels must not decide the range of the whole image
+        sample = sample[np.isfinite(sample)]
+        if sample.size == 0:
+            return float("nan"), float("nan")
+
+    if normalization == NORMALIZATION_PERCENTILE:
+        low, high = np.nanpercentile(sample, percentiles)
+    else:
+        low, high = np.nanmin(sample), np.nanmax(sample)
+
+    return float(low), float(high)
+
+def to_uint8(image, normalization=NORMALIZATION_AUTO, window=None, level=None):
+    if image.dtype == np.uint8 and normalization == NORMALIZATION_AUTO:
+        return np.ascontiguousarray(image)
+
+    if image.dtype == np.bool_:
+        image = image.view(np.uint8)
+
+    if normalization == NORMALIZATION_WINDOW and window is not None and level is not None:
+        low, high = level - window / 2.0, level + window / 2.0
+    else:
+        low, high = estimate_range(image, normalization)
+
+    if not np.isfinite(low) or not np.isfinite(high):
+        # there is no finite value at all
+        return np.zeros(image.shape, dtype=np.uint8)
+
+    scale = 255.0 / (high - low) if high > low else 0.0
+
+    # the full pass works on blocks of rows which fit into the cache, so the
+    # float32 intermediate never gets as large as the image
+    output = np.empty(image.shape, dtype=np.uint8)
+    row_size = max(1, int(np.prod(image.shape[1:])))
+    block_rows = max(1, BLOCK_SIZE // row_size)
+    buffer = np.empty((block_rows,) + image.shape[1:], dtype=np.float32)
+
+    for start in range(0, image.shape[0], block_rows):
+        block = image[start:start + block_rows]
+        block_buffer = buffer[:len(block)]
+        np.subtract(block, low, out=block_buffer, casting="unsafe")
+        # values outside of the range, including infinities, are clipped before they
+        # are scaled, so they never turn into NaN
+        np.clip(block_buffer, 0, high - low, out=block_buffer)
+        block_buffer *= scale
+        np.clip(block_buffer, 0, 255, out=block_buffer)
+        if image.dtype.kind == "f":
+            block_buffer[np.isnan(block_buffer)] = 0
+        output[start:start + block_rows] = block_buffer
+
+    return output
\ No newline at end of file
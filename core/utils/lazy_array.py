@@ -0,0 +1,86 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import threading
+import numpy as np
+
+class LazyArray(object):
+    # array-like handle of a dataset which is too large to be read at once, indexing
+    # it reads only the selected hyperslab through `reader(selection)`
+    # size in bytes of the chunks assumed for datasets without chunking
+    CONTIGUOUS_CHUNK_BYTES = 1 << 20
+
+    def __init__(self, reader, shape, dtype, chunks=None, source=None):
+        self._reader = reader
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.chunks = tuple(chunks) if chunks is not None else None
+        # (file name, path) of the dataset, e.g. for caches of derived data
+        self.source = source
+        # number of bytes which have been read through this handle so far
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    def __len__(self):
+        if not self.shape:
+            raise TypeError("len() of unsized object")
+        return self.shape[0]
+
+    def _read(self, selection):
+        values = self._reader(selection)
+        with self._lock:
+            self.bytes_read += int(getattr(values, "nbytes", 0))
+        return values
+
+    def __getitem__(self, selection):
+        return self._read(selection)
+
+    def __array__(self, dtype=None, copy=None):
+        # reads everything, only meant for consumers which need the whole array
+        array = np.asarray(self._read(()))
+        if dtype is not None:
+            array = array.astype(dtype, copy=False)
+        return array
+
+    def get_chunk_shape(self):
+        if self.chunks is not None:
+            return self.chunks
+
+        # datasets without chunking are split into contiguous blocks of a bounded size,
+        # the leading axes are reduced first
+        chunk = list(self.shape)
+        for axis in range(self.ndim):
+            trailing_bytes = int(np.prod(chunk[axis + 1:], dtype=np.int64)) * self.dtype.itemsize
+            if chunk[axis] * trailing_bytes <= LazyArray.CONTIGUOUS_CHUNK_BYTES:
+                break
+            chunk[axis] = max(1, min(chunk[axis], LazyArray.CONTIGUOUS_CHUNK_BYTES // max(1, trailing_bytes)))
+        return tuple(max(1, x) for x in chunk)
\ No newline at end of file
@@ -0,0 +1,88 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import hashlib
+import os
+import pickle
+from core.utils.user_cache import get_cache_directory, get_file_stamp
+
+class MetadataCache(object):
+    # metadata of data files (tree structure, shapes, record offsets) stored in the
+    # user cache directory, an entry is only valid as long as path, size and mtime
+    # and optionally a hash of the content are unchanged
+    # bytes at the start and at the end of a file which are hashed
+    CONTENT_SAMPLE_SIZE = 1024 * 1024
+
+    def __init__(self, directory=None, hash_content=False):
+        if directory is None:
+            try:
+                directory = get_cache_directory("metadata")
+            except OSError:
+                # the cache is optional, without a directory nothing is cached
+                directory = None
+        self._directory = directory
+        self._hash_content = hash_content
+
+    def _get_file_name(self, file_name, name):
+        digest = hashlib.sha1(repr((os.path.abspath(file_name), name)).encode("utf-8")).hexdigest()
+        return os.path.join(self._directory, digest + ".pickle")
+
+    def _get_stamp(self, file_name):
+        stamp = get_file_stamp(file_name)
+        if not self._hash_content:
+            return stamp
+
+        # a sample of the content, files of the same size are usually changed at their ends
+        content_hash = hashlib.sha1()
+        with open(file_name, "rb") as f:
+            content_hash.update(f.read(MetadataCache.CONTENT_SAMPLE_SIZE))
+            f.seek(max(0, stamp[1] - MetadataCache.CONTENT_SAMPLE_SIZE))
+            content_hash.update(f.read(MetadataCache.CONTENT_SAMPLE_SIZE))
+        return stamp + (content_hash.hexdigest(),)
+
+    def get(self, file_name, name):
+        if self._directory is None:
+            return None
+
+        try:
+            with open(self._get_file_name(file_name, name), "rb") as f:
+                stamp, value = pickle.load(f)
+            if stamp != self._get_stamp(file_name):
+                return None
+            return value
+        except Exception:
+            # truncated or stale pickles, e.g. of classes which have been renamed in the
+            # meantime, can raise almost anything, they are treated as a miss
+            return None
+
+    def put(self, file_name, name, value):
+        if self._directory is None:
+            return
+
+        cache_file_name = self._get_file_name(file_name, name)
+        try:
+            # written under a temporary name so that readers never see partial files
+            temporary_file_name = "{0}.{1}.tmp".format(cache_file_name, os.getpid())
+            with open(temporary_file_name, "wb") as f:
+                pickle.dump((self._get_stamp(file_name), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_file_name, cache_file_name)
+        except OSError:
+            # the cache is optional, e.g. the directory might be read-only
+            pass
\ No newline at end of file
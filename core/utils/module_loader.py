@@ -0,0 +1,152 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from glob import glob
+import importlib.util
+import json
+import os
+import sys
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+def get_package_name(directory):
+    # the dotted name of the directory relative to the import path, e.g. core.adapters
+    directory = os.path.abspath(directory)
+    for path in sys.path:
+        path = os.path.abspath(path or os.curdir)
+        if directory.startswith(path + os.sep):
+            return os.path.relpath(directory, path).replace(os.sep, ".")
+    return os.path.basename(directory)
+
+def import_source(module_name, file_name, package_directory=None):
+    # modules which have been imported before, e.g. by other modules, are not executed again
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    package_name = module_name.rpartition(".")[0]
+    if package_name and package_name not in sys.modules and package_directory is not None:
+        # the package has to exist so that the modules can import each other
+        init_file_name = os.path.join(package_directory, "__init__.py")
+        package_spec = importlib.util.spec_from_file_location(package_name, init_file_name if os.path.exists(init_file_name) else None,
+                                                              submodule_search_locations=[package_directory])
+        package = importlib.util.module_from_spec(package_spec)
+        sys.modules[package_name] = package
+        if package_spec.loader is not None:
+            package_spec.loader.exec_module(package)
+
+    spec = importlib.util.spec_from_file_location(module_name, file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except:
+        del sys.modules[module_name]
+        raise
+    return module
+
+def load_modules(directory, module_filter=None):
+    # imports the modules of the directory as modules of its package, the filter
+    # gets the name of each module and decides whether it is imported
+    package_name = get_package_name(directory)
+    for file_name in sorted(glob(os.path.join(directory, "*.py"))):
+        module_name = os.path.splitext(os.path.basename(file_name))[0]
+        if module_name.startswith("_") or (module_filter is not None and not module_filter(module_name)):
+            continue
+        import_source("{0}.{1}".format(package_name, module_name), file_name, directory)
+
+class RegistryEntry(object):
+    # a class of a registry, classes which are described by a manifest are only
+    # imported once they are actually needed
+    def __init__(self, registered_class=None, description=None, module_name=None, file_name=None, package_directory=None):
+        self._class = registered_class
+        self._description = description
+        self._module_name = module_name if registered_class is None else registered_class.__module__
+        self._name = description["name"] if registered_class is None else registered_class.__name__
+        self._file_name = file_name
+        self._package_directory = package_directory
+
+    def matches(self, entry_class_or_entry):
+        if isinstance(entry_class_or_entry, RegistryEntry):
+            return (self._module_name, self._name) == (entry_class_or_entry._module_name, entry_class_or_entry._name)
+        return (self._module_name, self._name) == (entry_class_or_entry.__module__, entry_class_or_entry.__name__)
+
+    def set_class(self, registered_class):
+        self._class = registered_class
+
+    def set_description(self, entry):
+        self._description = entry._description
+        self._file_name = entry._file_name
+        self._package_directory = entry._package_directory
+
+    def get_module_name(self):
+        return self._module_name
+
+    def is_loaded(self):
+        return self._class is not None
+
+    def describe(self, key, default=None):
+        # a property from the manifest, which is available without importing the class
+        if self._description is None:
+            return default
+        return self._description.get(key, default)
+
+    def get_class(self):
+        if self._class is None:
+            # the decorators of the module register the class with this entry
+            module = import_source(self._module_name, self._file_name, self._package_directory)
+            if self._class is None:
+                self._class = getattr(module, self._name)
+        return self._class
+
+def read_manifest(directory, section):
+    # the manifest of a directory lists the classes of its modules together with the
+    # properties the registry needs before the modules are imported
+    file_name = os.path.join(directory, MANIFEST_FILE_NAME)
+    if not os.path.exists(file_name):
+        return []
+
+    with open(file_name, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    package_name = get_package_name(directory)
+    entries = []
+    for description in manifest.get(section, []):
+        module_name = "{0}.{1}".format(package_name, description["module"])
+        entries.append(RegistryEntry(description=description, module_name=module_name,
+                                     file_name=os.path.join(directory, description["module"] + ".py"), package_directory=directory))
+    return entries
+
+def register_class(entries, registered_class):
+    # classes of modules from a manifest are attached to their entries, other classes get entries of their own
+    for entry in entries:
+        if entry.matches(registered_class):
+            entry.set_class(registered_class)
+            return
+    entries.append(RegistryEntry(registered_class))
+
+def add_entries(entries, new_entries):
+    # modules may have been imported before their manifest was read
+    for new_entry in new_entries:
+        for entry in entries:
+            if entry.matches(new_entry):
+                entry.set_description(new_entry)
+                break
+        else:
+            entries.append(new_entry)
\ No newline at end of file
@@ -0,0 +1,178 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from core.utils.lazy_array import LazyArray
+from collections import deque
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+class Span(object):
+    # one timed call of a hot path, the bytes have to be added by the code in the span
+    def __init__(self, profiler, name, args):
+        self.name = name
+        self.args = args
+        self.thread_id = threading.get_ident()
+        self.start = 0.0
+        self.duration = 0.0
+        self.bytes = 0
+        self.peak_bytes = None
+
+        self._profiler = profiler
+        self._start_memory = 0
+        self._peak_memory = 0
+
+    def add_bytes(self, count):
+        self.bytes += count
+
+    def __enter__(self):
+        self._profiler._start_span(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self.start
+        self._profiler._end_span(self)
+        return False
+
+class _DisabledSpan(object):
+    # returned while profiling is disabled, so that the hot paths only pay for a flag check
+    def add_bytes(self, count):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+class Profiler(object):
+    # collects the spans of the hot paths, e.g. reading, parsing and visualizing an item
+    # number of spans which are kept for the trace
+    MAX_SPANS = 100000
+
+    _DISABLED_SPAN = _DisabledSpan()
+
+    def __init__(self):
+        self._enabled = False
+        self._trace_memory = False
+        self._spans = deque(maxlen=Profiler.MAX_SPANS)
+        self._latest = {}
+        self._active_spans = set()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def is_enabled(self):
+        return self._enabled
+
+    def enable(self, enabled=True, trace_memory=True):
+        # tracing the allocations slows down the whole process, so it is only done while profiling
+        if enabled and trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and self._trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        self._trace_memory = enabled and trace_memory
+        self._enabled = enabled
+
+    def span(self, name, **args):
+        if not self._enabled:
+            return Profiler._DISABLED_SPAN
+        return Span(self, name, args)
+
+    def _start_span(self, span):
+        if not self._trace_memory or not tracemalloc.is_tracing():
+            return
+
+        with self._lock:
+            # resetting the peak would lose the peaks of the spans which are still running,
+            # therefore they keep the peak up to now, the peaks of spans which run in
+            # parallel include the allocations of the other threads
+            current, peak = tracemalloc.get_traced_memory()
+            for active_span in self._active_spans:
+                active_span._peak_memory = max(active_span._peak_memory, peak)
+            tracemalloc.reset_peak()
+
+            span._start_memory = current
+            span._peak_memory = current
+            self._active_spans.add(span)
+
+    def _end_span(self, span):
+        with self._lock:
+            if span in self._active_spans:
+                self._active_spans.remove(span)
+                if tracemalloc.is_tracing():
+                    span._peak_memory = max(span._peak_memory, tracemalloc.get_traced_memory()[1])
+                    span.peak_bytes = span._peak_memory - span._start_memory
+
+            self._spans.append(span)
+            self._latest[span.name] = span
+
+    def get_spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def get_latest(self):
+        # the newest span of each name
+        with self._lock:
+            return dict(self._latest)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._latest.clear()
+
+    def get_chrome_trace(self):
+        # complete events of the trace event format, which chrome://tracing and Perfetto can show
+        events = []
+        for span in self.get_spans():
+            args = dict((key, str(value)) for key, value in span.args.items())
+            args["bytes"] = span.bytes
+            if span.peak_bytes is not None:
+                args["peak_bytes"] = span.peak_bytes
+            events.append({"name": span.name, "cat": "data-viewer", "ph": "X", "pid": os.getpid(), "tid": span.thread_id,
+                           "ts": (span.start - self._origin) * 1e6, "dur": span.duration * 1e6, "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_name):
+        with open(file_name, "w", encoding="utf-8") as f:
+            json.dump(self.get_chrome_trace(), f)
+
+def get_data_size(data):
+    # number of bytes of the payload of an item, e.g. of an array or of a byte string,
+    # lazy arrays only count the bytes which have actually been read from them
+    if isinstance(data, LazyArray):
+        return data.bytes_read
+    if hasattr(data, "nbytes"):
+        return int(data.nbytes)
+    if isinstance(data, (bytes, bytearray, memoryview, str)):
+        return len(data)
+    return 0
+
+def format_bytes(count):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(count) < 1024 or unit == "GB":
+            return "{0:.0f} {1}".format(count, unit) if unit == "B" else "{0:.1f} {1}".format(count, unit)
+        count /= 1024.0
+
+# the profiler of the application, the spans of all threads are collected by it
+PROFILER = Profiler()
\ No newline at end of file
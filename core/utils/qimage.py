@@ -0,0 +1,70 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import numpy as np
+import cv2
+from PyQt5 import QtGui, sip
+
+# formats which have been added in later Qt 5 releases
+_FORMAT_BGR888 = getattr(QtGui.QImage, "Format_BGR888", None)
+_FORMAT_GRAYSCALE16 = getattr(QtGui.QImage, "Format_Grayscale16", None)
+
+def _wrap(array, image_format):
+    image = QtGui.QImage(sip.voidptr(array.ctypes.data), array.shape[1], array.shape[0], array.strides[0], image_format)
+    # the image does not own the buffer, so the array has to stay alive with it
+    image._array = array
+    return image
+
+def array_to_qimage(array):
+    # wraps an image in OpenCV layout (gray, BGR or BGRA) as a QImage, the buffer
+    # is only copied or converted if Qt has no matching format for it
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+
+    if array.dtype == np.uint16 and array.ndim == 3:
+        # Qt has no 16 bit BGR format
+        array = (array >> 8).astype(np.uint8)
+
+    if array.ndim == 2:
+        if array.strides[1] != array.itemsize:
+            array = np.ascontiguousarray(array)
+
+        if array.dtype == np.uint8:
+            return _wrap(array, QtGui.QImage.Format_Grayscale8)
+        elif array.dtype == np.uint16:
+            if _FORMAT_GRAYSCALE16 is not None:
+                return _wrap(array, _FORMAT_GRAYSCALE16)
+            return _wrap((array >> 8).astype(np.uint8), QtGui.QImage.Format_Grayscale8)
+    elif array.ndim == 3 and array.dtype == np.uint8:
+        if array.strides[2] != 1 or array.strides[1] != array.shape[2]:
+            array = np.ascontiguousarray(array)
+
+        if array.shape[2] == 3:
+            if _FORMAT_BGR888 is not None:
+                return _wrap(array, _FORMAT_BGR888)
+            return _wrap(cv2.cvtColor(array, cv2.COLOR_BGR2RGB), QtGui.QImage.Format_RGB888)
+        elif array.shape[2] == 4:
+            if sys.byteorder == "little":
+                # ARGB32 is stored as B, G, R, A bytes on little endian machines
+                return _wrap(array, QtGui.QImage.Format_ARGB32)
+            return _wrap(cv2.cvtColor(array, cv2.COLOR_BGRA2RGBA), QtGui.QImage.Format_RGBA8888)
+
+    raise ValueError("Images of shape {0} and type {1} cannot be displayed.".format(array.shape, array.dtype))
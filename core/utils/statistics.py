@@ -0,0 +1,260 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import os
+import threading
+import numpy as np
+from core.utils.lazy_array import LazyArray
+from core.utils.lru_cache import LRUCache
+from core.utils.metadata_cache import MetadataCache
+from core.utils.user_cache import get_file_stamp
+
+# summary statistics of arrays which may be much larger than the memory, the array is read
+# in blocks along its first axis, the blocks are reduced in parallel and merged into one result
+
+# number of bytes of a block
+BLOCK_SIZE = 16 * 1024 * 1024
+# number of bins of the histograms
+HISTOGRAM_BINS = 256
+# number of blocks whose values are sampled to find the range of the histogram
+RANGE_SAMPLES = 8
+# number of threads which reduce blocks, numpy releases the GIL in its reductions
+WORKERS = os.cpu_count() or 1
+# number of datasets whose statistics are kept in memory
+CACHED_DATASETS = 64
+# number of bytes of the numpy arrays whose statistics are kept in memory
+CACHED_ARRAY_BYTES = 64 * 1024 * 1024
+
+class RunningStatistics(object):
+    # moments of a stream of values, partial results are merged with the pairwise
+    # algorithm of Chan et al., so the blocks can be reduced in any order
+    def __init__(self, histogram_range=(0.0, 1.0), bins=HISTOGRAM_BINS):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.nan_count = 0
+        self.posinf_count = 0
+        self.neginf_count = 0
+        self.histogram_range = histogram_range
+        # the first and the last bin count the values below and above the range
+        self.histogram = np.zeros(bins + 2, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values).ravel()
+        if values.dtype.kind == "f":
+            finite = np.isfinite(values)
+            if not finite.all():
+                self.nan_count += int(np.count_nonzero(np.isnan(values)))
+                self.posinf_count += int(np.count_nonzero(values == np.inf))
+                self.neginf_count += int(np.count_nonzero(values == -np.inf))
+                values = values[finite]
+
+        if len(values) == 0:
+            return
+
+        block = RunningStatistics(self.histogram_range, len(self.histogram) - 2)
+        block.count = len(values)
+        block.minimum = float(values.min())
+        block.maximum = float(values.max())
+        values = values.astype(np.float64, copy=False)
+        block.mean = float(values.mean())
+        block.m2 = float(np.square(values - block.mean).sum())
+
+        # the bin of each value is computed directly, which is much faster than `np.histogram`
+        low, high = self.histogram_range
+        bins = len(self.histogram) - 2
+        indices = np.floor((values - low) * (bins / (high - low)))
+        np.clip(indices, -1, bins, out=indices)
+        indices[values == high] = bins - 1
+        block.histogram = np.bincount(indices.astype(np.intp) + 1, minlength=bins + 2)
+
+        self.merge(block)
+
+    def merge(self, other):
+        self.nan_count += other.nan_count
+        self.posinf_count += other.posinf_count
+        self.neginf_count += other.neginf_count
+        self.histogram += other.histogram
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+    def get_std(self):
+        return float(np.sqrt(self.m2 / self.count)) if self.count > 0 else None
+
+    def to_dict(self):
+        return {"count": self.count, "min": self.minimum, "max": self.maximum, "mean": self.mean if self.count > 0 else None,
+                "std": self.get_std(), "nan": self.nan_count, "posinf": self.posinf_count, "neginf": self.neginf_count,
+                "histogram": self.histogram[1:-1], "histogram_range": self.histogram_range,
+                "below_range": int(self.histogram[0]), "above_range": int(self.histogram[-1])}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS)
+        return _executor
+
+def _get_blocks(array):
+    # ranges of the first axis, aligned to the chunks of lazy arrays
+    if array.ndim == 0:
+        return [()]
+
+    row_size = max(1, int(np.prod(array.shape[1:], dtype=np.int64)) * array.dtype.itemsize)
+    rows = max(1, BLOCK_SIZE // row_size)
+    if isinstance(array, LazyArray):
+        # chunks which are larger than a block are read in parts, so a block never exceeds its size
+        chunk_rows = array.get_chunk_shape()[0]
+        if chunk_rows <= rows:
+            rows -= rows % chunk_rows
+    return [(slice(start, min(array.shape[0], start + rows)),) for start in range(0, array.shape[0], rows)]
+
+def _read_block(array, selection):
+    return np.asarray(array[selection])
+
+def _get_histogram_range(array, blocks):
+    # the range is estimated from a few blocks spread over the array, the values
+    # outside of it are counted separately
+    samples = blocks if len(blocks) <= RANGE_SAMPLES else [blocks[i * (len(blocks) - 1) // (RANGE_SAMPLES - 1)] for i in range(RANGE_SAMPLES)]
+    low, high = np.inf, -np.inf
+    for selection in samples:
+        values = _read_block(array, selection)
+        if values.dtype.kind == "f":
+            values = values[np.isfinite(values)]
+        if values.size > 0:
+            low, high = min(low, float(values.min())), max(high, float(values.max()))
+
+    if low > high:
+        return (0.0, 1.0)
+    if low == high:
+        return (low - 0.5, high + 0.5)
+    if len(samples) < len(blocks):
+        # a margin for the values of the blocks which have not been sampled
+        margin = (high - low) * 0.05
+        low, high = low - margin, high + margin
+    return (low, high)
+
+def _reduce_block(array, selection, histogram_range, bins, is_cancelled):
+    statistics = RunningStatistics(histogram_range, bins)
+    if is_cancelled is None or not is_cancelled():
+        statistics.update(_read_block(array, selection))
+    return statistics
+
+def compute_statistics(array, bins=HISTOGRAM_BINS, progress=None, is_cancelled=None):
+    # returns the statistics as a dict or None if it has been cancelled, `progress` is called
+    # with the fraction of the blocks which are done
+    if array.dtype.kind not in "biuf":
+        raise ValueError("Statistics can only be computed for numeric arrays, not for `{0}´.".format(array.dtype))
+
+    blocks = _get_blocks(array)
+    histogram_range = _get_histogram_range(array, blocks)
+
+    executor = _get_executor()
+    # only a few blocks are read ahead, so that the memory stays bounded
+    max_pending = 2 * WORKERS
+    statistics = RunningStatistics(histogram_range, bins)
+    pending = set()
+    done_count = 0
+    next_block = 0
+    while next_block < len(blocks) or pending:
+        while next_block < len(blocks) and len(pending) < max_pending:
+            pending.add(executor.submit(_reduce_block, array, blocks[next_block], histogram_range, bins, is_cancelled))
+            next_block += 1
+
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            statistics.merge(future.result())
+            done_count += 1
+
+        if is_cancelled is not None and is_cancelled():
+            for future in pending:
+                future.cancel()
+            return None
+        if progress is not None:
+            progress(done_count / len(blocks))
+
+    return statistics.to_dict()
+
+class StatisticsCache(object):
+    # the statistics of the arrays which have been used last are kept in memory, the ones
+    # of datasets in files are also stored in the metadata cache
+    # datasets in files are identified by their source and the stamp of the file, so only
+    # their statistics are kept
+    _results = LRUCache(CACHED_DATASETS)
+    # numpy arrays can neither be referenced weakly nor identified otherwise, so the entries
+    # keep their arrays, which are looked up by identity, and are bounded by their size
+    _array_results = LRUCache(CACHED_ARRAY_BYTES, lambda entry: entry[0].nbytes)
+
+    @staticmethod
+    def _get_source(array, bins):
+        source = getattr(array, "source", None)
+        if source is None:
+            return None
+        file_name, path = source
+        return file_name, "statistics-{0}:{1}".format(bins, path)
+
+    @staticmethod
+    def _get_key(source):
+        try:
+            return (get_file_stamp(source[0]), source[1])
+        except OSError:
+            return None
+
+    @staticmethod
+    def get(array, bins=HISTOGRAM_BINS):
+        source = StatisticsCache._get_source(array, bins)
+        if source is None:
+            result = StatisticsCache._array_results.get((id(array), bins))
+            if result is not None and result[0] is array:
+                return result[1]
+            return None
+
+        key = StatisticsCache._get_key(source)
+        statistics = StatisticsCache._results.get(key) if key is not None else None
+        if statistics is None:
+            statistics = MetadataCache().get(*source)
+            if statistics is not None and key is not None:
+                StatisticsCache._results.put(key, statistics)
+        return statistics
+
+    @staticmethod
+    def put(array, statistics, bins=HISTOGRAM_BINS):
+        source = StatisticsCache._get_source(array, bins)
+        if source is None:
+            StatisticsCache._array_results.put((id(array), bins), (array, statistics))
+            return
+
+        key = StatisticsCache._get_key(source)
+        if key is not None:
+            StatisticsCache._results.put(key, statistics)
+        MetadataCache().put(source[0], source[1], statistics)
@@ -0,0 +1,199 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import bisect
+import codecs
+import re
+import threading
+import numpy as np
+from core.utils.lru_cache import LRUCache
+
+class TextDocument(object):
+    # text which is decoded in chunks instead of at once, the chunks and the offsets of
+    # the lines are indexed by `build_index`, after which any line can be decoded without
+    # decoding the text before it, the state of the decoder is kept at the start of each
+    # chunk, so characters which span two chunks are decoded correctly
+    # number of bytes (or characters of text which is already decoded) per chunk
+    CHUNK_SIZE = 1024 * 1024
+    # number of decoded chunks which are kept for scrolling back and forth
+    CHUNK_CACHE_SIZE = 8
+
+    def __init__(self, source, encoding="utf-8"):
+        # the source is a str or a byte string
+        self._source = source
+        self._encoding = encoding
+        self._decoded = isinstance(source, str)
+        self._size = len(source)
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+
+        # (start, stop, decoder state) of each chunk and the character offset it starts at
+        self._chunks = []
+        self._chunk_offsets = []
+        self._line_offsets = [np.zeros(1, dtype=np.int64)]
+        self._line_count = 1
+        self._length = 0
+        self._indexed = 0
+        self._complete = self._size == 0
+        self._decoded_chunks = LRUCache(TextDocument.CHUNK_CACHE_SIZE)
+        self._index_decoder = None if self._decoded else self._create_decoder()
+
+    def get_encoding(self):
+        return self._encoding
+
+    def get_size(self):
+        # number of bytes of the source
+        return self._size
+
+    def get_nbytes(self):
+        with self._lock:
+            return self._size + sum(x.nbytes for x in self._line_offsets)
+
+    def get_progress(self):
+        return 1.0 if self._complete else self._indexed / self._size
+
+    def is_indexed(self):
+        return self._complete
+
+    def get_line_count(self):
+        # the last line is only counted once the whole text has been indexed, as long as
+        # it might still continue
+        with self._lock:
+            return self._line_count if self._complete else self._line_count - 1
+
+    def _read_source(self, start, stop):
+        return self._source[start:stop]
+
+    def _create_decoder(self):
+        return codecs.getincrementaldecoder(self._encoding)(errors="replace")
+
+    def build_index(self, progress=None, is_cancelled=None):
+        # returns False if it has been cancelled, the lines which have been indexed so far
+        # can already be read and a later call continues where the cancelled one stopped
+        with self._index_lock:
+            return self._build_index(progress, is_cancelled)
+
+    def _build_index(self, progress, is_cancelled):
+        decoder = self._index_decoder
+        for start in range(self._indexed, self._size, TextDocument.CHUNK_SIZE):
+            if is_cancelled is not None and is_cancelled():
+                return False
+
+            stop = min(self._size, start + TextDocument.CHUNK_SIZE)
+            state = decoder.getstate() if decoder is not None else None
+            text = self._read_source(start, stop)
+            if decoder is not None:
+                text = decoder.decode(text, final=stop == self._size)
+
+            # the line after each line break
+            line_offsets = np.flatnonzero(np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32) == 10) + self._length + 1
+
+            with self._lock:
+                self._chunks.append((start, stop, state))
+                self._chunk_offsets.append(self._length)
+                self._length += len(text)
+                self._line_offsets.append(line_offsets)
+                self._line_count += len(line_offsets)
+                self._indexed = stop
+                self._complete = stop == self._size
+
+            if progress is not None:
+                progress(self.get_progress())
+        return True
+
+    def _get_chunk(self, index):
+        text = self._decoded_chunks.get(index)
+        if text is None:
+            start, stop, state = self._chunks[index]
+            text = self._read_source(start, stop)
+            if not self._decoded:
+                decoder = self._create_decoder()
+                decoder.setstate(state)
+                text = decoder.decode(text, final=stop == self._size)
+            self._decoded_chunks.put(index, text)
+        return text
+
+    def _get_text(self, start, stop):
+        # the characters [start, stop) of the decoded text
+        with self._lock:
+            first = bisect.bisect_right(self._chunk_offsets, start) - 1
+            last = bisect.bisect_left(self._chunk_offsets, stop)
+            chunk_offsets = self._chunk_offsets[first:last]
+
+        parts = []
+        for index, offset in zip(range(first, last), chunk_offsets):
+            text = self._get_chunk(index)
+            parts.append(text[max(0, start - offset):max(0, stop - offset)])
+        return "".join(parts)
+
+    def _get_line_offsets(self):
+        with self._lock:
+            if len(self._line_offsets) > 1:
+                # the offsets of the chunks are merged the first time they are needed
+                self._line_offsets = [np.concatenate(self._line_offsets)]
+            return self._line_offsets[0], self._length
+
+    def get_line(self, index, max_length=None, start_column=0):
+        # the line without its line break, very long lines can be cut at `max_length`
+        # characters after `start_column`
+        line_offsets, length = self._get_line_offsets()
+        stop = int(line_offsets[index + 1]) - 1 if index + 1 < len(line_offsets) else length
+        start = min(stop, int(line_offsets[index]) + start_column)
+        if max_length is not None:
+            stop = min(stop, start + max_length)
+        return self._get_text(start, stop).rstrip("\r")
+
+    def get_line_of_offset(self, offset):
+        line_offsets, _ = self._get_line_offsets()
+        return int(np.searchsorted(line_offsets, offset, side="right")) - 1
+
+    def find(self, text, start_line=0, start_column=0, case_sensitive=False, is_cancelled=None):
+        # returns (line, column) of the first match at or after the start position, or None,
+        # matches which span two chunks are found as well
+        if len(text) == 0:
+            return None
+        # the case is ignored by the pattern, lowering the text instead can change its
+        # length, e.g. of 'İ', and with it the offsets of the matches
+        pattern = re.compile(re.escape(text), 0 if case_sensitive else re.IGNORECASE)
+
+        line_offsets, length = self._get_line_offsets()
+        if start_line >= len(line_offsets):
+            return None
+        position = int(line_offsets[start_line]) + start_column
+        overlap = len(text) - 1
+        window = TextDocument.CHUNK_SIZE
+        while position < length:
+            if is_cancelled is not None and is_cancelled():
+                return None
+
+            block = self._get_text(position, min(length, position + window + overlap))
+            match = pattern.search(block)
+            if match is not None:
+                offset = position + match.start()
+                line = self.get_line_of_offset(offset)
+                return line, offset - int(line_offsets[line])
+            position += window
+        return None
+
+    def iter_text(self):
+        # the decoded text in chunks, e.g. to write it to a file
+        self.build_index()
+        for index in range(len(self._chunks)):
+            yield self._get_chunk(index)
\ No newline at end of file
@@ -18,30 +18,497 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import tensorflow as tf
+import mmap
+import os
+import struct
+import threading
+import numpy as np
+
+def _create_crc32c_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0x82F63B78
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+_CRC32C_TABLE = _create_crc32c_table()
+_CRC32C_ARRAY = np.array(_CRC32C_TABLE, dtype=np.uint32)
+# number of bytes of each block whose CRCs are computed side by side
+_CRC32C_BLOCK_SIZE = 64
+# shorter data is processed byte by byte
+_CRC32C_VECTOR_MIN_SIZE = 512
+
+def _shift_crc32c(tables, values):
+    # applies the linear map given by the tables of its four bytes
+    return (tables[0][values & 0xFF] ^ tables[1][(values >> 8) & 0xFF] ^
+            tables[2][(values >> 16) & 0xFF] ^ tables[3][values >> 24])
+
+def _create_shift_tables(length):
+    # the effect of `length` zero bytes on each byte of the register
+    values = np.arange(256, dtype=np.uint32)[None, :] << np.array([0, 8, 16, 24], dtype=np.uint32)[:, None]
+    for _ in range(length):
+        values = _CRC32C_ARRAY[values & 0xFF] ^ (values >> 8)
+    return values
+
+_CRC32C_SHIFT_TABLES = _create_shift_tables(_CRC32C_BLOCK_SIZE)
+
+def _crc32c_bytewise(data, crc):
+    table = _CRC32C_TABLE
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc
+
+def _crc32c_vectorized(data, crc):
+    # the CRC is linear, so the blocks are processed independently and their registers
+    # are combined pairwise afterwards, the initial register is xor-ed into the first
+    # bytes and the data is padded with leading zeros, which leave a zero register unchanged
+    data = np.frombuffer(data, dtype=np.uint8)
+    blocks = 1 << int(np.ceil(np.log2(-(-len(data) // _CRC32C_BLOCK_SIZE))))
+    buffer = np.zeros(blocks * _CRC32C_BLOCK_SIZE, dtype=np.uint8)
+    buffer[len(buffer) - len(data):] = data
+    buffer[len(buffer) - len(data):len(buffer) - len(data) + 4] ^= np.array([crc], dtype="<u4").view(np.uint8)
+
+    columns = np.ascontiguousarray(buffer.reshape(blocks, _CRC32C_BLOCK_SIZE).T)
+    registers = np.zeros(blocks, dtype=np.uint32)
+    for column in columns:
+        registers = _CRC32C_ARRAY[registers.astype(np.uint8) ^ column] ^ (registers >> 8)
+
+    tables = _CRC32C_SHIFT_TABLES
+    while len(registers) > 1:
+        registers = _shift_crc32c(tables, registers[0::2]) ^ registers[1::2]
+        # shifting twice by the current length
+        tables = _shift_crc32c(tables, tables)
+    return int(registers[0])
+
+def _crc32c_python(data, crc=0):
+    crc ^= 0xFFFFFFFF
+    if len(data) < _CRC32C_VECTOR_MIN_SIZE:
+        crc = _crc32c_bytewise(data, crc)
+    else:
+        crc = _crc32c_vectorized(data, crc)
+    return crc ^ 0xFFFFFFFF
+
+def _get_crc32c_function():
+    # the native implementations are optional, the numpy version is the fallback
+    try:
+        import crc32c as crc32c_module
+        return lambda data, crc=0: crc32c_module.crc32c(data, crc)
+    except ImportError:
+        pass
+
+    try:
+        import google_crc32c
+        if google_crc32c.implementation == "c":
+            return lambda data, crc=0: google_crc32c.extend(crc, bytes(data))
+    except ImportError:
+        pass
+
+    return _crc32c_python
+
+crc32c = _get_crc32c_function()
+
+def masked_crc32c(data):
+    crc = crc32c(data)
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+def _read_varint(buffer, position):
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+def _iter_fields(buffer, start, end):
+    # yields (field number, wire type, value) where the value of length
+    # delimited fields is the (start, end) range of the payload
+    position = start
+    while position < end:
+        key, position = _read_varint(buffer, position)
+        field_number, wire_type = key >> 3, key & 0x07
+        if wire_type == 0:
+            value, position = _read_varint(buffer, position)
+        elif wire_type == 1:
+            value = (position, position + 8)
+            position += 8
+        elif wire_type == 2:
+            length, position = _read_varint(buffer, position)
+            value = (position, position + length)
+            position += length
+        elif wire_type == 5:
+            value = (position, position + 4)
+            position += 4
+        else:
+            raise ValueError("Unsupported protobuf wire type {0}.".format(wire_type))
+
+        if position > end:
+            raise ValueError("Protobuf message is truncated.")
+
+        yield field_number, wire_type, value
+
+def _decode_packed_varints(buffer, start, end):
+    data = np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)
+    terminators = data < 0x80
+    if terminators.all():
+        # every value fits into a single byte
+        return data.astype(np.int64)
+
+    if len(data) == 0 or not terminators[-1]:
+        raise ValueError("Packed varint list is truncated.")
+
+    ends = np.flatnonzero(terminators)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # the 7 bit groups of one value do not overlap, so summing them is the same as or-ing them
+    shifts = (np.arange(len(data)) - np.repeat(starts, ends - starts + 1)) * 7
+    parts = (data & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    return np.add.reduceat(parts, starts).view(np.int64)
+
+def _decode_bytes_list(buffer, start, end):
+    values = []
+    for field_number, wire_type, value in _iter_fields(buffer, start, end):
+        if field_number == 1 and wire_type == 2:
+            values.append(bytes(buffer[value[0]:value[1]]))
+    return values
+
+def _decode_float_list(buffer, start, end):
+    parts = []
+    for field_number, wire_type, value in _iter_fields(buffer, start, end):
+        if field_number != 1:
+            continue
+        if wire_type == 2:
+            # packed, the common case
+            parts.append(np.frombuffer(buffer, dtype="<f4", count=(value[1] - value[0]) // 4, offset=value[0]))
+        elif wire_type == 5:
+            parts.append(np.frombuffer(buffer, dtype="<f4", count=1, offset=value[0]))
+
+    if len(parts) == 1:
+        return parts[0]
+    elif not parts:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(parts)
+
+def _decode_int64_list(buffer, start, end):
+    parts = []
+    for field_number, wire_type, value in _iter_fields(buffer, start, end):
+        if field_number != 1:
+            continue
+        if wire_type == 2:
+            # packed, the common case
+            parts.append(_decode_packed_varints(buffer, value[0], value[1]))
+        elif wire_type == 0:
+            parts.append(np.array([value], dtype=np.uint64).view(np.int64))
+
+    if len(parts) == 1:
+        return parts[0]
+    elif not parts:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(parts)
+
+_FEATURE_DECODERS = {1: _decode_bytes_list, 2: _decode_float_list, 3: _decode_int64_list}
+
+def _decode_feature(buffer, start, end):
+    value = None
+    for field_number, wire_type, field_range in _iter_fields(buffer, start, end):
+        decoder = _FEATURE_DECODERS.get(field_number)
+        if decoder is not None and wire_type == 2:
+            value = decoder(buffer, field_range[0], field_range[1])
+    return value
+
+def decode_example(buffer):
+    # decodes a serialized `tf.train.Example` into a dict mapping the feature
+    # names to a list of bytes or to a float32/int64 array
+    features = {}
+    for field_number, wire_type, example_range in _iter_fields(buffer, 0, len(buffer)):
+        if field_number != 1 or wire_type != 2:
+            continue
+
+        for entry_number, entry_wire_type, entry_range in _iter_fields(buffer, *example_range):
+            if entry_number != 1 or entry_wire_type != 2:
+                continue
+
+            name = ""
+            value = None
+            for field, field_wire_type, field_range in _iter_fields(buffer, *entry_range):
+                if field == 1 and field_wire_type == 2:
+                    name = bytes(buffer[field_range[0]:field_range[1]]).decode("utf-8")
+                elif field == 2 and field_wire_type == 2:
+                    value = _decode_feature(buffer, *field_range)
+
+            features[name] = value
+
+    return features
+
+def _encode_varint(value):
+    value &= 0xFFFFFFFFFFFFFFFF
+    result = bytearray()
+    while value >= 0x80:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+def _encode_field(field_number, payload):
+    # length delimited field
+    return _encode_varint((field_number << 3) | 2) + _encode_varint(len(payload)) + payload
+
+def _encode_feature(value):
+    if isinstance(value, (bytes, str)):
+        value = [value]
+    if isinstance(value, (list, tuple)) and all(isinstance(x, (bytes, str)) for x in value):
+        values = b"".join(_encode_field(1, x.encode("utf-8") if isinstance(x, str) else x) for x in value)
+        return _encode_field(1, values)
+
+    value = np.asarray(value)
+    if value.dtype.kind == "f":
+        return _encode_field(2, _encode_field(1, value.astype("<f4").tobytes()))
+    if value.dtype.kind in "biu":
+        return _encode_field(3, _encode_field(1, b"".join(_encode_varint(int(x)) for x in value.ravel())))
+    raise ValueError("Features of type `{0}´ cannot be encoded.".format(value.dtype))
+
+def encode_example(features):
+    # the counterpart of `decode_example`, the values are byte strings or lists of them,
+    # float arrays or integer arrays
+    entries = b"".join(_encode_field(1, _encode_field(1, name.encode("utf-8")) + _encode_field(2, _encode_feature(value)))
+                       for name, value in features.items())
+    return _encode_field(1, entries)
+
+def is_tfrecord_header(header):
+    # the first record starts with its length followed by the masked CRC of the length
+    if len(header) < 12:
+        return False
+    length_crc, = struct.unpack_from("<I", header, 8)
+    return masked_crc32c(header[:8]) == length_crc
 
 class TFRecord(object):
-    def __init__(self, file_name):
-        self._iterator = tf.python_io.tf_record_iterator(file_name)
-        self._load_examples()
+    _INDEX_MAGIC = b"TFRIDX01"
+    _INDEX_HEADER = struct.Struct("<8sqqq")
+
+    def __init__(self, file_name, index_file=None, save_index=False, parse=decode_example, verify=False, offsets=None, build_index=True,
+                 handle_pool=None):
+        self._file_name = file_name
+        self._parse = parse
+        self._verify = verify
+        # the file can be released by a pool which limits the number of open files
+        self._handle_pool = handle_pool
+        self._lock = threading.RLock()
+        self._index_file = index_file if index_file is not None else file_name + ".idx"
+        self._file = None
+        self._buffer = None
+        # set by `close`, unlike a file released by the handle pool it is not opened again
+        self._closed = False
+        self._offsets = np.empty(0, dtype=np.int64)
+        self._index_complete = False
+        self._open()
+
+        if offsets is not None:
+            # the offsets are already known, e.g. from the metadata cache
+            self._offsets = np.asarray(offsets, dtype=np.int64)
+            self._index_complete = True
+        elif not self.load_index(self._index_file) and build_index:
+            # without `build_index` the caller has to run `iter_index`
+            self._build_index()
+
+            if save_index:
+                try:
+                    self.save_index(self._index_file)
+                except OSError:
+                    # the index is only a cache, e.g. the directory might be read-only
+                    pass
+
+        if self._handle_pool is not None:
+            self._handle_pool.touch(self)
+
+    def _open(self):
+        self._file = open(self._file_name, "rb")
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty files cannot be mapped
+            self._buffer = b""
+
+    def _acquire(self):
+        # has to be called with the lock held, a file which has been released by the
+        # handle pool is opened again
+        if self._closed:
+            raise IOError("The file `{0}´ has been closed.".format(self._file_name))
+        if self._file is None:
+            self._open()
+        return self._buffer
+
+    def _get_file_stamp(self):
+        stat = os.stat(self._file_name)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _build_index(self):
+        for _ in self.iter_index():
+            pass
+
+    def iter_index(self, batch_size=4096):
+        # only the length headers are read, the record payloads are skipped, the records
+        # indexed so far can already be read while the scan is running
+        offsets = np.empty(batch_size, dtype=np.int64)
+        count = 0
+        self._offsets = offsets[:0]
+        self._index_complete = False
+
+        position = 0
+        while True:
+            if self._handle_pool is not None:
+                self._handle_pool.touch(self)
+
+            # each batch is scanned with the lock held, so that the file cannot be released
+            # by the handle pool in the meantime, it is only released between the batches
+            with self._lock:
+                buffer = self._acquire()
+                size = len(buffer)
+                batch_end = count + batch_size
+                while position < size and count < batch_end:
+                    if position + 12 > size:
+                        raise IOError("The file `{0}´ ends with a truncated record header.".format(self._file_name))
+                    length, = struct.unpack_from("<Q", buffer, position)
+                    if self._verify:
+                        self._check_length_crc(position)
+
+                    if count == len(offsets):
+                        offsets = np.resize(offsets, 2 * len(offsets))
+                    offsets[count] = position
+                    count += 1
+                    position += 12 + length + 4
+
+            if position >= size:
+                break
+
+            self._offsets = offsets[:count]
+            # the number of records found and the fraction of the file which has been scanned
+            yield count, position / float(size)
+
+        if position != size:
+            raise IOError("The file `{0}´ ends with a truncated record.".format(self._file_name))
+
+        self._offsets = offsets[:count].copy()
+        self._index_complete = True
+        yield count, 1.0
+
+    def has_index(self):
+        return self._index_complete
 
-    def _load_examples(self):
-        if not self._iterator:
-            return
+    def load_index(self, index_file):
+        try:
+            with open(index_file, "rb") as f:
+                magic, file_size, file_mtime, count = self._INDEX_HEADER.unpack(f.read(self._INDEX_HEADER.size))
+                if magic != self._INDEX_MAGIC or (file_size, file_mtime) != self._get_file_stamp():
+                    return False
+                offsets = np.fromfile(f, dtype="<i8", count=count)
+                if len(offsets) != count:
+                    return False
+        except (OSError, struct.error):
+            return False
 
-        self._examples = []
+        self._offsets = offsets.astype(np.int64, copy=False)
+        self._index_complete = True
+        return True
 
-        for example in self._iterator:
-            self._examples.append(tf.train.Example.FromString(example))
+    def save_index(self, index_file=None):
+        if index_file is None:
+            index_file = self._index_file
 
-        self._iterator = None
+        file_size, file_mtime = self._get_file_stamp()
+        with open(index_file, "wb") as f:
+            f.write(self._INDEX_HEADER.pack(self._INDEX_MAGIC, file_size, file_mtime, len(self._offsets)))
+            f.write(self._offsets.astype("<i8", copy=False).tobytes())
+
+    def get_offsets(self):
+        return self._offsets
+
+    def get_record_offset(self, index):
+        return int(self._offsets[index])
+
+    def read_record(self, index):
+        if index < 0:
+            index += len(self._offsets)
+        if index < 0 or index >= len(self._offsets):
+            raise IndexError("Record index {0} is out of range.".format(index))
+
+        if self._handle_pool is not None:
+            self._handle_pool.touch(self)
+
+        offset = int(self._offsets[index])
+        with self._lock:
+            self._acquire()
+            length = self._check_length_crc(offset)
+            record = self._buffer[offset + 12:offset + 12 + length]
+
+            if self._verify:
+                data_crc, = struct.unpack_from("<I", self._buffer, offset + 12 + length)
+                if masked_crc32c(record) != data_crc:
+                    raise IOError("Record {0} of `{1}´ is corrupted.".format(index, self._file_name))
+
+        return record
+
+    def _check_length_crc(self, offset):
+        length, length_crc = struct.unpack_from("<QI", self._buffer, offset)
+        if masked_crc32c(self._buffer[offset:offset + 8]) != length_crc:
+            raise IOError("The record header at offset {0} of `{1}´ is corrupted.".format(offset, self._file_name))
+        return length
+
+    def __len__(self):
+        return len(self._offsets)
 
     def __getitem__(self, key):
-        return self._examples[key]
+        return self._parse(self.read_record(key))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def release(self):
+        # closes the file, it is opened again by the next read unless `close` has been called
+        with self._lock:
+            if self._file is None:
+                return
+
+            if isinstance(self._buffer, mmap.mmap):
+                self._buffer.close()
+            self._buffer = None
+            self._file.close()
+            self._file = None
 
     def close(self):
-        if not self._iterator:
-            return
-        else:
-            del self._iterator
-            self._iterator = None
+        with self._lock:
+            self._closed = True
+            self.release()
+        if self._handle_pool is not None:
+            self._handle_pool.remove(self)
+
+class TFRecordWriter(object):
+    # writes records in the format which `TFRecord` reads
+    def __init__(self, file_name):
+        self._file = open(file_name, "wb")
+
+    def write(self, record):
+        length = struct.pack("<Q", len(record))
+        self._file.write(length)
+        self._file.write(struct.pack("<I", masked_crc32c(length)))
+        self._file.write(record)
+        self._file.write(struct.pack("<I", masked_crc32c(record)))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
\ No newline at end of file
@@ -0,0 +1,189 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import hashlib
+import os
+import struct
+import threading
+import numpy as np
+import cv2
+from core.utils.image_normalization import NORMALIZATION_AUTO, to_uint8
+from core.utils.user_cache import get_cache_directory
+
+THUMBNAIL_SIZE = 128
+
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def get_encoded_image_size(buffer):
+    # reads (width, height) from the header of a JPEG or PNG image without decoding it
+    buffer = bytes(buffer[:64 * 1024])
+    if buffer[:8] == b"\x89PNG\r\n\x1a\n" and len(buffer) >= 24:
+        return struct.unpack(">II", buffer[16:24])
+
+    if buffer[:2] == b"\xff\xd8":
+        position = 2
+        while position + 9 < len(buffer):
+            if buffer[position] != 0xFF:
+                position += 1
+                continue
+            marker = buffer[position + 1]
+            if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                height, width = struct.unpack(">HH", buffer[position + 5:position + 9])
+                return width, height
+            elif marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                position += 2 if marker != 0xFF else 1
+                continue
+            length, = struct.unpack(">H", buffer[position + 2:position + 4])
+            position += 2 + length
+
+    return None
+
+def resize_thumbnail(image, max_size=THUMBNAIL_SIZE):
+    height, width = image.shape[:2]
+    scale = max_size / float(max(height, width))
+    if scale >= 1:
+        return image
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+def decode_thumbnail(encoded, max_size=THUMBNAIL_SIZE):
+    # JPEGs are decoded at a reduced resolution by libjpeg itself, this runs in a
+    # process pool and therefore only gets and returns plain buffers
+    flags = cv2.IMREAD_COLOR
+    size = get_encoded_image_size(encoded)
+    if size is not None:
+        factor = max(size) / float(max_size)
+        for reduction, reduced_flags in _REDUCED_FLAGS:
+            if reduction <= factor:
+                flags = reduced_flags
+                break
+
+    image = cv2.imdecode(np.frombuffer(encoded, dtype=np.uint8), flags)
+    if image is None:
+        return None
+    return resize_thumbnail(image, max_size)
+
+def create_raw_thumbnail(array, max_size=THUMBNAIL_SIZE, normalization=NORMALIZATION_AUTO, window=None, level=None):
+    # the first plane of a raw tensor, subsampled before it is normalized
+    has_channels = array.ndim >= 3 and array.shape[-1] in (1, 3, 4)
+    image_rank = 3 if has_channels else 2
+    array = np.asarray(array[(0,) * (array.ndim - image_rank)])
+
+    stride = max(1, max(array.shape[0], array.shape[1]) // (2 * max_size))
+    array = array[::stride, ::stride]
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+
+    image = to_uint8(array, normalization, window, level)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR if image.shape[2] == 3 else cv2.COLOR_RGBA2BGR)
+    return resize_thumbnail(image, max_size)
+
+class ThumbnailDiskCache(object):
+    # thumbnails stored as PNG files in the user cache directory, once they take more than
+    # `MAX_BYTES` the ones which have been used least recently are deleted, reading a
+    # thumbnail renews its modification time, as access times are often not recorded
+    MAX_BYTES = 512 * 1024 * 1024
+    # fraction of `MAX_BYTES` which is kept when the cache gets pruned
+    PRUNE_RATIO = 0.75
+
+    def __init__(self, directory=None, max_bytes=None):
+        if directory is None:
+            try:
+                directory = get_cache_directory("thumbnails")
+            except OSError:
+                # the cache is optional, without a directory nothing is cached
+                directory = None
+        self._directory = directory
+        self._max_bytes = max_bytes if max_bytes is not None else ThumbnailDiskCache.MAX_BYTES
+        # the size of the files is only scanned once, afterwards it is counted
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _get_file_name(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self._directory, digest[:2], digest + ".png")
+
+    def get(self, key):
+        if self._directory is None:
+            return None
+
+        file_name = self._get_file_name(key)
+        try:
+            os.utime(file_name)
+        except OSError:
+            return None
+        return cv2.imread(file_name, cv2.IMREAD_UNCHANGED)
+
+    def put(self, key, image):
+        if self._directory is None:
+            return
+
+        file_name = self._get_file_name(key)
+        try:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            success, encoded = cv2.imencode(".png", image)
+            if not success:
+                return
+            # written under a temporary name so that readers never see partial files
+            temporary_file_name = "{0}.{1}.tmp".format(file_name, os.getpid())
+            with open(temporary_file_name, "wb") as f:
+                f.write(encoded.tobytes())
+            os.replace(temporary_file_name, file_name)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._list_files())
+            else:
+                self._size += len(encoded)
+            if self._size > self._max_bytes:
+                self._prune()
+
+    def _list_files(self):
+        # (modification time, file name, size) of the thumbnails
+        files = []
+        for directory, _, file_names in os.walk(self._directory):
+            for file_name in file_names:
+                if not file_name.endswith(".png"):
+                    continue
+                file_name = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(file_name)
+                except OSError:
+                    # e.g. deleted by another instance in the meantime
+                    continue
+                files.append((stat.st_mtime_ns, file_name, stat.st_size))
+        return files
+
+    def _prune(self):
+        # the files are listed again, other instances of the viewer share the directory
+        files = sorted(self._list_files())
+        size = sum(x[2] for x in files)
+        for _, file_name, file_size in files:
+            if size <= self._max_bytes * ThumbnailDiskCache.PRUNE_RATIO:
+                break
+            try:
+                os.remove(file_name)
+                size -= file_size
+            except OSError:
+                pass
+        self._size = size
@@ -0,0 +1,42 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import sys
+
+def get_cache_directory(*sub_directories):
+    # per user cache directory of the application, can be moved with DATA_VIEWER_CACHE_DIR
+    base_directory = os.environ.get("DATA_VIEWER_CACHE_DIR")
+    if not base_directory:
+        if sys.platform == "win32":
+            base_directory = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "data-viewer")
+        elif sys.platform == "darwin":
+            base_directory = os.path.join(os.path.expanduser("~/Library/Caches"), "data-viewer")
+        else:
+            base_directory = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "data-viewer")
+
+    directory = os.path.join(base_directory, *sub_directories)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def get_file_stamp(file_name):
+    # identifies the version of a file, changes whenever the file is modified
+    stat = os.stat(file_name)
+    return os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns
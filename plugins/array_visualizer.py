@@ -0,0 +1,202 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from core.plugins import Visualizer, PluginRegistry
+from plugins.array import ParsedDataArray
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+
+class ArrayTableModel(QtCore.QAbstractTableModel):
+    # number of rows and columns which are read around the visible ones
+    MARGIN = 64
+    # number of hyperslabs which are kept for scrolling back and forth
+    BLOCK_CACHE_SIZE = 4
+
+    # presents a rank <= 2 slice of an array as a table without copying it, lazy
+    # arrays are read in chunk aligned hyperslabs around the visible cells
+    def __init__(self, array, leading_index=(), parent=None):
+        super(ArrayTableModel, self).__init__(parent)
+
+        self._array = array
+        self._leading_index = tuple(leading_index)
+
+        shape = array.shape[len(self._leading_index):]
+        if len(shape) == 0:
+            self._shape = (1, 1)
+        elif len(shape) == 1:
+            # to make vectors appear as (-1, 1) matrices
+            self._shape = (shape[0], 1)
+        else:
+            self._shape = shape[:2]
+        self._rank = len(shape)
+
+        if isinstance(array, np.ndarray):
+            self._view = array[self._leading_index].reshape(self._shape)
+        else:
+            self._view = None
+
+        self._visible_rows = 64
+        self._visible_columns = 16
+        self._blocks = []
+
+    def set_visible_size(self, rows, columns):
+        self._visible_rows = max(1, rows)
+        self._visible_columns = max(1, columns)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._shape[0]
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._shape[1]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+
+        row, column = index.row(), index.column()
+        if self._view is not None:
+            return str(self._view[row, column])
+
+        block = self._find_block(row, column) or self._read_block(row, column)
+        if block is None:
+            return None
+
+        first_row, first_column, values = block
+        return str(values[row - first_row, column - first_column])
+
+    def _find_block(self, row, column):
+        for block in self._blocks:
+            first_row, first_column, values = block
+            if 0 <= row - first_row < values.shape[0] and 0 <= column - first_column < values.shape[1]:
+                return block
+        return None
+
+    def _get_range(self, position, visible, size, chunk):
+        start = max(0, position - ArrayTableModel.MARGIN)
+        end = min(size, position + visible + ArrayTableModel.MARGIN)
+
+        # align the hyperslab to the chunks unless they are much larger than the slab
+        if chunk <= 4 * (end - start):
+            start = start - start % chunk
+            end = min(size, end + (-end) % chunk)
+
+        return start, end
+
+    def _read_block(self, row, column):
+        chunk_shape = self._array.get_chunk_shape()[len(self._leading_index):] + (1, 1)
+        first_row, last_row = self._get_range(row, self._visible_rows, self._shape[0], chunk_shape[0])
+        if self._rank > 1:
+            first_column, last_column = self._get_range(column, self._visible_columns, self._shape[1], chunk_shape[1])
+        else:
+            first_column, last_column = 0, 1
+
+        selection = self._leading_index + (slice(first_row, last_row), slice(first_column, last_column))[:self._rank]
+        values = self._array[selection]
+        if values is None:
+            return None
+
+        block = (first_row, first_column, np.asarray(values).reshape(last_row - first_row, last_column - first_column))
+        self._blocks.append(block)
+        if len(self._blocks) > ArrayTableModel.BLOCK_CACHE_SIZE:
+            del self._blocks[0]
+
+        return block
+
+@PluginRegistry.visualizer
+class ArrayVisualizer(Visualizer):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_ui_name():
+        return "Array"
+
+    @staticmethod
+    def validate_input_format(parsed_data_type):
+        return parsed_data_type == ParsedDataArray
+
+    def _show_data(self, container_widget):
+        if self._parsed_data is None or self._parsed_data.get_data() is None:
+            return False
+
+        data = self._parsed_data.get_data()
+
+        content = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(content)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # arrays of rank > 2 are shown as 2-d slices, one index is picked per leading dimension
+        self._index_spinboxes = []
+        if data.ndim > 2:
+            index_box = QtWidgets.QWidget()
+            index_layout = QtWidgets.QHBoxLayout(index_box)
+            index_layout.setContentsMargins(0, 0, 0, 0)
+            label = QtWidgets.QLabel()
+            label.setText("Index:")
+            index_layout.addWidget(label)
+
+            for size in data.shape[:-2]:
+                spinbox = QtWidgets.QSpinBox()
+                spinbox.setRange(0, size - 1)
+                spinbox.setEnabled(size > 1)
+                spinbox.valueChanged.connect(lambda _: self._update_model())
+                index_layout.addWidget(spinbox)
+                self._index_spinboxes.append(spinbox)
+
+            index_layout.addStretch(1)
+            layout.addWidget(index_box)
+
+        self._table = QtWidgets.QTableView()
+        self._table.setContentsMargins(0,0,0,0)
+        layout.addWidget(self._table)
+        self._update_model()
+
+        # no resize, scroll viewer
+        container_widget.layout().addWidget(content, 0,0,1,1)
+        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        size_policy.setHorizontalStretch(1)
+        size_policy.setVerticalStretch(1)
+        content.setSizePolicy(size_policy)
+        content.show()
+
+        return True
+
+    def _update_model(self):
+        leading_index = tuple(spinbox.value() for spinbox in self._index_spinboxes)
+
+        # the model formats the cells lazily, so only the visible ones are converted
+        model = ArrayTableModel(self._parsed_data.get_data(), leading_index, self._table)
+        screen_size = QtWidgets.QApplication.desktop().availableGeometry().size()
+        model.set_visible_size(screen_size.height() // max(1, self._table.verticalHeader().defaultSectionSize()),
+                               screen_size.width() // max(1, self._table.horizontalHeader().defaultSectionSize()))
+
+        old_model = self._table.model()
+        self._table.setModel(model)
+        if old_model is not None:
+            old_model.deleteLater()
+
+    def visualize_data(self, parsed_data, container_widget):
+        self._parsed_data = parsed_data
+        self._container_widget = container_widget
+
+        return self._show_data(container_widget)
\ No newline at end of file
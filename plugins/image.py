@@ -17,199 +17,221 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-
-from core.plugins import Visualizer, PluginRegistry, Parser, ParsedData
+from core.plugins import PluginRegistry, Parser, ParsedData
+from core.utils.lazy_array import LazyArray
+from core.utils.image_normalization import NORMALIZATIONS, NORMALIZATION_AUTO, to_uint8
 import numpy as np
-import cv2
-from PyQt5 import QtGui, QtWidgets
+import sys
+
+@PluginRegistry.parser
+class ImageParser(Parser):
+    _CHANNELS = ["All", "0", "1", "2", "3"]
 
-@PluginRegistry.visualizer
-class ImageVisualizer(Visualizer):
     def __init__(self):
-        self._autoresize_checkbox = None
+        self._normalization = NORMALIZATION_AUTO
+        self._window = 1.0
+        self._level = 0.5
+        self._slice_index = 0
+        self._channel = ImageParser._CHANNELS[0]
 
-    @staticmethod
-    def get_ui_name():
-        return "Image"
+    def validate_input_format(self, shape, size, dtype):
+        return True
 
-    @staticmethod
-    def validate_input_format(parsed_data_type):
-        pass
+    def parse(self, data):
+        if ImageParser._is_raw_image(data):
+            return self._parse_raw(data)
 
-    def show_settings(self, container_widget):
-        return False
-
-    def _show_data(self, container_widget):
-        data = None
-        try:
-            if isinstance(self._data, list):
-                try:
-                    self._data = np.array(self._data)
-                except:
-                    pass
-
-            if isinstance(self._data, np.ndarray):
-                self._data = np.squeeze(self._data)
-                if len(self._data.shape) < 2:
-                    data = np.empty_like(self._data, dtype=object)
-                    for i in range(data.size):
-                        data.itemset(i, str(self._data.item(i)))
-                else:
-                    raise ValueError("Array has rank > 2. This cannot be displayed.")
-                # to make vectors appear as (-1, 1) matrices
-                data = data.reshape(len(data), -1)
-            else:
-                return False
-        except:
-            return False
-       
-        
-        table = QtWidgets.QTableWidget()
-        table.setContentsMargins(0,0,0,0)
-        table.setRowCount(data.shape[0])
-        table.setColumnCount(data.shape[1])
-        # table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
-        # table.horizontalHeader().setStretchLastSection(True)
-
-        for i, row in enumerate(data):
-            for j, val in enumerate(row):
-                table.setItem(i, j, QtWidgets.QTableWidgetItem(val))
-
-
-        # no resize, scroll viewer
-        container_widget.layout().addWidget(table, 0,0,1,1)
-        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
-        size_policy.setHorizontalStretch(1)
-        size_policy.setVerticalStretch(1)
-        table.setSizePolicy(size_policy)
-        table.show()
+        value = ImageParser._get_encoded_buffer(data)
+        if value is None:
+            return None
 
-        return True
+        # decode the image, it is kept in the layout of OpenCV (gray, BGR or BGRA)
+        # which the visualizer can wrap without converting it, OpenCV is imported here
+        # as it takes long to load and is not needed before an image gets parsed
+        import cv2
+        image = cv2.imdecode(value, cv2.IMREAD_UNCHANGED)
 
-    def visualize_data(self, data, container_widget):
-        self._data = data
-        self._container_widget = container_widget
+        if image is None:
+            return None
 
-        return self._show_data(container_widget)
+        return ParsedDataImage(image)
 
-@PluginRegistry.visualizer
-class ImageVisualizer(Visualizer):
-    def __init__(self):
-        pass
+    def can_parse_collection(self):
+        return True
 
-    @staticmethod
-    def get_ui_name():
-        return "Image"
+    def parse_collection(self, collection):
+        return ParsedDataImageCollection(collection, self._normalization, self._window, self._level)
 
     @staticmethod
-    def validate_input_format(parsed_data_type):
-        return parsed_data_type == ParsedDataImage
+    def _get_encoded_buffer(data):
+        # the encoded bytes are wrapped, not copied
+        if isinstance(data, LazyArray):
+            # this parser needs the whole dataset
+            data = np.asarray(data)
+
+        if isinstance(data, np.ndarray):
+            if data.dtype.type is np.bytes_ and data.size == 1:
+                return np.frombuffer(data.item(0), dtype=np.uint8)
+            if data.dtype.type is np.uint8 and data.ndim == 1:
+                return data
+        elif isinstance(data, bytes):
+            return np.frombuffer(data, dtype=np.uint8)
+
+        return None
 
-    def _show_data(self, container_widget):   
-        if self._parsed_data is None:
+    @staticmethod
+    def _is_raw_image(data):
+        # numeric tensors of rank >= 2 are shown as they are, 1-d byte arrays
+        # are treated as encoded images
+        if not isinstance(data, (np.ndarray, LazyArray)):
             return False
+        return data.dtype.kind in "biuf" and data.ndim >= 2
 
-        cv_image = self._parsed_data.get_data()
-        image = QtGui.QImage(cv_image, cv_image.shape[1], cv_image.shape[0], cv_image.shape[1]*3, QtGui.QImage.Format_RGB888)
-
-        pixmap = QtGui.QPixmap(image)
-        label = QtWidgets.QLabel()
-        label.setPixmap(pixmap)
-        label.setContentsMargins(0,0,0,0)
-
-        if self._autoresize_checkbox.isChecked():
-            # auto resize, no scroll viewer
-            container_widget.layout().addWidget(label, 0,0,1,1)
-            size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
-            size_policy.setHorizontalStretch(1)
-            size_policy.setVerticalStretch(1)
-            label.setSizePolicy(size_policy)
-            label.setScaledContents(True)
-            label.show()
-        else:
-            # no resize, scroll viewer
-            scroll_viewer = QtWidgets.QScrollArea()
-            scroll_viewer.setWidget(label)
-            scroll_viewer.show()
-            container_widget.layout().addWidget(scroll_viewer, 0,0,1,1)
-            size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
-            size_policy.setHorizontalStretch(1)
-            size_policy.setVerticalStretch(1)
-            scroll_viewer.setSizePolicy(size_policy)
-            label.setSizePolicy(size_policy)
-            label.setScaledContents(True)
-            label.show()
-
-        return True
-
-    def visualize_data(self, parsed_data, container_widget):
-        self._parsed_data = parsed_data
-        self._container_widget = container_widget
+    def _get_plane_selection(self, shape):
+        # H x W, H x W x C, N x H x W and N x H x W x C tensors are supported, the
+        # slice index picks the image along the leading dimension
+        has_channels = shape[-1] in (1, 3, 4) and len(shape) >= 3
+        image_rank = 3 if has_channels else 2
 
-        return self._show_data(container_widget)
+        selection = []
+        for i, size in enumerate(shape[:-image_rank]):
+            selection.append(min(self._slice_index, size - 1) if i == 0 else 0)
 
-@PluginRegistry.parser
-class ImageParser(Parser):
-    def __init__(self):
-        self._autoresize_checkbox = None
+        if has_channels and self._channel != ImageParser._CHANNELS[0]:
+            selection += [slice(None), slice(None), min(int(self._channel), shape[-1] - 1)]
 
-    def validate_input_format(self, shape, size, dtype):
-        return True
+        return tuple(selection)
 
-    def parse(self, data):
-        value = None
-        try:
-            if isinstance(data, np.ndarray):
-                if data.dtype.type is np.string_:
-                    value = np.fromstring(data, dtype=np.uint8)
-                if data.dtype.type is np.uint8:
-                    value = data
-            elif isinstance(data, bytes):
-                value = np.fromstring(data, dtype=np.uint8)
-                
-        finally:
-            if value is None:
-                return None
-
-        # decode the image
-        image = cv2.imdecode(value, -1)
+    def _parse_raw(self, data):
+        # only the displayed plane is read from lazy arrays
+        image = np.asarray(data[self._get_plane_selection(data.shape)])
 
-        if image is None:
-            return None
+        if image.ndim == 3 and image.shape[2] == 1:
+            image = image[:, :, 0]
 
-        image_shape = np.asarray(image).shape
+        image = to_uint8(image, self._normalization, self._window, self._level)
 
-        if len(image_shape) == 3 and image_shape[-1] == 3:
-            # convert BGR to RGB
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        if image.ndim == 3:
+            import cv2
+            # raw tensors are stored as RGB(A), the visualizer expects the OpenCV order, the
+            # result is a new array as the image can be the (read-only) input itself
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR if image.shape[2] == 3 else cv2.COLOR_RGBA2BGRA)
 
         return ParsedDataImage(image)
 
+    def get_settings(self):
+        return {"normalization": self._normalization, "window": self._window, "level": self._level,
+                "slice_index": self._slice_index, "channel": self._channel}
+
     def show_settings(self, container_widget):
-        if self._autoresize_checkbox:
-            del self._autoresize_checkbox
+        # imported here so that the parser can be used without a display
+        from PyQt5 import QtWidgets
 
-        self._autoresize_checkbox = QtWidgets.QCheckBox()
-        self._autoresize_checkbox.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Minimum)
-        container_widget.layout().addWidget(self._autoresize_checkbox)
-        self._autoresize_checkbox.setText("Resize image")
+        options_box = QtWidgets.QWidget()
+        options_layout = QtWidgets.QHBoxLayout(options_box) 
+        options_layout.setContentsMargins(0, 0, 0, 0)
+        options_layout.setSizeConstraint(QtWidgets.QLayout.SetMinimumSize)
+        container_widget.layout().addWidget(options_box)
 
-        # self._autoresize_checkbox.toggled.connect(lambda _: self._show_data(container_widget))
+        # the settings only apply to raw (not encoded) tensors
+        label = QtWidgets.QLabel()
+        label.setText("Normalization:")
+        options_layout.addWidget(label)
+
+        normalization_combobox = QtWidgets.QComboBox()
+        normalization_combobox.addItems(NORMALIZATIONS)
+        normalization_combobox.setCurrentText(self._normalization)
+        options_layout.addWidget(normalization_combobox)
+
+        window_spinbox = QtWidgets.QDoubleSpinBox()
+        window_spinbox.setPrefix("W: ")
+        window_spinbox.setRange(0, 1e12)
+        window_spinbox.setDecimals(3)
+        window_spinbox.setValue(self._window)
+        options_layout.addWidget(window_spinbox)
+
+        level_spinbox = QtWidgets.QDoubleSpinBox()
+        level_spinbox.setPrefix("L: ")
+        level_spinbox.setRange(-1e12, 1e12)
+        level_spinbox.setDecimals(3)
+        level_spinbox.setValue(self._level)
+        options_layout.addWidget(level_spinbox)
+
+        slice_spinbox = QtWidgets.QSpinBox()
+        slice_spinbox.setPrefix("Slice: ")
+        slice_spinbox.setRange(0, 2 ** 31 - 1)
+        slice_spinbox.setValue(self._slice_index)
+        options_layout.addWidget(slice_spinbox)
+
+        channel_combobox = QtWidgets.QComboBox()
+        channel_combobox.addItems(ImageParser._CHANNELS)
+        channel_combobox.setCurrentText(self._channel)
+        options_layout.addWidget(channel_combobox)
+
+        # parsing runs outside of the GUI thread, so the widgets are not read there
+        normalization_combobox.currentTextChanged.connect(self._set_normalization)
+        window_spinbox.valueChanged.connect(self._set_window)
+        level_spinbox.valueChanged.connect(self._set_level)
+        slice_spinbox.valueChanged.connect(self._set_slice_index)
+        channel_combobox.currentTextChanged.connect(self._set_channel)
 
         return True
 
+    def _set_normalization(self, normalization):
+        self._normalization = normalization
+        self._settings_changed()
+
+    def _set_window(self, window):
+        self._window = window
+        self._settings_changed()
+
+    def _set_level(self, level):
+        self._level = level
+        self._settings_changed()
+
+    def _set_slice_index(self, slice_index):
+        self._slice_index = slice_index
+        self._settings_changed()
+
+    def _set_channel(self, channel):
+        self._channel = channel
+        self._settings_changed()
+
     @staticmethod
     def get_ui_name():
         return "Image"
 
 class ParsedDataImage(ParsedData):
+    # the image is stored in the channel order of OpenCV
     def __init__(self, raw_value):
         if isinstance(raw_value, np.ndarray):
-            self._value = image
+            self._value = raw_value
         else:
             self._value = None
         
     def get_data(self):
         return self._value
+
+    def get_file_extension(self):
+        return ".png"
+
+    def save(self, file_name):
+        import cv2
+        if not cv2.imwrite(file_name, self._value):
+            raise IOError("The image could not be written to `{0}´.".format(file_name))
+
+class ParsedDataImageCollection(ParsedData):
+    # the items of a collection are only read when their thumbnails get created
+    def __init__(self, collection, normalization=NORMALIZATION_AUTO, window=None, level=None):
+        self._collection = collection
+        self._settings = (normalization, window, level)
+
+    def get_data(self):
+        return self._collection
+
+    def get_settings(self):
+        # the normalization used for raw tensors
+        return self._settings
+
+    def get_nbytes(self):
+        return sys.getsizeof(self._collection)
\ No newline at end of file
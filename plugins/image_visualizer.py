@@ -0,0 +1,468 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from core.plugins import Visualizer, PluginRegistry
+from core.utils.lru_cache import LRUCache
+from core.utils.qimage import array_to_qimage
+from core.utils.thumbnail import THUMBNAIL_SIZE, ThumbnailDiskCache, create_raw_thumbnail, decode_thumbnail
+from plugins.image import ImageParser, ParsedDataImage, ParsedDataImageCollection
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+import multiprocessing
+import threading
+import math
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+class ImagePyramid(object):
+    # the image at successively halved resolutions, level 0 is the image itself
+    # and the coarser levels are added by `build` which runs in the background
+    def __init__(self, image):
+        self._levels = [image]
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def build(self):
+        import cv2
+        level = self._levels[0]
+        while max(level.shape[0], level.shape[1]) > TiledImageItem.TILE_SIZE and not self._cancelled:
+            size = (max(1, level.shape[1] // 2), max(1, level.shape[0] // 2))
+            level = cv2.resize(level, size, interpolation=cv2.INTER_AREA)
+            # appending is atomic, so the painter can use the levels built so far
+            self._levels.append(level)
+
+    def get_level(self, index):
+        # falls back to the finest level built so far
+        levels = self._levels
+        index = min(index, len(levels) - 1)
+        return index, levels[index]
+
+    def get_shape(self):
+        return self._levels[0].shape
+
+class TiledImageItem(QtWidgets.QGraphicsObject):
+    TILE_SIZE = 256
+    # upper bound for the memory used by the tile pixmaps of one image
+    TILE_CACHE_SIZE = 256 * 1024 * 1024
+
+    _pyramid_executor = ThreadPoolExecutor(max_workers=1)
+
+    pyramid_built = QtCore.pyqtSignal()
+
+    # draws only the tiles which are exposed at the resolution matching the zoom
+    def __init__(self, image, parent=None):
+        super(TiledImageItem, self).__init__(parent)
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+        self._pyramid = ImagePyramid(image)
+        self._tile_cache = LRUCache(TiledImageItem.TILE_CACHE_SIZE, lambda pixmap: pixmap.width() * pixmap.height() * 4)
+
+        self.pyramid_built.connect(self.update)
+        self.destroyed.connect(self._pyramid.cancel)
+        future = TiledImageItem._pyramid_executor.submit(self._pyramid.build)
+        future.add_done_callback(self._emit_pyramid_built)
+
+    def _emit_pyramid_built(self, future):
+        try:
+            self.pyramid_built.emit()
+        except RuntimeError:
+            # the item has been removed before the pyramid was finished
+            pass
+
+    def boundingRect(self):
+        shape = self._pyramid.get_shape()
+        return QtCore.QRectF(0, 0, shape[1], shape[0])
+
+    def paint(self, painter, option, widget=None):
+        scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        level_index = max(0, int(math.floor(math.log2(1.0 / scale)))) if scale > 0 else 0
+        level_index, level = self._pyramid.get_level(level_index)
+
+        shape = self._pyramid.get_shape()
+        scale_x = shape[1] / level.shape[1]
+        scale_y = shape[0] / level.shape[0]
+
+        # exposed area in the pixels of the level
+        exposed = option.exposedRect
+        tile_size = TiledImageItem.TILE_SIZE
+        first_column = max(0, int(exposed.left() / scale_x) // tile_size)
+        last_column = min((level.shape[1] - 1) // tile_size, int(exposed.right() / scale_x) // tile_size)
+        first_row = max(0, int(exposed.top() / scale_y) // tile_size)
+        last_row = min((level.shape[0] - 1) // tile_size, int(exposed.bottom() / scale_y) // tile_size)
+
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, scale < 1)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                pixmap = self._get_tile(level_index, level, row, column)
+                target = QtCore.QRectF(column * tile_size * scale_x, row * tile_size * scale_y,
+                                       pixmap.width() * scale_x, pixmap.height() * scale_y)
+                painter.drawPixmap(target, pixmap, QtCore.QRectF(pixmap.rect()))
+
+    def _get_tile(self, level_index, level, row, column):
+        key = (level_index, row, column)
+        pixmap = self._tile_cache.get(key)
+        if pixmap is None:
+            tile_size = TiledImageItem.TILE_SIZE
+            # the tile is a view into the level, the pixmap is the only copy
+            tile = level[row * tile_size:(row + 1) * tile_size, column * tile_size:(column + 1) * tile_size]
+            pixmap = QtGui.QPixmap.fromImage(array_to_qimage(tile))
+            self._tile_cache.put(key, pixmap)
+        return pixmap
+
+class ImageView(QtWidgets.QGraphicsView):
+    ZOOM_FACTOR = 1.25
+
+    # scrollable and zoomable view which optionally keeps the image fitted into it
+    def __init__(self, parent=None):
+        super(ImageView, self).__init__(parent)
+        self.setScene(QtWidgets.QGraphicsScene(self))
+        self.setDragMode(QtWidgets.QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+        self.setViewportUpdateMode(QtWidgets.QGraphicsView.SmartViewportUpdate)
+        self._fit_to_window = False
+
+    def set_image(self, image):
+        self.scene().clear()
+        item = TiledImageItem(image)
+        self.scene().addItem(item)
+        self.scene().setSceneRect(item.boundingRect())
+
+    def set_fit_to_window(self, fit_to_window):
+        self._fit_to_window = fit_to_window
+        if fit_to_window:
+            self.fitInView(self.sceneRect(), QtCore.Qt.KeepAspectRatio)
+        else:
+            self.resetTransform()
+
+    def resizeEvent(self, event):
+        super(ImageView, self).resizeEvent(event)
+        if self._fit_to_window:
+            self.fitInView(self.sceneRect(), QtCore.Qt.KeepAspectRatio)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120.0
+        if steps == 0:
+            return
+
+        self._fit_to_window = False
+        factor = ImageView.ZOOM_FACTOR ** steps
+        self.scale(factor, factor)
+
+@PluginRegistry.visualizer
+class ImageVisualizer(Visualizer):
+    # the option is kept for the following images
+    _fit_to_window = False
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_ui_name():
+        return "Image"
+
+    @staticmethod
+    def validate_input_format(parsed_data_type):
+        return parsed_data_type == ParsedDataImage
+
+    def _show_data(self, container_widget):   
+        if self._parsed_data is None or self._parsed_data.get_data() is None:
+            return False
+
+        content = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(content)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        fit_checkbox = QtWidgets.QCheckBox()
+        fit_checkbox.setText("Resize image")
+        fit_checkbox.setChecked(ImageVisualizer._fit_to_window)
+        layout.addWidget(fit_checkbox)
+
+        view = ImageView()
+        view.set_image(self._parsed_data.get_data())
+        layout.addWidget(view)
+
+        fit_checkbox.toggled.connect(self._set_fit_to_window)
+        fit_checkbox.toggled.connect(view.set_fit_to_window)
+
+        container_widget.layout().addWidget(content, 0,0,1,1)
+        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        size_policy.setHorizontalStretch(1)
+        size_policy.setVerticalStretch(1)
+        content.setSizePolicy(size_policy)
+        content.show()
+        view.set_fit_to_window(ImageVisualizer._fit_to_window)
+
+        return True
+
+    @staticmethod
+    def _set_fit_to_window(fit_to_window):
+        ImageVisualizer._fit_to_window = fit_to_window
+
+    def visualize_data(self, parsed_data, container_widget):
+        self._parsed_data = parsed_data
+        self._container_widget = container_widget
+
+        return self._show_data(container_widget)
+
+class ThumbnailLoader(object):
+    # creates the thumbnails of a collection in the background, the items are read by
+    # threads while encoded images are submitted to a process pool, whose results are
+    # handled by callbacks, so the number of parallel decodes is not limited by the threads
+    # number of requested thumbnails after which the oldest requests get dropped
+    MAX_PENDING = 64
+
+    _thread_executor = ThreadPoolExecutor(max_workers=4)
+    _process_executor = None
+    _lock = threading.Lock()
+    _disk_cache = None
+
+    def __init__(self, parsed_data, callback):
+        self._collection = parsed_data.get_data()
+        self._settings = parsed_data.get_settings()
+        self._callback = callback
+        self._file_stamp = self._collection.file_stamp
+        # the future of the current step of each requested row, the callbacks of the
+        # futures replace them from other threads
+        self._pending = OrderedDict()
+        self._pending_lock = threading.RLock()
+        self._cancelled = False
+
+    @staticmethod
+    def _get_process_executor():
+        with ThumbnailLoader._lock:
+            if ThumbnailLoader._process_executor is None:
+                # forking a process which runs Qt is not safe
+                ThumbnailLoader._process_executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+            return ThumbnailLoader._process_executor
+
+    @staticmethod
+    def _get_disk_cache():
+        with ThumbnailLoader._lock:
+            if ThumbnailLoader._disk_cache is None:
+                ThumbnailLoader._disk_cache = ThumbnailDiskCache()
+            return ThumbnailLoader._disk_cache
+
+    def request(self, row):
+        with self._pending_lock:
+            future = self._pending.pop(row, None)
+            if future is not None:
+                self._pending[row] = future
+            else:
+                # added before the callback, which might run right away
+                future = ThumbnailLoader._thread_executor.submit(self._read, row)
+                self._pending[row] = future
+                future.add_done_callback(lambda future, row=row: self._read_done(row, future))
+
+            # rows which have been scrolled past long ago are not needed anymore
+            dropped = []
+            while len(self._pending) > ThumbnailLoader.MAX_PENDING:
+                dropped.append(self._pending.popitem(last=False)[1])
+        for future in dropped:
+            future.cancel()
+
+    def finished(self, row):
+        with self._pending_lock:
+            self._pending.pop(row, None)
+
+    def cancel(self):
+        self._cancelled = True
+        with self._pending_lock:
+            futures = list(self._pending.values())
+            self._pending.clear()
+        for future in futures:
+            future.cancel()
+
+    def _read(self, row):
+        # returns (key, encoded image, thumbnail), the encoded image is None once the
+        # thumbnail is known
+        if self._cancelled:
+            return None, None, None
+
+        path, item = self._collection.resolve(row)
+        if item is None:
+            return None, None, None
+
+        disk_cache = ThumbnailLoader._get_disk_cache()
+        key = (self._file_stamp, path, THUMBNAIL_SIZE, self._settings)
+        image = disk_cache.get(key)
+        if image is not None:
+            return key, None, image
+
+        data = item.data
+        if ImageParser._is_raw_image(data):
+            image = create_raw_thumbnail(data, THUMBNAIL_SIZE, *self._settings)
+            if image is not None:
+                disk_cache.put(key, image)
+            return key, None, image
+
+        encoded = ImageParser._get_encoded_buffer(data)
+        if encoded is None:
+            return key, None, None
+        return key, encoded.tobytes(), None
+
+    def _replace_pending(self, row, future, next_future):
+        # returns False if the row has been dropped in the meantime
+        with self._pending_lock:
+            if self._pending.get(row) is not future:
+                return False
+            self._pending[row] = next_future
+            return True
+
+    def _read_done(self, row, future):
+        if self._cancelled or future.cancelled():
+            return
+        if future.exception() is not None:
+            self._callback(row, None)
+            return
+
+        key, encoded, image = future.result()
+        if encoded is None:
+            self._callback(row, image)
+            return
+
+        try:
+            decode_future = ThumbnailLoader._get_process_executor().submit(decode_thumbnail, encoded, THUMBNAIL_SIZE)
+        except (BrokenProcessPool, RuntimeError):
+            decode_future = ThumbnailLoader._thread_executor.submit(decode_thumbnail, encoded, THUMBNAIL_SIZE)
+            encoded = None
+        if not self._replace_pending(row, future, decode_future):
+            decode_future.cancel()
+            return
+        decode_future.add_done_callback(lambda decode_future: self._decoded(row, key, encoded, decode_future))
+
+    def _decoded(self, row, key, encoded, future):
+        # `encoded` is kept to decode the image in a thread if the process pool is broken
+        if self._cancelled or future.cancelled():
+            return
+        if encoded is not None and isinstance(future.exception(), BrokenProcessPool):
+            retry_future = ThumbnailLoader._thread_executor.submit(decode_thumbnail, encoded, THUMBNAIL_SIZE)
+            if self._replace_pending(row, future, retry_future):
+                retry_future.add_done_callback(lambda retry_future: self._decoded(row, key, None, retry_future))
+            else:
+                retry_future.cancel()
+            return
+
+        image = future.result() if future.exception() is None else None
+        if image is not None:
+            # the callbacks of the process pool run in the thread which collects its results
+            ThumbnailLoader._thread_executor.submit(ThumbnailLoader._get_disk_cache().put, key, image)
+        self._callback(row, image)
+
+class ThumbnailListModel(QtCore.QAbstractListModel):
+    # upper bound for the memory used by the thumbnail pixmaps
+    PIXMAP_CACHE_SIZE = 128 * 1024 * 1024
+
+    thumbnail_loaded = QtCore.pyqtSignal(int, object)
+
+    # the views only ask for the decorations of visible rows, so only those get loaded
+    def __init__(self, parsed_data, parent=None):
+        super(ThumbnailListModel, self).__init__(parent)
+        self._collection = parsed_data.get_data()
+        self._loader = ThumbnailLoader(parsed_data, self._emit_thumbnail_loaded)
+        self._pixmaps = LRUCache(ThumbnailListModel.PIXMAP_CACHE_SIZE, lambda pixmap: pixmap.width() * pixmap.height() * 4)
+        self._failed_rows = set()
+
+        self._placeholder = QtGui.QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self._placeholder.fill(QtGui.QColor(224, 224, 224))
+
+        self.thumbnail_loaded.connect(self._thumbnail_loaded)
+
+    def get_loader(self):
+        return self._loader
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._collection)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        if role == QtCore.Qt.DisplayRole or role == QtCore.Qt.ToolTipRole:
+            return self._collection.get_name(row)
+
+        if role == QtCore.Qt.DecorationRole:
+            pixmap = self._pixmaps.get(row)
+            if pixmap is None:
+                if row not in self._failed_rows:
+                    self._loader.request(row)
+                return self._placeholder
+            return pixmap
+
+        return None
+
+    def _emit_thumbnail_loaded(self, row, image):
+        try:
+            self.thumbnail_loaded.emit(row, image)
+        except RuntimeError:
+            # the model has been removed before the thumbnail was finished
+            pass
+
+    def _thumbnail_loaded(self, row, image):
+        self._loader.finished(row)
+        if image is None:
+            self._failed_rows.add(row)
+        else:
+            self._pixmaps.put(row, QtGui.QPixmap.fromImage(array_to_qimage(image)))
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
+
+@PluginRegistry.visualizer
+class ThumbnailGridVisualizer(Visualizer):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_ui_name():
+        return "Thumbnails"
+
+    @staticmethod
+    def validate_input_format(parsed_data_type):
+        return parsed_data_type == ParsedDataImageCollection
+
+    def visualize_data(self, parsed_data, container_widget):
+        if parsed_data is None or len(parsed_data.get_data()) == 0:
+            return False
+
+        view = QtWidgets.QListView()
+        view.setViewMode(QtWidgets.QListView.IconMode)
+        view.setResizeMode(QtWidgets.QListView.Adjust)
+        view.setMovement(QtWidgets.QListView.Static)
+        # uniform sizes let the view lay out huge collections without asking for their data
+        view.setUniformItemSizes(True)
+        view.setIconSize(QtCore.QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        view.setGridSize(QtCore.QSize(THUMBNAIL_SIZE + 16, THUMBNAIL_SIZE + 32))
+
+        model = ThumbnailListModel(parsed_data, parent=view)
+        view.setModel(model)
+        view.destroyed.connect(model.get_loader().cancel)
+
+        container_widget.layout().addWidget(view, 0,0,1,1)
+        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        size_policy.setHorizontalStretch(1)
+        size_policy.setVerticalStretch(1)
+        view.setSizePolicy(size_policy)
+        view.show()
+
+        return True
\ No newline at end of file
@@ -0,0 +1,387 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from core.plugins import Visualizer, PluginRegistry
+from core.utils.background_worker import BackgroundWorker
+from core.utils.decimation import MinMaxPyramid, MinMaxPyramid2D
+from core.utils.image_normalization import NORMALIZATION_WINDOW, to_uint8
+from plugins.array import ParsedDataArray
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+def _create_color_table():
+    # a perceptually ordered map from dark blue over green to yellow
+    anchors = np.array([[68, 1, 84], [59, 82, 139], [33, 145, 140], [94, 201, 98], [253, 231, 37]], dtype=np.float64)
+    positions = np.linspace(0, 255, len(anchors))
+    colors = np.stack([np.interp(np.arange(256), positions, anchors[:, i]) for i in range(3)], axis=-1).astype(int)
+    return [QtGui.qRgb(*color) for color in colors]
+
+class PyramidWorker(BackgroundWorker):
+    # builds the min/max pyramid of a signal in the background
+    finished = QtCore.pyqtSignal()
+
+    _executor = ThreadPoolExecutor(max_workers=1)
+
+    def __init__(self, pyramid, parent):
+        super(PyramidWorker, self).__init__(parent)
+        self._pyramid = pyramid
+
+    def start(self):
+        self.submit(self._build)
+
+    def _build(self):
+        if self._pyramid.build(self.emit_progress, self.is_cancelled):
+            self.emit_signal(self.finished)
+
+class HeatmapWorker(PyramidWorker):
+    # builds the min/max pyramid of a 2-d array and renders the views of the heatmap from
+    # it, only the view which has been requested last gets rendered
+    rendered = QtCore.pyqtSignal(object, object)
+
+    _executor = ThreadPoolExecutor(max_workers=1)
+
+    def __init__(self, pyramid, parent):
+        super(HeatmapWorker, self).__init__(pyramid, parent)
+        self._lock = threading.Lock()
+        self._view = None
+        self._render_pending = False
+
+    def render(self, view):
+        # view is (rows, columns, height, width), the rows and columns are (start, stop) ranges
+        with self._lock:
+            self._view = view
+            if self._render_pending:
+                return
+            self._render_pending = True
+        self.submit(self._render)
+
+    def _render(self):
+        with self._lock:
+            view = self._view
+            self._render_pending = False
+
+        minima, maxima = self._pyramid.get_tiles(*view)
+        # the maxima are drawn, so that peaks stay visible, the colors span the whole range of the view
+        finite_minima = minima[np.isfinite(minima)]
+        finite_maxima = maxima[np.isfinite(maxima)]
+        if finite_minima.size == 0 or finite_maxima.size == 0:
+            image = np.zeros(maxima.shape, dtype=np.uint8)
+        else:
+            low, high = float(finite_minima.min()), float(finite_maxima.max())
+            image = to_uint8(maxima, NORMALIZATION_WINDOW, high - low, (low + high) / 2.0)
+        self.emit_signal(self.rendered, view, image)
+
+class PlotWidget(QtWidgets.QWidget):
+    # the view of a range of the data which is zoomed with the wheel, moved by dragging
+    # and reset by a double click, derived classes draw the data of the range
+    # space for the labels of the axes
+    LEFT_MARGIN = 70
+    BOTTOM_MARGIN = 30
+    # factor of one step of the mouse wheel
+    ZOOM_FACTOR = 1.25
+
+    def __init__(self, parent=None):
+        super(PlotWidget, self).__init__(parent)
+        self._drag_position = None
+        self.setMinimumSize(200, 150)
+        self.setFocusPolicy(QtCore.Qt.WheelFocus)
+
+    def get_plot_rect(self):
+        return self.rect().adjusted(PlotWidget.LEFT_MARGIN, 10, -10, -PlotWidget.BOTTOM_MARGIN)
+
+    def zoom(self, factor, x, y):
+        pass
+
+    def pan(self, dx, dy):
+        pass
+
+    def reset_view(self):
+        pass
+
+    def wheelEvent(self, event):
+        factor = PlotWidget.ZOOM_FACTOR ** (-event.angleDelta().y() / 120.0)
+        plot = self.get_plot_rect()
+        self.zoom(factor, (event.pos().x() - plot.left()) / max(1, plot.width()), (event.pos().y() - plot.top()) / max(1, plot.height()))
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton:
+            self._drag_position = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_position is None:
+            return
+        plot = self.get_plot_rect()
+        delta = event.pos() - self._drag_position
+        self._drag_position = event.pos()
+        self.pan(-delta.x() / max(1, plot.width()), -delta.y() / max(1, plot.height()))
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_position = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
+        self.update()
+
+    def _draw_frame(self, painter, plot, x_range, y_range):
+        painter.setPen(self.palette().color(QtGui.QPalette.Text))
+        painter.drawRect(plot.adjusted(0, 0, -1, -1))
+        metrics = painter.fontMetrics()
+        first, last = "{0:.6g}".format(x_range[0]), "{0:.6g}".format(x_range[1])
+        painter.drawText(plot.left(), plot.bottom() + metrics.height() + 2, first)
+        painter.drawText(plot.right() - metrics.width(last), plot.bottom() + metrics.height() + 2, last)
+        for value, position in [(y_range[1], plot.top()), (y_range[0], plot.bottom())]:
+            text = "{0:.4g}".format(value)
+            painter.drawText(plot.left() - metrics.width(text) - 4, int(position + metrics.ascent() / 2), text)
+
+class LinePlotWidget(PlotWidget):
+    # draws a 1-d signal as the envelope of its minima and maxima, so that each column
+    # of pixels needs at most two points no matter how many samples it covers
+    def __init__(self, array, parent=None):
+        super(LinePlotWidget, self).__init__(parent)
+        self._pyramid = MinMaxPyramid(array)
+        self._progress = 0.0
+        self._error = None
+        self.reset_view()
+
+        self._worker = PyramidWorker(self._pyramid, parent=self)
+        self._worker.progress.connect(self._worker_progress)
+        self._worker.finished.connect(self.update)
+        self._worker.failed.connect(self._worker_failed)
+        self._worker.start()
+
+    def reset_view(self):
+        self._start = 0.0
+        self._stop = float(max(1, len(self._pyramid)))
+
+    def zoom(self, factor, x, y):
+        # the sample below the cursor stays where it is, at least a few samples stay visible
+        length = len(self._pyramid)
+        center = self._start + x * (self._stop - self._start)
+        width = min(length, max(4.0, (self._stop - self._start) * factor))
+        self._start = center - x * width
+        self._stop = self._start + width
+        self._clamp()
+
+    def pan(self, dx, dy):
+        width = self._stop - self._start
+        self._start += dx * width
+        self._stop += dx * width
+        self._clamp()
+
+    def _clamp(self):
+        width = self._stop - self._start
+        self._start = min(max(0.0, self._start), max(0.0, len(self._pyramid) - width))
+        self._stop = self._start + width
+
+    def _worker_progress(self, progress):
+        self._progress = progress
+        self.update()
+
+    def _worker_failed(self, error):
+        self._error = error
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        self._paint(painter, self.get_plot_rect())
+        painter.end()
+
+    def _paint(self, painter, plot):
+        if self._error is not None:
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "The data could not be read: {0}".format(self._error))
+            return
+        if not self._pyramid.is_built():
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "Building the overview... {0:.0%}".format(self._progress))
+            return
+
+        positions, minima, maxima = self._pyramid.get_envelope(self._start, self._stop, plot.width())
+        with np.errstate(invalid="ignore"):
+            valid = np.isfinite(minima) & np.isfinite(maxima)
+        if not valid.any():
+            self._draw_frame(painter, plot, (self._start, self._stop), (0.0, 1.0))
+            return
+        low, high = float(minima[valid].min()), float(maxima[valid].max())
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        self._draw_frame(painter, plot, (self._start, self._stop), (low, high))
+
+        # the minimum and the maximum of each column are connected, which also draws the steps between the columns
+        x = plot.left() + (positions[valid] - self._start) / (self._stop - self._start) * plot.width()
+        y_minima = plot.bottom() - (minima[valid] - low) / (high - low) * plot.height()
+        y_maxima = plot.bottom() - (maxima[valid] - low) / (high - low) * plot.height()
+        points = np.empty((2 * len(x), 2))
+        points[0::2, 0] = x
+        points[1::2, 0] = x
+        points[0::2, 1] = y_minima
+        points[1::2, 1] = y_maxima
+
+        painter.setClipRect(plot)
+        painter.setPen(QtGui.QPen(self.palette().color(QtGui.QPalette.Highlight), 1))
+        painter.drawPolyline(QtGui.QPolygonF([QtCore.QPointF(px, py) for px, py in points]))
+
+class HeatmapWidget(PlotWidget):
+    # draws a 2-d array as an image, the views are rendered by the worker from the min/max
+    # pyramid of the array, so the GUI never waits for the array to be read
+    _COLOR_TABLE = None
+
+    def __init__(self, array, parent=None):
+        super(HeatmapWidget, self).__init__(parent)
+        self._pyramid = MinMaxPyramid2D(array)
+        self._progress = 0.0
+        self._error = None
+        # the image which has been rendered last and its view
+        self._image = None
+        self._image_view = None
+        self._requested_view = None
+        self.reset_view()
+
+        if HeatmapWidget._COLOR_TABLE is None:
+            HeatmapWidget._COLOR_TABLE = _create_color_table()
+
+        self._worker = HeatmapWorker(self._pyramid, parent=self)
+        self._worker.progress.connect(self._worker_progress)
+        self._worker.finished.connect(self.update)
+        self._worker.rendered.connect(self._worker_rendered)
+        self._worker.failed.connect(self._worker_failed)
+        self._worker.start()
+
+    def reset_view(self):
+        self._rows = (0.0, float(self._pyramid.shape[0]))
+        self._columns = (0.0, float(self._pyramid.shape[1]))
+
+    @staticmethod
+    def _zoom_range(value_range, size, factor, position):
+        center = value_range[0] + position * (value_range[1] - value_range[0])
+        width = min(size, max(2.0, (value_range[1] - value_range[0]) * factor))
+        start = min(max(0.0, center - position * width), size - width)
+        return (start, start + width)
+
+    @staticmethod
+    def _pan_range(value_range, size, delta):
+        width = value_range[1] - value_range[0]
+        start = min(max(0.0, value_range[0] + delta * width), size - width)
+        return (start, start + width)
+
+    def zoom(self, factor, x, y):
+        self._rows = HeatmapWidget._zoom_range(self._rows, self._pyramid.shape[0], factor, y)
+        self._columns = HeatmapWidget._zoom_range(self._columns, self._pyramid.shape[1], factor, x)
+
+    def pan(self, dx, dy):
+        self._rows = HeatmapWidget._pan_range(self._rows, self._pyramid.shape[0], dy)
+        self._columns = HeatmapWidget._pan_range(self._columns, self._pyramid.shape[1], dx)
+
+    def _worker_progress(self, progress):
+        self._progress = progress
+        self.update()
+
+    def _worker_failed(self, error):
+        self._error = error
+        self.update()
+
+    def _worker_rendered(self, view, values):
+        image = QtGui.QImage(values.data, values.shape[1], values.shape[0], values.strides[0], QtGui.QImage.Format_Indexed8)
+        image.setColorTable(HeatmapWidget._COLOR_TABLE)
+        self._image = image.copy()
+        self._image_view = view
+        self.update()
+
+    def _get_view(self, plot):
+        rows = (int(self._rows[0]), int(np.ceil(self._rows[1])))
+        columns = (int(self._columns[0]), int(np.ceil(self._columns[1])))
+        return (rows, columns, plot.height(), plot.width())
+
+    def _get_image_rect(self, plot):
+        # the rectangle of the last image within the current view, so that it follows
+        # zooming and panning until the image of the current view has been rendered
+        rows, columns = self._image_view[:2]
+        row_scale = plot.height() / (self._rows[1] - self._rows[0])
+        column_scale = plot.width() / (self._columns[1] - self._columns[0])
+        return QtCore.QRectF(plot.left() + (columns[0] - self._columns[0]) * column_scale, plot.top() + (rows[0] - self._rows[0]) * row_scale,
+                             (columns[1] - columns[0]) * column_scale, (rows[1] - rows[0]) * row_scale)
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        self._paint(painter, self.get_plot_rect())
+        painter.end()
+
+    def _paint(self, painter, plot):
+        if self._error is not None:
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "The data could not be read: {0}".format(self._error))
+            return
+        if not self._pyramid.is_built():
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "Building the overview... {0:.0%}".format(self._progress))
+            return
+
+        view = self._get_view(plot)
+        if view != self._requested_view:
+            # the image is only rendered again if the view or the size has changed
+            self._requested_view = view
+            self._worker.render(view)
+
+        if self._image is not None:
+            painter.save()
+            painter.setClipRect(plot)
+            painter.drawImage(self._get_image_rect(plot), self._image)
+            painter.restore()
+        self._draw_frame(painter, plot, self._columns, (self._rows[1], self._rows[0]))
+
+@PluginRegistry.visualizer
+class PlotVisualizer(Visualizer):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_ui_name():
+        return "Plot"
+
+    @staticmethod
+    def validate_input_format(parsed_data_type):
+        return parsed_data_type == ParsedDataArray
+
+    def _show_data(self, container_widget):
+        if self._parsed_data is None or self._parsed_data.get_data() is None:
+            return False
+
+        data = self._parsed_data.get_data()
+        if data.dtype.kind not in "biuf" or data.ndim not in (1, 2) or data.size == 0:
+            content = QtWidgets.QLabel("Only 1-d and 2-d numeric arrays can be plotted.")
+            content.setAlignment(QtCore.Qt.AlignCenter)
+        elif data.ndim == 1:
+            content = LinePlotWidget(data)
+        else:
+            content = HeatmapWidget(data)
+
+        container_widget.layout().addWidget(content, 0,0,1,1)
+        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        size_policy.setHorizontalStretch(1)
+        size_policy.setVerticalStretch(1)
+        content.setSizePolicy(size_policy)
+        content.show()
+
+        return True
+
+    def visualize_data(self, parsed_data, container_widget):
+        self._parsed_data = parsed_data
+        self._container_widget = container_widget
+
+        return self._show_data(container_widget)
\ No newline at end of file
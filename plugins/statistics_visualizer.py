@@ -0,0 +1,185 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from core.plugins import Visualizer, PluginRegistry
+from core.utils.background_worker import BackgroundWorker
+from core.utils.statistics import HISTOGRAM_BINS, StatisticsCache, compute_statistics
+from plugins.array import ParsedDataArray
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+class StatisticsWorker(BackgroundWorker):
+    # computes the statistics of an array in the background, the blocks of the array
+    # are reduced by the thread pool of `compute_statistics`
+    finished = QtCore.pyqtSignal(object)
+
+    _executor = ThreadPoolExecutor(max_workers=1)
+
+    def __init__(self, array, parent):
+        super(StatisticsWorker, self).__init__(parent)
+        self._array = array
+
+    def start(self):
+        self.submit(self._compute)
+
+    def _compute(self):
+        statistics = StatisticsCache.get(self._array, HISTOGRAM_BINS)
+        if statistics is None:
+            statistics = compute_statistics(self._array, HISTOGRAM_BINS, self.emit_progress, self.is_cancelled)
+            if statistics is None:
+                return
+            StatisticsCache.put(self._array, statistics, HISTOGRAM_BINS)
+        self.emit_signal(self.finished, statistics)
+
+class HistogramWidget(QtWidgets.QWidget):
+    # bars of the histogram with the range below them
+    def __init__(self, parent=None):
+        super(HistogramWidget, self).__init__(parent)
+        self._histogram = None
+        self._range = None
+        self._log_scale = False
+        self.setMinimumHeight(120)
+
+    def set_histogram(self, histogram, histogram_range):
+        self._histogram = np.asarray(histogram)
+        self._range = histogram_range
+        self.update()
+
+    def set_log_scale(self, log_scale):
+        self._log_scale = log_scale
+        self.update()
+
+    def paintEvent(self, event):
+        if self._histogram is None or len(self._histogram) == 0:
+            return
+
+        painter = QtGui.QPainter(self)
+        metrics = painter.fontMetrics()
+        plot = self.rect().adjusted(0, 0, 0, -metrics.height() - 4)
+
+        counts = self._histogram.astype(np.float64)
+        if self._log_scale:
+            counts = np.log1p(counts)
+        maximum = counts.max()
+        if maximum > 0:
+            # one bar per bin, the bins are merged if they are narrower than a pixel
+            left = np.floor(np.arange(len(counts)) * plot.width() / len(counts)).astype(int)
+            right = np.floor(np.arange(1, len(counts) + 1) * plot.width() / len(counts)).astype(int)
+            color = self.palette().color(QtGui.QPalette.Highlight)
+            for i in range(len(counts)):
+                height = int(round(counts[i] / maximum * plot.height()))
+                if height > 0:
+                    painter.fillRect(plot.left() + left[i], plot.bottom() - height + 1, max(1, right[i] - left[i]), height, color)
+
+        painter.setPen(self.palette().color(QtGui.QPalette.Text))
+        painter.drawLine(plot.bottomLeft(), plot.bottomRight())
+        low, high = "{0:g}".format(self._range[0]), "{0:g}".format(self._range[1])
+        painter.drawText(plot.left(), self.height() - 2, low)
+        painter.drawText(plot.right() - metrics.width(high), self.height() - 2, high)
+        painter.end()
+
+class StatisticsWidget(QtWidgets.QWidget):
+    # the statistics of an array, which are filled in once the worker is done
+    def __init__(self, array, parent=None):
+        super(StatisticsWidget, self).__init__(parent)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        form = QtWidgets.QFormLayout()
+        self._labels = {}
+        shape = "x".join(str(x) for x in array.shape) if array.ndim > 0 else "scalar"
+        form.addRow("Shape:", QtWidgets.QLabel("{0} ({1})".format(shape, array.dtype)))
+        for key, text in [("count", "Finite values:"), ("min", "Minimum:"), ("max", "Maximum:"), ("mean", "Mean:"), ("std", "Standard deviation:"),
+                          ("nan", "NaN:"), ("posinf", "+Inf:"), ("neginf", "-Inf:"), ("outside", "Outside of the histogram:")]:
+            label = QtWidgets.QLabel("...")
+            label.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+            form.addRow(text, label)
+            self._labels[key] = label
+        layout.addLayout(form)
+
+        self._progress_bar = QtWidgets.QProgressBar()
+        self._progress_bar.setRange(0, 1000)
+        layout.addWidget(self._progress_bar)
+
+        self._histogram = HistogramWidget()
+        layout.addWidget(self._histogram, 1)
+        log_scale = QtWidgets.QCheckBox("Logarithmic counts")
+        log_scale.toggled.connect(self._histogram.set_log_scale)
+        layout.addWidget(log_scale)
+
+        self._worker = StatisticsWorker(array, parent=self)
+        self._worker.progress.connect(self._worker_progress)
+        self._worker.finished.connect(self._worker_finished)
+        self._worker.failed.connect(self._worker_failed)
+        self._worker.start()
+
+    def _worker_progress(self, progress):
+        self._progress_bar.setValue(int(progress * self._progress_bar.maximum()))
+
+    def _worker_failed(self, error):
+        self._progress_bar.setFormat("Failed: {0}".format(error))
+
+    def _worker_finished(self, statistics):
+        for key in ["count", "nan", "posinf", "neginf"]:
+            self._labels[key].setText("{0:,}".format(statistics[key]))
+        for key in ["min", "max", "mean", "std"]:
+            self._labels[key].setText("{0:.6g}".format(statistics[key]) if statistics[key] is not None else "-")
+        self._labels["outside"].setText("{0:,} below, {1:,} above".format(statistics["below_range"], statistics["above_range"]))
+
+        self._progress_bar.setVisible(False)
+        self._histogram.set_histogram(statistics["histogram"], statistics["histogram_range"])
+
+@PluginRegistry.visualizer
+class StatisticsVisualizer(Visualizer):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_ui_name():
+        return "Statistics"
+
+    @staticmethod
+    def validate_input_format(parsed_data_type):
+        return parsed_data_type == ParsedDataArray
+
+    def _show_data(self, container_widget):
+        if self._parsed_data is None or self._parsed_data.get_data() is None:
+            return False
+
+        data = self._parsed_data.get_data()
+        if data.dtype.kind not in "biuf":
+            return False
+
+        content = StatisticsWidget(data)
+        container_widget.layout().addWidget(content, 0,0,1,1)
+        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        size_policy.setHorizontalStretch(1)
+        size_policy.setVerticalStretch(1)
+        content.setSizePolicy(size_policy)
+        content.show()
+
+        return True
+
+    def visualize_data(self, parsed_data, container_widget):
+        self._parsed_data = parsed_data
+        self._container_widget = container_widget
+
+        return self._show_data(container_widget)
\ No newline at end of file
@@ -17,81 +17,50 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-
-from core.plugins import Visualizer, PluginRegistry, Parser, ParsedData
+from core.plugins import PluginRegistry, Parser, ParsedData
+from core.utils.lazy_array import LazyArray
+from core.utils.text_document import TextDocument
 import numpy as np
-from PyQt5 import QtGui, QtWidgets
-
-@PluginRegistry.visualizer
-class StringVisualizer(Visualizer):
-    def __init__(self):
-        pass
-
-    @staticmethod
-    def get_ui_name():
-        return "String"
-
-    @staticmethod
-    def validate_input_format(parsed_data_type):
-        return parsed_data_type == ParsedDataString
-
-    def _show_data(self, container_widget):       
-        label = QtWidgets.QTextEdit()
-        label.setText(self._parsed_data.get_data())
-        label.setContentsMargins(0,0,0,0)
-        label.setReadOnly(True)
-       
-        container_widget.layout().addWidget(label, 0,0,1,1)
-        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
-        size_policy.setHorizontalStretch(1)
-        size_policy.setVerticalStretch(1)
-        label.setSizePolicy(size_policy)
-        #label.setScaledContents(True)
-        #label.setWordWrap(True)
-        label.show()
-
-        return True
-
-    def visualize_data(self, parsed_data, container_widget):
-        self._parsed_data = parsed_data
-        self._container_widget = container_widget
-
-        return self._show_data(container_widget)
 
 @PluginRegistry.parser
 class StringParser(Parser):
     def __init__(self):
         self._encoding_combobox = None
+        self._encoding = "utf-8"
 
     def validate_input_format(self, shape, size, dtype):
         return True
 
     def parse(self, data):
         value = None
+        if isinstance(data, LazyArray):
+            # this parser needs the whole dataset
+            data = np.asarray(data)
+
         if isinstance(data, str):
             value = data
         else:
             try:
-                if isinstance(data, np.ndarray) and data.dtype.type is np.string_ and data.size == 1:
+                if isinstance(data, np.ndarray) and data.dtype.type is np.bytes_ and data.size == 1:
                     value = data.item(0)
                 elif isinstance(data, bytes):
                     value = data
             except:
                 value = str(data)
 
-            if isinstance(value, bytes):
-                try:
-                    value  = value.decode(self._encoding_combobox.itemText(self._encoding_combobox.currentIndex()))
-                except:
-                    # decoding failed
-                    value  = str(value )
-
             if value is None:
                 value = str(data)
 
-        return ParsedDataString(value)
+        # the text is only decoded in chunks once it is shown, bytes which are invalid
+        # in the encoding are replaced
+        if isinstance(value, bytes):
+            return ParsedDataString(TextDocument(value, self._encoding))
+        return ParsedDataString(TextDocument(value))
 
     def show_settings(self, container_widget):
+        # imported here so that the parser can be used without a display
+        from PyQt5 import QtWidgets
+
         options_box = QtWidgets.QWidget()
         options_layout = QtWidgets.QHBoxLayout(options_box) 
         options_layout.setContentsMargins(0, 0, 0, 0)
@@ -110,19 +79,45 @@ class StringParser(Parser):
         self._encoding_combobox.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Minimum)
         options_layout.addWidget(self._encoding_combobox)
         self._encoding_combobox.addItems(["utf-8", "ascii", "utf-16", "utf-32"])
+        self._encoding_combobox.setCurrentText(self._encoding)
+        # parsing runs outside of the GUI thread, so the widget is not read there
+        self._encoding_combobox.currentTextChanged.connect(self._set_encoding)
 
         return True
 
+    def get_settings(self):
+        return {"encoding": self._encoding}
+
+    def _set_encoding(self, encoding):
+        self._encoding = encoding
+        self._settings_changed()
+
     @staticmethod
     def get_ui_name():
         return "String"
 
 class ParsedDataString(ParsedData):
+    # the data is a `TextDocument`, which decodes the text in chunks
     def __init__(self, raw_value):
-        if isinstance(raw_value, str):
+        if isinstance(raw_value, TextDocument):
             self._value = raw_value
         else:
-            self._value = str(raw_value)
+            self._value = TextDocument(raw_value if isinstance(raw_value, str) else str(raw_value))
         
     def get_data(self):
-        return self._value
\ No newline at end of file
+        return self._value
+
+    def get_text(self):
+        # decodes the whole text, only meant for small texts
+        return "".join(self._value.iter_text())
+
+    def get_nbytes(self):
+        return self._value.get_nbytes()
+
+    def get_file_extension(self):
+        return ".txt"
+
+    def save(self, file_name):
+        with open(file_name, "w", encoding="utf-8") as f:
+            for text in self._value.iter_text():
+                f.write(text)
\ No newline at end of file
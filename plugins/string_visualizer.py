@@ -0,0 +1,280 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from core.plugins import Visualizer, PluginRegistry
+from core.utils.background_worker import BackgroundWorker
+from plugins.string import ParsedDataString
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+class TextWorker(BackgroundWorker):
+    # indexes the lines of a document and searches it in the background
+    indexed = QtCore.pyqtSignal()
+    found = QtCore.pyqtSignal(object)
+
+    _executor = ThreadPoolExecutor(max_workers=1)
+
+    def __init__(self, document, parent):
+        super(TextWorker, self).__init__(parent)
+        self._document = document
+
+    def start_index(self):
+        self.submit(self._index)
+
+    def start_find(self, text, start_line, start_column, case_sensitive):
+        self.submit(self._find, text, start_line, start_column, case_sensitive)
+
+    def _index(self):
+        if self._document.build_index(self.emit_progress, self.is_cancelled):
+            self.emit_signal(self.indexed)
+
+    def _find(self, text, start_line, start_column, case_sensitive):
+        # the search waits for the index, as it runs in the same thread
+        result = self._document.find(text, start_line, start_column, case_sensitive, self.is_cancelled)
+        # the length of the match is needed to highlight it
+        self.emit_signal(self.found, result + (len(text),) if result is not None else None)
+
+class TextView(QtWidgets.QAbstractScrollArea):
+    # read-only view of a document which only decodes and draws the visible lines
+    # number of characters after which long lines are cut
+    MAX_LINE_LENGTH = 4096
+
+    def __init__(self, document, parent=None):
+        super(TextView, self).__init__(parent)
+        self._document = document
+        self._highlight = None
+        self._text_width = 0
+        # the column the lines are drawn from, so that matches in very long lines can be shown
+        self._first_column = 0
+
+        font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
+        self.setFont(font)
+        self.viewport().setBackgroundRole(QtGui.QPalette.Base)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.update_line_count()
+
+    def _get_line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def _get_visible_line_count(self):
+        return max(1, self.viewport().height() // self._get_line_height())
+
+    def _get_gutter_width(self):
+        return self.fontMetrics().width(str(max(1, self._document.get_line_count()))) + 12
+
+    def update_line_count(self):
+        # the scroll range grows while the document is being indexed
+        self.verticalScrollBar().setRange(0, max(0, self._document.get_line_count() - self._get_visible_line_count()))
+        self.verticalScrollBar().setPageStep(self._get_visible_line_count())
+        self.viewport().update()
+
+    def go_to_line(self, line, column=None, length=0):
+        self.verticalScrollBar().setValue(max(0, line - self._get_visible_line_count() // 3))
+        self._highlight = (line, column, length)
+        if column is None or column + length <= TextView.MAX_LINE_LENGTH:
+            self._first_column = 0
+        elif not self._first_column <= column <= column + length <= self._first_column + TextView.MAX_LINE_LENGTH:
+            # lines are cut after `MAX_LINE_LENGTH` characters, so the match is drawn in the middle
+            self._first_column = max(0, column - TextView.MAX_LINE_LENGTH // 2)
+        if column is not None:
+            x = self.fontMetrics().width(self._get_text(line, column))
+            if not self.horizontalScrollBar().value() <= x < self.horizontalScrollBar().value() + self.viewport().width() - self._get_gutter_width():
+                self.horizontalScrollBar().setValue(max(0, x - self.viewport().width() // 3))
+        self.viewport().update()
+
+    def get_highlight(self):
+        return self._highlight
+
+    def _get_text(self, line, stop_column=None):
+        # the drawn text of a line up to `stop_column`
+        max_length = TextView.MAX_LINE_LENGTH if stop_column is None else max(0, stop_column - self._first_column)
+        return self._document.get_line(line, max_length, self._first_column).expandtabs(4)
+
+    def get_first_visible_line(self):
+        return self.verticalScrollBar().value()
+
+    def resizeEvent(self, event):
+        super(TextView, self).resizeEvent(event)
+        self.update_line_count()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        line_height = self._get_line_height()
+        gutter_width = self._get_gutter_width()
+        first_line = self.verticalScrollBar().value()
+        last_line = min(self._document.get_line_count(), first_line + self._get_visible_line_count() + 1)
+        x_offset = self.horizontalScrollBar().value()
+
+        painter.fillRect(0, 0, gutter_width - 4, self.viewport().height(), self.palette().color(QtGui.QPalette.AlternateBase))
+        text_width = self._text_width
+        for i, line in enumerate(range(first_line, last_line)):
+            y = i * line_height
+            text = self._get_text(line)
+            painter.setClipRect(gutter_width, 0, self.viewport().width(), self.viewport().height())
+            if self._highlight is not None and self._highlight[0] == line:
+                highlight_color = self.palette().color(QtGui.QPalette.Highlight)
+                painter.fillRect(gutter_width, y, self.viewport().width(), line_height, highlight_color.lighter(180))
+                column, length = self._highlight[1:]
+                if column is not None:
+                    x = metrics.width(self._get_text(line, column))
+                    width = metrics.width(self._get_text(line, column + length)) - x
+                    painter.fillRect(gutter_width - x_offset + x, y, width, line_height, highlight_color.lighter(130))
+
+            painter.setPen(self.palette().color(QtGui.QPalette.Text))
+            painter.drawText(gutter_width - x_offset, y + metrics.ascent(), text)
+            text_width = max(text_width, metrics.width(text))
+
+            painter.setClipping(False)
+            painter.setPen(self.palette().color(QtGui.QPalette.Dark))
+            number = str(line + 1)
+            painter.drawText(gutter_width - 8 - metrics.width(number), y + metrics.ascent(), number)
+        painter.end()
+
+        if text_width != self._text_width:
+            # the horizontal range covers the widest line which has been shown so far
+            self._text_width = text_width
+            self.horizontalScrollBar().setRange(0, max(0, text_width - self.viewport().width() + gutter_width))
+            self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+class TextViewer(QtWidgets.QWidget):
+    # the view of a document with the controls to go to a line and to search it
+    def __init__(self, document, parent=None):
+        super(TextViewer, self).__init__(parent)
+        self._document = document
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(QtWidgets.QLabel("Line:"))
+        self._line_edit = QtWidgets.QLineEdit()
+        self._line_edit.setValidator(QtGui.QIntValidator(1, 2 ** 31 - 1, self._line_edit))
+        self._line_edit.setMaximumWidth(100)
+        self._line_edit.returnPressed.connect(self._line_edit_returnPressed)
+        controls.addWidget(self._line_edit)
+
+        self._search_edit = QtWidgets.QLineEdit()
+        self._search_edit.setPlaceholderText("Search")
+        self._search_edit.returnPressed.connect(self._find_next)
+        controls.addWidget(self._search_edit, 1)
+        self._case_checkbox = QtWidgets.QCheckBox("Match case")
+        controls.addWidget(self._case_checkbox)
+        self._find_button = QtWidgets.QPushButton("Find next")
+        self._find_button.clicked.connect(self._find_next)
+        controls.addWidget(self._find_button)
+
+        self._status_label = QtWidgets.QLabel()
+        controls.addWidget(self._status_label)
+        layout.addLayout(controls)
+
+        self._view = TextView(document)
+        layout.addWidget(self._view, 1)
+
+        # the index is kept with the document, so indexing continues where it stopped when
+        # the document is shown again
+        self._worker = TextWorker(document, parent=self)
+        self._worker.progress.connect(self._worker_progress)
+        self._worker.indexed.connect(self._worker_indexed)
+        self._worker.found.connect(self._worker_found)
+        self._worker.failed.connect(self._worker_failed)
+        self._update_status()
+        if not document.is_indexed():
+            self._worker.start_index()
+
+    def _update_status(self):
+        text = "{0:,} lines".format(self._document.get_line_count())
+        if not self._document.is_indexed():
+            text += " (indexing {0:.0%})".format(self._document.get_progress())
+        self._status_label.setText(text)
+
+    def _worker_progress(self, progress):
+        self._view.update_line_count()
+        self._update_status()
+
+    def _worker_indexed(self):
+        self._view.update_line_count()
+        self._update_status()
+
+    def _line_edit_returnPressed(self):
+        line = int(self._line_edit.text()) - 1
+        if 0 <= line < self._document.get_line_count():
+            self._view.go_to_line(line)
+        else:
+            self._status_label.setText("Line {0:,} is not available yet".format(line + 1))
+
+    def _find_next(self):
+        text = self._search_edit.text()
+        if len(text) == 0:
+            return
+
+        # the search continues after the last match, which can be on the same line
+        highlight = self._view.get_highlight()
+        if highlight is not None and highlight[1] is not None:
+            start_line, start_column = highlight[0], highlight[1] + highlight[2]
+        else:
+            start_line, start_column = self._view.get_first_visible_line(), 0
+        self._find_button.setEnabled(False)
+        self._status_label.setText("Searching...")
+        self._worker.start_find(text, start_line, start_column, self._case_checkbox.isChecked())
+
+    def _worker_found(self, result):
+        self._find_button.setEnabled(True)
+        if result is None:
+            self._status_label.setText("No more matches")
+            return
+
+        self._view.go_to_line(*result)
+        self._update_status()
+
+    def _worker_failed(self, error):
+        self._find_button.setEnabled(True)
+        self._status_label.setText("Failed: {0}".format(error))
+
+@PluginRegistry.visualizer
+class StringVisualizer(Visualizer):
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def get_ui_name():
+        return "String"
+
+    @staticmethod
+    def validate_input_format(parsed_data_type):
+        return parsed_data_type == ParsedDataString
+
+    def _show_data(self, container_widget):
+        # only the visible lines are decoded, so large texts do not block the GUI
+        viewer = TextViewer(self._parsed_data.get_data())
+        container_widget.layout().addWidget(viewer, 0,0,1,1)
+        size_policy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        size_policy.setHorizontalStretch(1)
+        size_policy.setVerticalStretch(1)
+        viewer.setSizePolicy(size_policy)
+        viewer.show()
+
+        return True
+
+    def visualize_data(self, parsed_data, container_widget):
+        self._parsed_data = parsed_data
+        self._container_widget = container_widget
+
+        return self._show_data(container_widget)
\ No newline at end of file
@@ -0,0 +1,64 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import h5py
+import numpy as np
+import cli
+from core.adapters.hdf5_adapter import HDF5Adapter
+
+class CommandLineTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "data.h5")
+        with h5py.File(self._file_name, "w") as f:
+            f["values"] = np.zeros((3, 4), dtype=np.float32)
+            f["group/labels"] = np.arange(5)
+        self._environment = mock.patch.dict(os.environ, {"DATA_VIEWER_CACHE_DIR": os.path.join(self._directory, "cache")})
+        self._environment.start()
+        cli.load_registries()
+
+    def tearDown(self):
+        self._environment.stop()
+        shutil.rmtree(self._directory)
+
+    def _run(self, command):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.run([self._file_name], command, workers=1)
+        return output.getvalue().splitlines()
+
+    def test_list_does_not_read(self):
+        with mock.patch.object(HDF5Adapter, "_load_dataset", side_effect=AssertionError("the dataset has been read")):
+            lines = self._run("list")
+        self.assertEqual(lines, ["group\tgroup", "group/labels\t5 int64", "values\t3x4 float32"])
+
+    def test_stats(self):
+        lines = self._run("stats")
+        self.assertIn("values\tshape=3x4 dtype=float32 min=0 max=0 mean=0 std=0 nan=0", lines)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import unittest
+import numpy as np
+from core.utils.decimation import MinMaxPyramid, MinMaxPyramid2D
+from core.utils.lazy_array import LazyArray
+
+def _reduce_brute_force(values, block_size):
+    starts = range(0, len(values), block_size)
+    return (np.array([np.nanmin(values[i:i + block_size]) for i in starts]),
+            np.array([np.nanmax(values[i:i + block_size]) for i in starts]))
+
+class MinMaxPyramidTest(unittest.TestCase):
+    def setUp(self):
+        self._read_size = MinMaxPyramid.READ_SIZE
+
+    def tearDown(self):
+        MinMaxPyramid.READ_SIZE = self._read_size
+
+    def _check_levels(self, values, pyramid):
+        self.assertTrue(pyramid.build())
+        for block_size, minima, maxima in pyramid._levels:
+            expected_minima, expected_maxima = _reduce_brute_force(values, block_size)
+            np.testing.assert_array_equal(minima, expected_minima)
+            np.testing.assert_array_equal(maxima, expected_maxima)
+
+    def _create_signal(self, length, peak):
+        values = np.random.RandomState(0).uniform(-1, 1, length)
+        values[peak] = 10.0
+        return values
+
+    def test_array(self):
+        values = self._create_signal(100003, 50000)
+        self._check_levels(values, MinMaxPyramid(values))
+
+    def test_chunks_not_aligned_to_blocks(self):
+        # reads of 1000 samples, which do not end at a block boundary
+        MinMaxPyramid.READ_SIZE = 1000 * 8
+        values = self._create_signal(200000, 150000)
+        pyramid = MinMaxPyramid(LazyArray(lambda selection: values[selection], values.shape, values.dtype, chunks=(1000,)))
+        self._check_levels(values, pyramid)
+        self.assertEqual(len(pyramid._levels[0][1]), 12500)
+        self.assertEqual(np.argmax(pyramid._levels[0][2]), 150000 // MinMaxPyramid.BASE_BLOCK)
+
+    def test_chunks_larger_than_reads(self):
+        MinMaxPyramid.READ_SIZE = 500 * 8
+        values = self._create_signal(123457, 98765)
+        pyramid = MinMaxPyramid(LazyArray(lambda selection: values[selection], values.shape, values.dtype, chunks=(999,)))
+        self._check_levels(values, pyramid)
+
+    def test_envelope_peak(self):
+        values = self._create_signal(1000000, 654321)
+        pyramid = MinMaxPyramid(values)
+        self.assertTrue(pyramid.build())
+        positions, minima, maxima = pyramid.get_envelope(0, len(values), 100)
+        column = np.argmax(maxima)
+        self.assertEqual(maxima[column], 10.0)
+        # the peak lies within the samples of its column
+        self.assertLessEqual(abs(positions[column] - 654321), len(values) / 100)
+
+def _reduce_tiles_brute_force(values, row_block, column_block):
+    rows = range(0, values.shape[0], row_block)
+    columns = range(0, values.shape[1], column_block)
+    return (np.array([[np.nanmin(values[i:i + row_block, j:j + column_block]) for j in columns] for i in rows]),
+            np.array([[np.nanmax(values[i:i + row_block, j:j + column_block]) for j in columns] for i in rows]))
+
+class MinMaxPyramid2DTest(unittest.TestCase):
+    def setUp(self):
+        self._read_size = MinMaxPyramid2D.READ_SIZE
+        self._min_size = MinMaxPyramid2D.MIN_SIZE
+        # several levels already for small arrays
+        MinMaxPyramid2D.MIN_SIZE = 32
+
+    def tearDown(self):
+        MinMaxPyramid2D.READ_SIZE = self._read_size
+        MinMaxPyramid2D.MIN_SIZE = self._min_size
+
+    def _create_image(self, shape, peak):
+        values = np.random.RandomState(0).uniform(-1, 1, shape)
+        values[peak] = 10.0
+        return values
+
+    def _check_levels(self, values, pyramid):
+        self.assertTrue(pyramid.build())
+        self.assertGreater(len(pyramid._levels), 1)
+        for row_block, column_block, minima, maxima in pyramid._levels:
+            expected_minima, expected_maxima = _reduce_tiles_brute_force(values, row_block, column_block)
+            np.testing.assert_array_equal(minima, expected_minima)
+            np.testing.assert_array_equal(maxima, expected_maxima)
+
+    def test_array(self):
+        values = self._create_image((403, 217), (300, 100))
+        self._check_levels(values, MinMaxPyramid2D(values))
+
+    def test_tiled_reads(self):
+        # reads of a few rows and columns, which do not line up with the chunks
+        MinMaxPyramid2D.READ_SIZE = 40 * 40 * 8
+        values = self._create_image((301, 299), (177, 155))
+        pyramid = MinMaxPyramid2D(LazyArray(lambda selection: values[selection], values.shape, values.dtype, chunks=(30, 70)))
+        self._check_levels(values, pyramid)
+
+    def test_narrow_array(self):
+        # the narrow axis is not reduced
+        values = self._create_image((1000, 3), (432, 1))
+        pyramid = MinMaxPyramid2D(values)
+        self._check_levels(values, pyramid)
+        self.assertTrue(all(column_block == 1 for _, column_block, _, _ in pyramid._levels))
+        minima, maxima = pyramid.get_tiles((0, 1000), (0, 3), 100, 300)
+        self.assertEqual(maxima.shape[1], 3)
+        self.assertEqual(maxima.max(), 10.0)
+
+    def test_tiles_keep_peak(self):
+        values = self._create_image((4000, 3000), (2345, 1234))
+        pyramid = MinMaxPyramid2D(values)
+        self.assertTrue(pyramid.build())
+        minima, maxima = pyramid.get_tiles((0, 4000), (0, 3000), 300, 200)
+        self.assertLessEqual(maxima.shape[0], 300)
+        self.assertLessEqual(maxima.shape[1], 200)
+        self.assertEqual(maxima.max(), 10.0)
+        self.assertEqual(minima.min(), values.min())
+
+        # zoomed in, the values themselves
+        minima, maxima = pyramid.get_tiles((2340, 2350), (1230, 1240), 300, 200)
+        np.testing.assert_array_equal(maxima, values[2340:2350, 1230:1240])
+
+    def test_small_array(self):
+        values = self._create_image((20, 30), (5, 5))
+        pyramid = MinMaxPyramid2D(values)
+        self.assertTrue(pyramid.build())
+        self.assertTrue(pyramid.is_built())
+        _, maxima = pyramid.get_tiles((0, 20), (0, 30), 100, 100)
+        np.testing.assert_array_equal(maxima, values)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,59 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import unittest
+import numpy as np
+from core.utils.image_normalization import NORMALIZATION_MIN_MAX, NORMALIZATION_PERCENTILE, estimate_range, to_uint8
+
+class ImageNormalizationTest(unittest.TestCase):
+    def _create_image(self):
+        return np.linspace(0, 1, 64 * 64, dtype=np.float32).reshape(64, 64)
+
+    def test_min_max(self):
+        output = to_uint8(self._create_image(), NORMALIZATION_MIN_MAX)
+        self.assertEqual(output.dtype, np.uint8)
+        self.assertEqual(output.min(), 0)
+        self.assertEqual(output.max(), 255)
+
+    def test_infinite_pixels(self):
+        image = self._create_image()
+        image[0, 0] = np.inf
+        image[1, 1] = -np.inf
+        image[2, 2] = np.nan
+        self.assertEqual(estimate_range(image, NORMALIZATION_MIN_MAX), (image[0, 1], 1.0))
+        for normalization in [NORMALIZATION_MIN_MAX, NORMALIZATION_PERCENTILE]:
+            output = to_uint8(image, normalization)
+            self.assertEqual(output.max(), 255)
+            self.assertEqual(output[0, 0], 255)
+            self.assertEqual(output[1, 1], 0)
+            self.assertEqual(output[2, 2], 0)
+
+    def test_constant_image_with_infinity(self):
+        image = np.ones((8, 8), dtype=np.float64)
+        image[0, 0] = np.inf
+        output = to_uint8(image, NORMALIZATION_MIN_MAX)
+        self.assertEqual(output.max(), 0)
+
+    def test_no_finite_pixels(self):
+        image = np.full((8, 8), np.inf)
+        np.testing.assert_array_equal(to_uint8(image, NORMALIZATION_MIN_MAX), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import unittest
+from core.utils.lru_cache import LRUCache
+
+class LRUCacheTest(unittest.TestCase):
+    def _create_cache(self, max_bytes):
+        return LRUCache(max_bytes, lambda value: len(value))
+
+    def test_eviction_by_bytes(self):
+        cache = self._create_cache(10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        self.assertEqual(cache.get_size(), 8)
+        cache.put("c", b"1234")
+        # the least recently used entry is evicted
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.get_size(), 8)
+
+    def test_recently_used_entries_are_kept(self):
+        cache = self._create_cache(10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    def test_replace(self):
+        cache = self._create_cache(10)
+        cache.put("a", b"1234")
+        cache.put("a", b"12")
+        self.assertEqual(cache.get("a"), b"12")
+        self.assertEqual(cache.get_size(), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_too_large(self):
+        cache = self._create_cache(10)
+        cache.put("a", b"1234")
+        self.assertFalse(cache.put("b", b"12345678901"))
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+
+    def test_hits_and_misses(self):
+        cache = self._create_cache(10)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("a", b""), b"")
+        cache.put("a", b"1")
+        cache.get("a")
+        # checking whether an entry exists is neither a hit nor a miss
+        self.assertIn("a", cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_clear(self):
+        cache = self._create_cache(10)
+        cache.put("a", b"1234")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_size(), 0)
+
+    def test_default_size(self):
+        # without a size function every entry counts as one
+        cache = LRUCache(2)
+        for key in "abc":
+            cache.put(key, key)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from core.utils.metadata_cache import MetadataCache
+
+class MetadataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "data.bin")
+        with open(self._file_name, "wb") as f:
+            f.write(b"data")
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_put_get(self):
+        cache = MetadataCache(os.path.join(self._directory, "cache"))
+        os.makedirs(os.path.join(self._directory, "cache"))
+        cache.put(self._file_name, "tree", [1, 2, 3])
+        self.assertEqual(cache.get(self._file_name, "tree"), [1, 2, 3])
+        self.assertIsNone(cache.get(self._file_name, "other"))
+
+    def test_modified_file(self):
+        cache = MetadataCache(self._directory)
+        cache.put(self._file_name, "tree", [1, 2, 3])
+        with open(self._file_name, "ab") as f:
+            f.write(b"more data")
+        self.assertIsNone(cache.get(self._file_name, "tree"))
+
+    def test_broken_pickle(self):
+        cache = MetadataCache(self._directory)
+        cache.put(self._file_name, "tree", [1, 2, 3])
+        with open(cache._get_file_name(self._file_name, "tree"), "rb") as f:
+            data = f.read()
+        with open(cache._get_file_name(self._file_name, "tree"), "wb") as f:
+            f.write(data[:len(data) // 2])
+        self.assertIsNone(cache.get(self._file_name, "tree"))
+
+        # e.g. a class which does not exist any more
+        with mock.patch("pickle.load", side_effect=AttributeError):
+            self.assertIsNone(cache.get(self._file_name, "tree"))
+
+    def test_unwritable_directory(self):
+        with mock.patch.dict(os.environ, {"DATA_VIEWER_CACHE_DIR": os.path.join(self._file_name, "cache")}):
+            cache = MetadataCache()
+        self.assertIsNone(cache.get(self._file_name, "tree"))
+        cache.put(self._file_name, "tree", [1, 2, 3])
+        self.assertIsNone(cache.get(self._file_name, "tree"))
+
+if __name__ == "__main__":
+    unittest.main()
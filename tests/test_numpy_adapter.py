@@ -0,0 +1,139 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import numpy as np
+from core.adapters.adapter_base import LazyDataItem
+from core.adapters.numpy_adapter import NumpyAdapter, RawBinaryAdapter
+
+class NumpyAdapterTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _write(self, array, version):
+        file_name = os.path.join(self._directory, "array.npy")
+        with open(file_name, "wb") as f:
+            np.lib.format.write_array(f, array, version=version)
+        return file_name
+
+    def _open(self, file_name):
+        adapter = NumpyAdapter()
+        self.assertTrue(adapter.open_file(file_name))
+        self.addCleanup(adapter.close_file)
+        return adapter.get_treeview_items()
+
+    def test_versions(self):
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+        for version in [(1, 0), (2, 0), (3, 0)]:
+            items = self._open(self._write(array, version))
+            self.assertEqual(items[0].name, "array")
+            np.testing.assert_array_equal(items[0].data, array)
+
+    def test_utf8_header(self):
+        # the field names of version 3.0 headers are utf-8, which version 2.0 would decode as latin-1
+        array = np.array([(1.5, 2)], dtype=[("温度", "<f4"), ("größe", "<i8")])
+        data = self._open(self._write(array, (3, 0)))[0].data
+        self.assertEqual(data.dtype.names, ("温度", "größe"))
+        np.testing.assert_array_equal(data, array)
+
+    def test_fortran_order(self):
+        array = np.asfortranarray(np.arange(12, dtype=np.int16).reshape(3, 4))
+        for version in [(1, 0), (3, 0)]:
+            data = self._open(self._write(array, version))[0].data
+            self.assertTrue(data.flags.f_contiguous)
+            np.testing.assert_array_equal(data, array)
+
+    def test_unsupported_version(self):
+        file_name = self._write(np.zeros(3), (1, 0))
+        with open(file_name, "r+b") as f:
+            f.seek(6)
+            f.write(b"\x04\x00")
+        self.assertFalse(NumpyAdapter().open_file(file_name))
+
+    def test_npz(self):
+        file_name = os.path.join(self._directory, "arrays.npz")
+        np.savez(file_name, values=np.arange(5), matrix=np.eye(3))
+        with zipfile.ZipFile(file_name, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open("packed.npy", "w") as f:
+                np.lib.format.write_array(f, np.arange(4, dtype=np.uint8))
+
+        items = {item.name: item for item in self._open(file_name)}
+        np.testing.assert_array_equal(items["values"].data, np.arange(5))
+        np.testing.assert_array_equal(items["matrix"].data, np.eye(3))
+        # compressed members cannot be mapped
+        self.assertIsInstance(items["packed"], LazyDataItem)
+        np.testing.assert_array_equal(items["packed"].data, np.arange(4, dtype=np.uint8))
+
+    def test_objects(self):
+        file_name = self._write(np.array([None, "text"], dtype=object), (1, 0))
+        item = self._open(file_name)[0]
+        self.assertIsInstance(item, LazyDataItem)
+        with self.assertRaises(ValueError):
+            item.data
+
+class RawBinaryAdapterTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "dump.raw")
+        self._array = np.arange(24, dtype=np.float32)
+        with open(self._file_name, "wb") as f:
+            f.write(b"header..")
+            f.write(self._array.tobytes())
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _open(self, layout):
+        adapter = RawBinaryAdapter()
+        adapter.set_layout(*RawBinaryAdapter.parse_layout(layout))
+        self.assertTrue(adapter.open_file(self._file_name))
+        self.addCleanup(adapter.close_file)
+        return adapter.get_treeview_items()[0].data
+
+    def test_parse_layout(self):
+        self.assertEqual(RawBinaryAdapter.parse_layout("float32, 1024x768, 128"), (np.dtype(np.float32), (1024, 768), 128))
+        self.assertEqual(RawBinaryAdapter.parse_layout("uint8"), (np.dtype(np.uint8), None, 0))
+        self.assertEqual(RawBinaryAdapter.parse_layout(" int16 , 4X-1 "), (np.dtype(np.int16), (4, -1), 0))
+
+    def test_bad_layout(self):
+        for layout in ["", "unknown", "float32, 4xa", "float32, 4, 1, 2", "float32, -1x-1", "float32, 4x-2", "float32, 4, -8"]:
+            with self.assertRaises(ValueError, msg=layout):
+                RawBinaryAdapter.parse_layout(layout)
+
+    def test_layout(self):
+        np.testing.assert_array_equal(self._open("float32, 4x6, 8"), self._array.reshape(4, 6))
+        np.testing.assert_array_equal(self._open("float32, 2x-1x3, 8"), self._array.reshape(2, 4, 3))
+        # without a shape the whole file is a vector
+        np.testing.assert_array_equal(self._open("float32, , 8"), self._array)
+
+    def test_too_large_layout(self):
+        adapter = RawBinaryAdapter()
+        adapter.set_layout(np.float32, (5, 6), 8)
+        self.assertFalse(adapter.open_file(self._file_name))
+
+if __name__ == "__main__":
+    unittest.main()
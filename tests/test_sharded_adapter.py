@@ -0,0 +1,85 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import unittest
+import h5py
+import numpy as np
+from core.adapters.adapter_registry import AdapterRegistry
+from core.adapters.sharded_adapter import ShardedAdapter
+from core.utils.tfrecord import TFRecordWriter, encode_example
+
+_ADAPTER_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core", "adapters")
+
+class ShardedAdapterTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _create_file(self, name):
+        file_name = os.path.join(self._directory, name)
+        with open(file_name, "wb") as f:
+            f.write(b"\x00" * 16)
+        return file_name
+
+    def test_bracketed_file_name(self):
+        # an existing file is not mistaken for a glob pattern
+        file_name = self._create_file("data[1].h5")
+        self.assertFalse(ShardedAdapter.can_open_file(file_name))
+
+    def test_glob_pattern(self):
+        self._create_file("data-0.h5")
+        self._create_file("data-1.h5")
+        pattern = os.path.join(self._directory, "data-*.h5")
+        self.assertTrue(ShardedAdapter.can_open_file(pattern))
+        self.assertEqual(len(ShardedAdapter.get_shard_file_names(pattern)), 2)
+
+    def test_directory(self):
+        self.assertTrue(ShardedAdapter.can_open_file(self._directory))
+
+    def _create_tfrecord(self, name, examples):
+        with TFRecordWriter(os.path.join(self._directory, name)) as writer:
+            for i in range(examples):
+                writer.write(encode_example({"label": np.array([i])}))
+
+    def test_mixed_formats(self):
+        AdapterRegistry.load_adapters(_ADAPTER_DIRECTORY)
+        with h5py.File(os.path.join(self._directory, "a.h5"), "w") as f:
+            for name in "xyz":
+                f[name] = np.arange(4)
+        self._create_tfrecord("b.tfrecord", 2)
+        self._create_tfrecord("c.tfrecord", 3)
+
+        adapter = ShardedAdapter()
+        self.assertTrue(adapter.open_file(self._directory))
+        try:
+            items = adapter.get_treeview_items()
+            # the HDF5 file is a group, its items do not count towards the numbers of the examples
+            self.assertEqual([items[i].name for i in range(len(items))],
+                             ["a.h5"] + ["Example #{0}".format(i) for i in range(5)])
+        finally:
+            adapter.close_file()
+
+if __name__ == "__main__":
+    unittest.main()
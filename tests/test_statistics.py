@@ -0,0 +1,95 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from core.utils.lazy_array import LazyArray
+from core.utils import statistics
+from core.utils.statistics import StatisticsCache, compute_statistics
+
+class ComputeStatisticsTest(unittest.TestCase):
+    def test_moments(self):
+        values = np.random.RandomState(0).normal(3.0, 2.0, (1000, 37))
+        values[5, 5] = np.nan
+        values[6, 6] = np.inf
+        with mock.patch.object(statistics, "BLOCK_SIZE", 37 * 8 * 64):
+            result = compute_statistics(values)
+        finite = values[np.isfinite(values)]
+        self.assertEqual(result["count"], finite.size)
+        self.assertEqual((result["nan"], result["posinf"], result["neginf"]), (1, 1, 0))
+        self.assertAlmostEqual(result["mean"], finite.mean())
+        self.assertAlmostEqual(result["std"], finite.std())
+        self.assertEqual(result["min"], finite.min())
+        self.assertEqual(result["max"], finite.max())
+        self.assertEqual(result["histogram"].sum() + result["below_range"] + result["above_range"], finite.size)
+
+class StatisticsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "data.bin")
+        with open(self._file_name, "wb") as f:
+            f.write(b"data")
+        self._environment = mock.patch.dict(os.environ, {"DATA_VIEWER_CACHE_DIR": os.path.join(self._directory, "cache")})
+        self._environment.start()
+        StatisticsCache._results.clear()
+        StatisticsCache._array_results.clear()
+
+    def tearDown(self):
+        self._environment.stop()
+        StatisticsCache._results.clear()
+        StatisticsCache._array_results.clear()
+        shutil.rmtree(self._directory)
+
+    def _create_dataset(self, values):
+        return LazyArray(lambda selection: values[selection], values.shape, values.dtype, source=(self._file_name, "/values"))
+
+    def test_dataset(self):
+        values = np.arange(100, dtype=np.float64)
+        StatisticsCache.put(self._create_dataset(values), {"count": 100})
+        # the entry holds neither the array nor its handle
+        for entry in StatisticsCache._results._entries.values():
+            self.assertEqual(entry[0], {"count": 100})
+        # another handle of the same dataset
+        self.assertEqual(StatisticsCache.get(self._create_dataset(values)), {"count": 100})
+
+        with open(self._file_name, "ab") as f:
+            f.write(b"more data")
+        self.assertIsNone(StatisticsCache.get(self._create_dataset(values)))
+
+    def test_array(self):
+        values = np.arange(100, dtype=np.float64)
+        StatisticsCache.put(values, {"count": 100})
+        self.assertEqual(StatisticsCache.get(values), {"count": 100})
+        self.assertIsNone(StatisticsCache.get(values.copy()))
+
+    def test_array_bytes(self):
+        arrays = [np.zeros(statistics.CACHED_ARRAY_BYTES // 8 // 2, dtype=np.float64) for _ in range(3)]
+        for array in arrays:
+            StatisticsCache.put(array, {"count": len(array)})
+        self.assertLessEqual(StatisticsCache._array_results.get_size(), statistics.CACHED_ARRAY_BYTES)
+        self.assertIsNone(StatisticsCache.get(arrays[0]))
+        self.assertIsNotNone(StatisticsCache.get(arrays[2]))
+
+if __name__ == "__main__":
+    unittest.main()
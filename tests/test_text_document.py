@@ -0,0 +1,64 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import unittest
+from unittest import mock
+from core.utils.text_document import TextDocument
+
+class TextDocumentTest(unittest.TestCase):
+    def _create_document(self, source, chunk_size):
+        with mock.patch.object(TextDocument, "CHUNK_SIZE", chunk_size):
+            document = TextDocument(source)
+            self.assertTrue(document.build_index())
+        return document
+
+    def test_lines(self):
+        text = "first line\nsecond line\r\n\nlast line"
+        document = self._create_document(text.encode("utf-8"), 4)
+        self.assertEqual(document.get_line_count(), 4)
+        self.assertEqual([document.get_line(i) for i in range(4)], ["first line", "second line", "", "last line"])
+        self.assertEqual(document.get_line(1, 3, 7), "lin")
+
+    def test_character_across_chunks(self):
+        # every chunk boundary lies within one of the multi-byte characters
+        text = "aé€😀\n" * 100
+        source = text.encode("utf-8")
+        for chunk_size in [2, 3, 5, 7]:
+            document = self._create_document(source, chunk_size)
+            self.assertEqual(document.get_line_count(), 101)
+            self.assertEqual(document.get_line(57), "aé€😀")
+            self.assertEqual("".join(document.iter_text()), text)
+
+    def test_find_on_one_line(self):
+        document = self._create_document("x ab ab\nab", 3)
+        self.assertEqual(document.find("ab"), (0, 2))
+        self.assertEqual(document.find("ab", 0, 3), (0, 5))
+        self.assertEqual(document.find("ab", 0, 6), (1, 0))
+        self.assertIsNone(document.find("ab", 1, 1))
+
+    def test_find_case(self):
+        # lowering 'İ' gives two characters, which must not shift the columns
+        document = self._create_document("İİİ Needle needle", 4)
+        self.assertEqual(document.find("needle"), (0, 4))
+        self.assertEqual(document.find("needle", case_sensitive=True), (0, 11))
+        self.assertEqual(document.find("İ", 0, 1), (0, 1))
+
+if __name__ == "__main__":
+    unittest.main()
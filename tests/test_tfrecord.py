@@ -0,0 +1,169 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from core.utils import tfrecord
+from core.utils.handle_pool import HandlePool
+from core.utils.tfrecord import (TFRecord, TFRecordWriter, _crc32c_python, _crc32c_vectorized, _encode_field, _encode_varint,
+                                 decode_example, encode_example)
+
+try:
+    import crc32c as crc32c_module
+except ImportError:
+    crc32c_module = None
+
+def _encode_raw_example(features):
+    # an example whose features are given as already encoded `Feature` messages
+    entries = b"".join(_encode_field(1, _encode_field(1, name.encode("utf-8")) + _encode_field(2, feature))
+                       for name, feature in features.items())
+    return _encode_field(1, entries)
+
+class ExampleTest(unittest.TestCase):
+    def test_round_trip(self):
+        features = {"image": [b"\xff\xd8\x00", b""], "label": np.array([3, -1, 0, 300, 2 ** 63 - 1, -2 ** 63], dtype=np.int64),
+                    "score": np.array([0.5, -1.25, np.inf], dtype=np.float32), "name": "example"}
+        decoded = decode_example(encode_example(features))
+        self.assertEqual(sorted(decoded), sorted(features))
+        self.assertEqual(decoded["image"], [b"\xff\xd8\x00", b""])
+        self.assertEqual(decoded["name"], [b"example"])
+        np.testing.assert_array_equal(decoded["label"], features["label"])
+        self.assertEqual(decoded["label"].dtype, np.int64)
+        np.testing.assert_array_equal(decoded["score"], features["score"])
+        self.assertEqual(decoded["score"].dtype, np.float32)
+
+    def test_empty_features(self):
+        decoded = decode_example(encode_example({"bytes": [], "floats": np.zeros(0, dtype=np.float32), "ints": np.zeros(0, dtype=np.int64)}))
+        self.assertEqual(decoded["bytes"], [])
+        self.assertEqual(decoded["floats"].shape, (0,))
+        self.assertEqual(decoded["ints"].shape, (0,))
+        self.assertEqual(decode_example(encode_example({})), {})
+
+    def test_single_byte_varints(self):
+        values = np.arange(128, dtype=np.int64)
+        np.testing.assert_array_equal(decode_example(encode_example({"ints": values}))["ints"], values)
+
+    def test_unpacked_int64(self):
+        values = [5, -7, 1 << 40]
+        unpacked = b"".join(_encode_varint((1 << 3) | 0) + _encode_varint(x) for x in values)
+        decoded = decode_example(_encode_raw_example({"ints": _encode_field(3, unpacked)}))
+        np.testing.assert_array_equal(decoded["ints"], values)
+
+    def test_unpacked_float(self):
+        values = np.array([1.5, -2.0], dtype="<f4")
+        unpacked = b"".join(_encode_varint((1 << 3) | 5) + x.tobytes() for x in values)
+        decoded = decode_example(_encode_raw_example({"floats": _encode_field(2, unpacked)}))
+        np.testing.assert_array_equal(decoded["floats"], values)
+
+    def test_packed_and_unpacked(self):
+        # parsers have to accept both encodings of a repeated field, even mixed
+        packed = _encode_field(1, b"".join(_encode_varint(x) for x in [1, 2]))
+        unpacked = _encode_varint((1 << 3) | 0) + _encode_varint(-3)
+        decoded = decode_example(_encode_raw_example({"ints": _encode_field(3, packed + unpacked + packed)}))
+        np.testing.assert_array_equal(decoded["ints"], [1, 2, -3, 1, 2])
+
+    def test_truncated(self):
+        packed = _encode_field(1, _encode_varint(300)[:1])
+        with self.assertRaises(ValueError):
+            decode_example(_encode_raw_example({"ints": _encode_field(3, packed)}))
+
+class CRC32CTest(unittest.TestCase):
+    # test vectors of RFC 3720, B.4
+    VECTORS = [(bytes(32), 0x8A9136AA), (b"\xff" * 32, 0x62A8AB43), (bytes(range(32)), 0x46DD794E),
+               (bytes(range(31, -1, -1)), 0x113FDB5C), (b"123456789", 0xE3069283)]
+
+    def test_vectors(self):
+        for data, expected in CRC32CTest.VECTORS:
+            self.assertEqual(_crc32c_python(data), expected)
+            self.assertEqual(_crc32c_vectorized(data, 0xFFFFFFFF) ^ 0xFFFFFFFF, expected)
+
+    def test_masked(self):
+        self.assertEqual(tfrecord.masked_crc32c(b""), 0xA282EAD8)
+
+    @unittest.skipIf(crc32c_module is None, "the crc32c package is not installed")
+    def test_chunk_boundaries(self):
+        data = np.random.RandomState(0).randint(0, 256, 70000).astype(np.uint8).tobytes()
+        block_size = tfrecord._CRC32C_BLOCK_SIZE
+        minimum_size = tfrecord._CRC32C_VECTOR_MIN_SIZE
+        for length in [0, 1, 4, block_size - 1, block_size, block_size + 1, minimum_size - 1, minimum_size, minimum_size + 1,
+                       3 * block_size + 5, 4096, 4097, 65535, len(data)]:
+            self.assertEqual(_crc32c_python(data[:length]), crc32c_module.crc32c(data[:length]), length)
+
+    @unittest.skipIf(crc32c_module is None, "the crc32c package is not installed")
+    def test_continuation(self):
+        data = np.random.RandomState(1).randint(0, 256, 5000).astype(np.uint8).tobytes()
+        for split in [3, 700, 4999]:
+            crc = _crc32c_python(data[split:], _crc32c_python(data[:split]))
+            self.assertEqual(crc, crc32c_module.crc32c(data))
+
+class TFRecordTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _write(self, name, count):
+        file_name = os.path.join(self._directory, name)
+        with TFRecordWriter(file_name) as writer:
+            for i in range(count):
+                writer.write(encode_example({"index": np.array([i], dtype=np.int64)}))
+        return file_name
+
+    def test_read_after_release(self):
+        record = TFRecord(self._write("a.tfrecord", 3), verify=True)
+        record.release()
+        self.assertEqual(record[2]["index"].tolist(), [2])
+        record.close()
+
+    def test_read_after_close(self):
+        # unlike a released file, a closed file is not opened again
+        record = TFRecord(self._write("a.tfrecord", 3))
+        record.close()
+        with self.assertRaises(IOError):
+            record.read_record(0)
+        with self.assertRaises(IOError):
+            for _ in record.iter_index():
+                pass
+
+    def test_release_during_scan(self):
+        # the handle pool only keeps one file open, so the scanned file gets released whenever
+        # the other file is read between the batches
+        pool = HandlePool(1)
+        first = TFRecord(self._write("a.tfrecord", 50), build_index=False, handle_pool=pool, verify=True)
+        second = TFRecord(self._write("b.tfrecord", 5), handle_pool=pool)
+        counts = []
+        for count, _ in first.iter_index(batch_size=8):
+            counts.append(count)
+            self.assertEqual(second[count % 5]["index"].tolist(), [count % 5])
+            # the records which have been indexed so far can be read
+            self.assertEqual(first[count - 1]["index"].tolist(), [count - 1])
+        self.assertEqual(counts, [8, 16, 24, 32, 40, 48, 50])
+        self.assertTrue(first.has_index())
+        self.assertEqual([example["index"][0] for example in first], list(range(50)))
+        first.close()
+        second.close()
+        self.assertEqual(len(pool), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from core.utils.thumbnail import ThumbnailDiskCache
+
+class ThumbnailDiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        # the same image for every key, so that all files have the same size
+        self._image = np.random.RandomState(0).randint(0, 256, (32, 32, 3)).astype(np.uint8)
+        self._file_size = len(cv2.imencode(".png", self._image)[1])
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _put(self, cache, key, time):
+        cache.put(key, self._image)
+        file_name = cache._get_file_name(key)
+        if os.path.exists(file_name):
+            os.utime(file_name, (time, time))
+
+    def test_put_get(self):
+        cache = ThumbnailDiskCache(self._directory)
+        cache.put(("file", "image"), self._image)
+        np.testing.assert_array_equal(cache.get(("file", "image")), self._image)
+        self.assertIsNone(cache.get(("file", "other")))
+
+    def test_prune(self):
+        cache = ThumbnailDiskCache(self._directory, max_bytes=int(4.5 * self._file_size))
+        for i in range(4):
+            self._put(cache, i, i + 1)
+        # reading a thumbnail makes it the most recently used one
+        self.assertIsNotNone(cache.get(0))
+
+        # 5 files exceed the size, the oldest ones are deleted until 3 of them are left
+        self._put(cache, 4, 10 ** 10)
+        self.assertIsNotNone(cache.get(0))
+        self.assertIsNone(cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(3))
+        self.assertIsNotNone(cache.get(4))
+        self.assertEqual(sum(size for _, _, size in cache._list_files()), 3 * self._file_size)
+
+    def test_existing_files(self):
+        # files of an earlier session count towards the size
+        cache = ThumbnailDiskCache(self._directory)
+        for i in range(4):
+            self._put(cache, i, i + 1)
+
+        cache = ThumbnailDiskCache(self._directory, max_bytes=int(4.5 * self._file_size))
+        self._put(cache, 4, 10 ** 10)
+        self.assertIsNone(cache.get(0))
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(4))
+
+    def test_no_directory(self):
+        cache = ThumbnailDiskCache(os.path.join(self._directory, "file"))
+        with open(os.path.join(self._directory, "file"), "wb") as f:
+            f.write(b"data")
+        # a directory which cannot be created disables the cache
+        cache.put("key", self._image)
+        self.assertIsNone(cache.get("key"))
+
+if __name__ == "__main__":
+    unittest.main()
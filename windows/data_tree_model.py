@@ -0,0 +1,152 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from PyQt5 import QtCore
+from core.adapters.item_collection import ItemBatches
+
+class _TreeNode(object):
+    __slots__ = ("item", "parent", "row", "children", "_child_items")
+
+    def __init__(self, item, parent, row, child_items=None):
+        self.item = item
+        self.parent = parent
+        self.row = row
+        # nodes of the children which have already been fetched by the view
+        self.children = []
+        self._child_items = child_items
+
+    def get_child_items(self):
+        if self._child_items is None:
+            self._child_items = self.item.children
+        return self._child_items
+
+    def get_path(self):
+        path = []
+        node = self
+        while node.item is not None:
+            path.append(node.item.name)
+            node = node.parent
+        return tuple(reversed(path))
+
+class DataTreeModel(QtCore.QAbstractItemModel):
+    # number of rows which are created each time the view asks for more
+    FETCH_BATCH_SIZE = 256
+
+    def __init__(self, items=None, parent=None):
+        super(DataTreeModel, self).__init__(parent)
+        self._root = _TreeNode(None, None, 0, ItemBatches(items if items is not None else []))
+
+    def set_items(self, items):
+        self.beginResetModel()
+        self._root = _TreeNode(None, None, 0, ItemBatches(items))
+        self.endResetModel()
+
+    def append_items(self, items):
+        # adds top level items while a file is still being read
+        self._root.get_child_items().append(items)
+
+        # the view only asks for more rows once it has been scrolled to the end
+        if len(self._root.children) < self.FETCH_BATCH_SIZE and self.canFetchMore(QtCore.QModelIndex()):
+            self.fetchMore(QtCore.QModelIndex())
+
+    def _get_node(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def get_item(self, index):
+        if not index.isValid():
+            return None
+        return index.internalPointer().item
+
+    def get_path(self, index):
+        if not index.isValid():
+            return ()
+        return index.internalPointer().get_path()
+
+    def get_child_items(self, index):
+        # all children of the item, including the ones which have not been fetched yet
+        return self._get_node(index).get_child_items()
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+
+        return self.createIndex(row, column, self._get_node(parent).children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        node = index.internalPointer().parent
+        if node is None or node is self._root:
+            return QtCore.QModelIndex()
+
+        return self.createIndex(node.row, 0, node)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._get_node(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self._get_node(parent)
+        if node.children:
+            return True
+        if node is self._root:
+            return len(node.get_child_items()) > 0
+
+        # ask the item so that its children do not have to be loaded yet
+        return node.item.has_children()
+
+    def canFetchMore(self, parent):
+        node = self._get_node(parent)
+        return len(node.children) < len(node.get_child_items())
+
+    def fetchMore(self, parent):
+        node = self._get_node(parent)
+        child_items = node.get_child_items()
+
+        start = len(node.children)
+        end = min(start + self.FETCH_BATCH_SIZE, len(child_items))
+        if end <= start:
+            return
+
+        self.beginInsertRows(parent, start, end - 1)
+        node.children.extend(_TreeNode(child_items[row], node, row) for row in range(start, end))
+        self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        # only the name is handed to the view, the payload stays in the adapter
+        if role == QtCore.Qt.DisplayRole:
+            return index.internalPointer().item.name
+
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole and section == 0:
+            return "Sample"
+        return None
@@ -21,18 +21,42 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from windows.ui.mainwindow import Ui_MainWindow
 from core.adapters.adapter_registry import AdapterRegistry
+from core.adapters.item_collection import ItemCollection
 from PyQt5.QtWidgets import QMessageBox
-import h5py as h5
 import sys
 import os
 from core.plugins import PluginRegistry
+from windows.data_tree_model import DataTreeModel
+from windows.parse_scheduler import ParseScheduler
+from windows.prefetcher import Prefetcher
+from windows.tree_loader import TreeLoader
+from core.utils.lru_cache import LRUCache
+from core.utils.profiling import PROFILER, format_bytes, get_data_size
 
 class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
+    # upper bound for the memory used by cached parse results
+    PARSED_DATA_CACHE_SIZE = 512 * 1024 * 1024
+    # number of neighbouring items which are parsed ahead of the selection
+    PREFETCH_COUNT = 4
+    # interval of the updates of the performance overlay in milliseconds
+    PERFORMANCE_UPDATE_INTERVAL = 500
+    # spans which are shown by the performance overlay, in the order of a click
+    PERFORMANCE_SPANS = ["open", "tree", "fetch", "parse", "visualize"]
+
     def __init__(self, parent=None):
         super(MainWindow, self).__init__(parent)
         self.setupUi(self)
 
         self._adapter = None
+        self._tree_loader = None
+        self._parsed_data = None
+        # the visualizer which has been picked for each type of parsed data
+        self._visualizer_names = {}
+        self._tree_model = DataTreeModel(parent=self)
+        self.groups_treeView.setModel(self._tree_model)
+        self._parse_scheduler = ParseScheduler(parent=self)
+        self._parsed_data_cache = LRUCache(MainWindow.PARSED_DATA_CACHE_SIZE, lambda parsed_data: parsed_data.get_nbytes())
+        self._prefetcher = Prefetcher(self._parsed_data_cache, MainWindow.PREFETCH_COUNT)
 
         self._setup_ui()
 
@@ -42,19 +66,19 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
-            if len(event.mimeData().urls()) == 1:
-                event.accept()
-            else:
-                event.ignore()
+            event.accept()
         else:
             event.ignore()
 
     def dropEvent(self, event):
+        # several files or a directory are opened as one sharded dataset
         files = [u.toLocalFile() for u in event.mimeData().urls()]
-        self._open_file(files[0])
+        self._open_file(files)
 
     def _switch_parser(self):
         self._current_parser = PluginRegistry.get_parser(self.parserComboBox.currentIndex())()
+        self._current_parser.set_settings_changed_callback(lambda: self._request_parse(self.groups_treeView.currentIndex()))
+        self.actionShowThumbnails.setEnabled(self._current_parser.can_parse_collection())
 
         # clear current settings
         for child in self.parserSettingsGroupBox.children(): 
@@ -68,116 +92,364 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         else:
              self.parserSettingsGroupBox.setVisible(True)
 
-        current_item = self.groups_treeWidget.currentItem()
-        if current_item:
-            data = current_item.data(1, 0)
-            if data is not None:
-                self._parsed_data = self._current_parser.parse(data)
-                visualizer_type = PluginRegistry.get_visualizer(type(self._parsed_data))
-                if visualizer_type is not None:
-                    visualizer_type().visualize_data(self._parsed_data, self.widgetDataContent)
+        self._request_parse(self.groups_treeView.currentIndex())
 
     def _setup_ui(self):
         self.parserComboBox.clear()
-        for plugin in PluginRegistry.get_parsers():
-            parser_name = plugin.get_ui_name()
+        for parser_name in PluginRegistry.get_parser_names():
             self.parserComboBox.addItem(parser_name)
         self.parserComboBox.setCurrentIndex(1)
+
+        # shown while the items of a file are being read
+        self._itemCountLabel = QtWidgets.QLabel()
+        self._loadingProgressBar = QtWidgets.QProgressBar()
+        self._loadingProgressBar.setRange(0, 1000)
+        self._loadingProgressBar.setMaximumWidth(200)
+        self._loadingCancelButton = QtWidgets.QPushButton("Cancel")
+        self.statusBar().addPermanentWidget(self._itemCountLabel)
+        self.statusBar().addPermanentWidget(self._loadingProgressBar)
+        self.statusBar().addPermanentWidget(self._loadingCancelButton)
+        self._set_loading_visible(False)
+
+        # the latest breakdown of the hot paths, only shown while profiling
+        self._performanceLabel = QtWidgets.QLabel()
+        self._performanceLabel.setVisible(False)
+        self.statusBar().addPermanentWidget(self._performanceLabel)
+        self._performanceTimer = QtCore.QTimer(self)
+        self._performanceTimer.setInterval(MainWindow.PERFORMANCE_UPDATE_INTERVAL)
             
         self._connect_ui_components()
 
 
     def _connect_ui_components(self):
         self.actionOpen.triggered.connect(self._actionOpen_triggered)
+        self.actionOpenFolder.triggered.connect(self._actionOpenFolder_triggered)
         self.actionClose.triggered.connect(self._actionClose_triggered)
         self.actionExit.triggered.connect(self._actionExit_triggered)
+        self.actionShowThumbnails.triggered.connect(self._actionShowThumbnails_triggered)
+        self.actionShowPerformance.toggled.connect(self._actionShowPerformance_toggled)
+        self.actionExportTrace.triggered.connect(self._actionExportTrace_triggered)
+        self._performanceTimer.timeout.connect(self._update_performance_label)
 
-        self.groups_treeWidget.currentItemChanged.connect(self._groups_treeWidget_itemChanged)
+        self.groups_treeView.selectionModel().currentChanged.connect(self._groups_treeView_currentChanged)
 
         self.parserComboBox.currentIndexChanged.connect(lambda: self._switch_parser())
-        
-    def _groups_treeWidget_itemChanged(self, new_item, old_item):
+        self.visualizerComboBox.activated.connect(self._visualizerComboBox_activated)
+        self._loadingCancelButton.clicked.connect(self._loadingCancelButton_clicked)
+
+        self._parse_scheduler.finished.connect(self._parse_scheduler_finished)
+        self._parse_scheduler.failed.connect(self._parse_scheduler_failed)
+
+    def _clear_data_content(self):
         for child in self.widgetDataContent.children(): 
             if child is self.widgetDataContent.layout():
                 continue
 
             child.deleteLater()
 
-        if not new_item:
+    def _groups_treeView_currentChanged(self, new_index, old_index):
+        self._clear_data_content()
+
+        # the payload is only read from the adapter once the item gets selected
+        self._request_parse(new_index)
+
+    def _get_cache_key(self, path, parser):
+        settings = tuple(sorted(parser.get_settings().items()))
+        return (self._adapter.get_file_name(), path, type(parser), settings)
+
+    def _request_parse(self, index):
+        data_item = self._tree_model.get_item(index)
+        if data_item is None or not data_item.has_data():
+            # drop the results of the previous selection, also the ones which are shown, so
+            # that they cannot be visualized again while a group is selected
+            self._parse_scheduler.cancel()
+            self._prefetcher.cancel()
+            self._parsed_data = None
+            self._update_visualizers(None)
             return
 
-        data = new_item.data(1, 0)
-        if data is not None:
-            self._parsed_data = self._current_parser.parse(data)
+        cache_key = self._get_cache_key(self._tree_model.get_path(index), self._current_parser)
+        parsed_data = self._parsed_data_cache.get(cache_key)
+        if parsed_data is not None:
+            self._parse_scheduler.cancel()
+            self._show_parsed_data(parsed_data)
+        else:
+            # reading and parsing happens in a worker thread, only the newest result gets visualized
+            self._parse_scheduler.submit(MainWindow._parse_item, self._current_parser, data_item, self._parsed_data_cache, cache_key)
+
+        self._prefetcher.update(self._tree_model, index, self._current_parser, self._get_cache_key)
+
+    @staticmethod
+    def _parse_item(parser, data_item, cache, cache_key):
+        with PROFILER.span("fetch", item=data_item.name) as span:
+            data = data_item.data
+            span.add_bytes(get_data_size(data))
+        with PROFILER.span("parse", parser=type(parser).__name__) as span:
+            # lazy arrays are read by the parser
+            size = get_data_size(data)
+            parsed_data = parser.parse(data)
+            span.add_bytes(get_data_size(data) - size)
+        if parsed_data is not None:
+            cache.put(cache_key, parsed_data)
+        return parsed_data
+
+    def _parse_scheduler_finished(self, request_id, parsed_data):
+        if not self._parse_scheduler.is_current(request_id):
+            return
+
+        self._show_parsed_data(parsed_data)
+
+    def _show_parsed_data(self, parsed_data):
+        self._clear_data_content()
 
-            if self._parsed_data:
-                visualizer_type = PluginRegistry.get_visualizer(type(self._parsed_data))
+        self._parsed_data = parsed_data
+        if self._parsed_data:
+            with PROFILER.span("visualize", data=type(self._parsed_data).__name__):
+                visualizer_type = self._update_visualizers(type(self._parsed_data))
                 if visualizer_type is not None:
                     visualizer_type().visualize_data(self._parsed_data, self.widgetDataContent)
+        else:
+            self._update_visualizers(None)
+
+    def _update_visualizers(self, parsed_data_type):
+        # lists the visualizers of the data type and returns the one which has been picked
+        # for it before, or the first one
+        visualizer_types = PluginRegistry.get_compatible_visualizers(parsed_data_type) if parsed_data_type is not None else []
+        names = [x.get_ui_name() for x in visualizer_types]
+        name = self._visualizer_names.get(parsed_data_type, names[0] if names else None)
+        if name not in names:
+            name = names[0] if names else None
+
+        self.visualizerComboBox.clear()
+        self.visualizerComboBox.addItems(names)
+        self.visualizerComboBox.setEnabled(len(names) > 1)
+        if name is None:
+            return None
+        self.visualizerComboBox.setCurrentIndex(names.index(name))
+        return visualizer_types[names.index(name)]
+
+    def _visualizerComboBox_activated(self, index):
+        if not self._parsed_data:
+            return
+
+        self._visualizer_names[type(self._parsed_data)] = self.visualizerComboBox.itemText(index)
+        self._show_parsed_data(self._parsed_data)
 
-            # else:
-            # spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-            # self.gridLayout.addItem(spacerItem, 0, 0, 1, 1)
+    def _show_collection(self, collection):
+        # the parser only describes the collection, its items are read by the visualizer
+        parsed_data = self._current_parser.parse_collection(collection)
+        if parsed_data is None:
+            self.statusBar().showMessage("The selected parser cannot show several items at once", 5000)
+            return
+        self._show_parsed_data(parsed_data)
+
+    def _parse_scheduler_failed(self, request_id, error):
+        if not self._parse_scheduler.is_current(request_id):
+            return
+
+        self.statusBar().showMessage("Could not parse the selected item: {0}".format(error), 5000)
 
     def _close_file(self):
         if not self._adapter:
             return True
 
+        self._stop_tree_loader()
+        self._parse_scheduler.cancel()
+        self._prefetcher.cancel()
+        self._clear_data_content()
+        self._parsed_data_cache.clear()
+
         if self._adapter.is_file_opened():
             self._adapter.close_file()
 
         if not self._adapter.is_file_opened():
             self.setWindowTitle("Data Viewer")
             self._update_groups([])
+            self._itemCountLabel.setText("")
 
             return True
         else:
             return False
 
-    def _open_file(self, file_name=None):
+    def _open_file(self, file_names=None):
         if self._adapter and self._adapter.is_file_opened():
             if not self._close_file():
                 return
 
-        extensions = ";;".join(["All files (*.*)"] + [x.get_file_extensions() for x in AdapterRegistry.get_adapters()])
-        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Choose a data file", "", extensions)
+        if file_names is None:
+            extensions = ";;".join(["All files (*.*)"] + AdapterRegistry.get_file_extensions())
+            file_names, _ = QtWidgets.QFileDialog.getOpenFileNames(self, "Choose data files", "", extensions)
+        elif not isinstance(file_names, (list, tuple)):
+            file_names = [file_names]
+
+        if file_names:
+            file_name = file_names[0] if len(file_names) == 1 else file_names
+            adapter_class = AdapterRegistry.get_collection_adapter(file_name) or AdapterRegistry.get_adapter(file_name)
+            self._adapter = adapter_class() if adapter_class else None
 
-        if file_name:
-            adapter_class = AdapterRegistry.get_adapter(file_name)
-            if adapter_class:
-                self._adapter = adapter_class()
+            if self._adapter is not None and self._adapter.needs_layout() and not self._ask_raw_layout(self._adapter):
+                self._adapter = None
+                return
 
-            if not self._adapter or not self._adapter.open_file(file_name):
+            with PROFILER.span("open", file=file_name):
+                opened = self._adapter is not None and self._adapter.open_file(file_name)
+            if not opened:
                 QMessageBox.warning(self, "Could not open file", "The file selected could be opened.")
             else:
                 self.setWindowTitle("{0} - Data Viewer".format(self._adapter.get_file_name()))
-                self._update_groups(self._adapter.get_treeview_items())
+                self._load_groups()
+
+    def _ask_raw_layout(self, adapter):
+        # raw dumps do not describe the layout of their values themselves
+        text, accepted = QtWidgets.QInputDialog.getText(self, "Layout of the raw data",
+                                                        "dtype, shape and byte offset, e.g. float32, 1024x768, 0", text="uint8")
+        if not accepted:
+            return False
+
+        try:
+            adapter.set_layout(*adapter.parse_layout(text))
+        except ValueError as error:
+            QMessageBox.warning(self, "Invalid layout", str(error))
+            return False
+        return True
+
+    def _load_groups(self):
+        # the items are added to the tree while the file is still being read
+        self._update_groups([])
+        self._tree_loader = TreeLoader(self._adapter, parent=self)
+        self._tree_loader.items_loaded.connect(self._tree_loader_items_loaded)
+        self._tree_loader.failed.connect(self._tree_loader_failed)
+        self._tree_loader.finished.connect(self._tree_loader_finished)
+
+        self._loadingProgressBar.setValue(0)
+        self._itemCountLabel.setText("Reading file...")
+        self._set_loading_visible(True)
+        self._tree_loader.start()
+
+    def _stop_tree_loader(self):
+        if self._tree_loader is None:
+            return
+
+        # the loader uses the adapter, so it has to be stopped before the file gets closed
+        self._tree_loader.cancel()
+        self._tree_loader.wait()
+        self._tree_loader = None
+        self._set_loading_visible(False)
+
+    def _set_loading_visible(self, visible):
+        self._loadingProgressBar.setVisible(visible)
+        self._loadingCancelButton.setVisible(visible)
+
+    def _update_item_count(self, suffix=""):
+        count = len(self._tree_model.get_child_items(QtCore.QModelIndex()))
+        self._itemCountLabel.setText("{0:,} items{1}".format(count, suffix))
+
+    def _tree_loader_items_loaded(self, batches, progress):
+        # signals of loaders which have been stopped may still be queued
+        if self.sender() is not self._tree_loader:
+            return
+
+        for items in batches:
+            self._tree_model.append_items(items)
+        self._loadingProgressBar.setValue(int(progress * self._loadingProgressBar.maximum()))
+        self._update_item_count()
+
+    def _tree_loader_failed(self, error):
+        if self.sender() is not self._tree_loader:
+            return
+
+        self.statusBar().showMessage("Could not read all items of the file: {0}".format(error), 5000)
+
+    def _tree_loader_finished(self):
+        if self.sender() is not self._tree_loader:
+            return
+
+        self._update_item_count(" (cancelled)" if self._tree_loader.is_cancelled() else "")
+        self._tree_loader = None
+        self._set_loading_visible(False)
+
+    def _loadingCancelButton_clicked(self):
+        if self._tree_loader is not None:
+            self._tree_loader.cancel()
 
     def _actionOpen_triggered(self):
         self._open_file()
 
+    def _actionOpenFolder_triggered(self):
+        directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Choose a directory of data files")
+        if directory:
+            self._open_file(directory)
+
     def _actionClose_triggered(self):
         self._close_file()
 
+    def _actionShowThumbnails_triggered(self):
+        index = self.groups_treeView.currentIndex()
+        data_item = self._tree_model.get_item(index)
+        if data_item is None:
+            return
+
+        # groups are only shown as a grid when it is asked for, as most of them do not hold images
+        parent_index = index.parent()
+        if not data_item.has_data():
+            if not data_item.has_children():
+                return
+            # the children of the group
+            collection = ItemCollection(self._adapter.get_file_stamp(), self._tree_model.get_child_items(index),
+                                        self._tree_model.get_path(index))
+        elif parent_index.isValid():
+            # the item with the same name in each of the groups next to its parent, e.g. the
+            # image of all examples, items at the top level are shown together with their siblings
+            group_index = parent_index.parent()
+            collection = ItemCollection(self._adapter.get_file_stamp(), self._tree_model.get_child_items(group_index),
+                                        self._tree_model.get_path(group_index), data_item.name)
+        else:
+            collection = ItemCollection(self._adapter.get_file_stamp(), self._tree_model.get_child_items(parent_index))
+
+        self._parse_scheduler.cancel()
+        self._prefetcher.cancel()
+        self._show_collection(collection)
+
+    def _actionShowPerformance_toggled(self, checked):
+        PROFILER.enable(checked)
+        self._performanceLabel.setVisible(checked)
+        if checked:
+            self._update_performance_label()
+            self._performanceTimer.start()
+        else:
+            self._performanceTimer.stop()
+
+    def _update_performance_label(self):
+        latest = PROFILER.get_latest()
+        parts = []
+        for name in MainWindow.PERFORMANCE_SPANS:
+            span = latest.get(name)
+            if span is None:
+                continue
+            part = "{0} {1:.1f} ms".format(name, span.duration * 1000)
+            if span.bytes > 0:
+                part += ", {0} read".format(format_bytes(span.bytes))
+            if span.peak_bytes is not None:
+                part += ", {0} peak".format(format_bytes(span.peak_bytes))
+            parts.append(part)
+        self._performanceLabel.setText(" | ".join(parts) if parts else "No spans recorded yet")
+
+    def _actionExportTrace_triggered(self):
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export performance trace", "trace.json", "Chrome trace (*.json)")
+        if not file_name:
+            return
+
+        try:
+            PROFILER.export_chrome_trace(file_name)
+        except OSError as error:
+            QMessageBox.warning(self, "Could not export the trace", str(error))
+
     def _actionExit_triggered(self):
         if self._close_file():
+            self._parse_scheduler.shutdown()
+            self._prefetcher.shutdown()
             sys.exit()
 
     def _update_groups(self, items):
-        self.groups_treeWidget.clear()
-
-        def translate_item(item):
-            ui_item = QtWidgets.QTreeWidgetItem([item.name])
-            ui_item.setData(1, 0, item.data)
-
-            for child in item.children:
-                ui_item.addChild(translate_item(child))
-
-            return ui_item
-
-        top_level_ui_items = []
-        for item in items:
-            ui_item = translate_item(item)
-            top_level_ui_items.append(ui_item)
-
-        self.groups_treeWidget.addTopLevelItems(top_level_ui_items)
\ No newline at end of file
+        # the model only creates rows for the items the view actually shows
+        self._tree_model.set_items(items)
\ No newline at end of file
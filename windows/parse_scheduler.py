@@ -0,0 +1,72 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtCore
+
+class ParseScheduler(QtCore.QObject):
+    # both signals carry the id returned by `submit`, they are emitted from a
+    # worker thread and therefore delivered queued to receivers in the GUI thread
+    finished = QtCore.pyqtSignal(int, object)
+    failed = QtCore.pyqtSignal(int, object)
+
+    def __init__(self, max_workers=2, parent=None):
+        super(ParseScheduler, self).__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._request_id = 0
+        self._future = None
+
+    def submit(self, function, *args):
+        self.cancel()
+
+        request_id = self._request_id
+        self._future = self._executor.submit(self._run, request_id, function, args)
+
+        return request_id
+
+    def cancel(self):
+        # every request which has been submitted so far becomes stale, queued ones
+        # will not run at all and the results of running ones are dropped
+        self._request_id += 1
+
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def is_current(self, request_id):
+        return request_id == self._request_id
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, request_id, function, args):
+        if not self.is_current(request_id):
+            return
+
+        try:
+            result = function(*args)
+        except Exception as e:
+            if self.is_current(request_id):
+                self.failed.emit(request_id, e)
+            return
+
+        if self.is_current(request_id):
+            self.finished.emit(request_id, result)
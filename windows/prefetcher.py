@@ -0,0 +1,145 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor
+from core.utils.profiling import PROFILER, get_data_size
+
+class Prefetcher(object):
+    # parses the neighbours of the current item in the background and puts the
+    # results into the parse cache, so that stepping through a file is instant
+    def __init__(self, cache, count=4, max_workers=2):
+        self._cache = cache
+        self._count = count
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+
+        self._last_parent_path = None
+        self._last_parent_row = None
+        self._last_row = None
+        self._last_name = None
+        self._direction = 1
+
+    def get_count(self):
+        return self._count
+
+    def set_count(self, count):
+        self._count = max(0, count)
+
+    def update(self, model, index, parser, get_cache_key):
+        self.cancel()
+
+        item = model.get_item(index)
+        if item is None or not item.has_data() or self._count == 0:
+            self._last_parent_path = None
+            return
+
+        parent_index = index.parent()
+        parent_path = model.get_path(parent_index)
+        row = index.row()
+
+        # follow the direction in which the user moves, a step into the same item
+        # of a neighbouring group (e.g. from `Example #3/image` to `Example #4/image`)
+        # prefetches that item in the following groups
+        step_groups = False
+        if self._last_parent_path is not None:
+            if parent_path == self._last_parent_path and row != self._last_row:
+                self._direction = 1 if row > self._last_row else -1
+            elif (item.name == self._last_name and parent_index.isValid() and parent_path[:-1] == self._last_parent_path[:-1]
+                  and parent_index.row() != self._last_parent_row):
+                self._direction = 1 if parent_index.row() > self._last_parent_row else -1
+                step_groups = True
+
+        self._last_parent_path = parent_path
+        self._last_parent_row = parent_index.row()
+        self._last_row = row
+        self._last_name = item.name
+
+        if step_groups:
+            tasks = self._get_group_tasks(model, parent_index, item.name)
+        else:
+            tasks = self._get_sibling_tasks(model, parent_index, row)
+
+        for path, resolve in tasks:
+            cache_key = get_cache_key(path, parser)
+            if cache_key in self._cache:
+                continue
+            self._futures.append(self._executor.submit(Prefetcher._prefetch, resolve, parser, self._cache, cache_key))
+
+    def _get_sibling_tasks(self, model, parent_index, row):
+        parent_path = model.get_path(parent_index)
+        items = model.get_child_items(parent_index)
+
+        tasks = []
+        for i in range(1, self._count + 1):
+            sibling_row = row + i * self._direction
+            if sibling_row < 0 or sibling_row >= len(items):
+                break
+            sibling = items[sibling_row]
+            if sibling.has_data():
+                tasks.append((parent_path + (sibling.name,), lambda sibling=sibling: sibling))
+
+        return tasks
+
+    def _get_group_tasks(self, model, parent_index, name):
+        group_path = model.get_path(parent_index.parent())
+        groups = model.get_child_items(parent_index.parent())
+
+        tasks = []
+        for i in range(1, self._count + 1):
+            group_row = parent_index.row() + i * self._direction
+            if group_row < 0 or group_row >= len(groups):
+                break
+            group = groups[group_row]
+            # the children of the group are only loaded in the worker
+            tasks.append((group_path + (group.name, name), lambda group=group: Prefetcher._find_child(group, name)))
+
+        return tasks
+
+    @staticmethod
+    def _find_child(group, name):
+        for child in group.children:
+            if child.name == name:
+                return child
+        return None
+
+    @staticmethod
+    def _prefetch(resolve, parser, cache, cache_key):
+        item = resolve()
+        if item is None or not item.has_data():
+            return
+
+        # kept apart from the spans of the selected item
+        with PROFILER.span("prefetch", item=item.name, parser=type(parser).__name__) as span:
+            data = item.data
+            parsed_data = parser.parse(data)
+            # after parsing, as lazy arrays are only read by the parser
+            span.add_bytes(get_data_size(data))
+        if parsed_data is not None:
+            cache.put(cache_key, parsed_data)
+
+    def cancel(self):
+        # prefetches which have not started yet are dropped
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,65 @@
+# Copyright (c) 2018 Roland Zimmermann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from PyQt5 import QtCore
+from core.utils.profiling import PROFILER
+import time
+
+class TreeLoader(QtCore.QThread):
+    # reads the top level items of a file in the background and hands them to the
+    # GUI thread, the batches read within an interval are emitted together
+    BATCH_INTERVAL = 0.1
+
+    items_loaded = QtCore.pyqtSignal(object, float)
+    failed = QtCore.pyqtSignal(object)
+
+    def __init__(self, adapter, parent=None):
+        super(TreeLoader, self).__init__(parent)
+        self._adapter = adapter
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        # the batches are kept as they are, they might be lazy sequences
+        batches = []
+        progress = 0.0
+        last_emit = 0.0
+        try:
+            with PROFILER.span("tree", file=self._adapter.get_file_name()):
+                for items, progress in self._adapter.iter_treeview_items():
+                    if self._cancelled:
+                        return
+
+                    batches.append(items)
+                    if time.time() - last_emit >= TreeLoader.BATCH_INTERVAL:
+                        self.items_loaded.emit(batches, progress)
+                        batches = []
+                        last_emit = time.time()
+        except Exception as error:
+            self.failed.emit(error)
+            return
+
+        if len(batches) > 0 and not self._cancelled:
+            self.items_loaded.emit(batches, progress)
\ No newline at end of file
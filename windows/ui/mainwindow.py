@@ -31,16 +31,14 @@ class Ui_MainWindow(object):
         self.splitter.setMidLineWidth(5)
         self.splitter.setOrientation(QtCore.Qt.Horizontal)
         self.splitter.setObjectName("splitter")
-        self.groups_treeWidget = QtWidgets.QTreeWidget(self.splitter)
+        self.groups_treeView = QtWidgets.QTreeView(self.splitter)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.groups_treeWidget.sizePolicy().hasHeightForWidth())
-        self.groups_treeWidget.setSizePolicy(sizePolicy)
-        self.groups_treeWidget.setObjectName("groups_treeWidget")
-        item_0 = QtWidgets.QTreeWidgetItem(self.groups_treeWidget)
-        item_1 = QtWidgets.QTreeWidgetItem(item_0)
-        item_1 = QtWidgets.QTreeWidgetItem(item_0)
+        sizePolicy.setHeightForWidth(self.groups_treeView.sizePolicy().hasHeightForWidth())
+        self.groups_treeView.setSizePolicy(sizePolicy)
+        self.groups_treeView.setUniformRowHeights(True)
+        self.groups_treeView.setObjectName("groups_treeView")
         self.widget = QtWidgets.QWidget(self.splitter)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
         sizePolicy.setHorizontalStretch(0)
@@ -75,6 +73,18 @@ class Ui_MainWindow(object):
         self.parserComboBox.setMinimumSize(QtCore.QSize(150, 16))
         self.parserComboBox.setObjectName("parserComboBox")
         self.horizontalLayout.addWidget(self.parserComboBox)
+        self.visualizerLabel = QtWidgets.QLabel(self.parserGroupBox)
+        self.visualizerLabel.setObjectName("visualizerLabel")
+        self.horizontalLayout.addWidget(self.visualizerLabel)
+        self.visualizerComboBox = QtWidgets.QComboBox(self.parserGroupBox)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.visualizerComboBox.sizePolicy().hasHeightForWidth())
+        self.visualizerComboBox.setSizePolicy(sizePolicy)
+        self.visualizerComboBox.setMinimumSize(QtCore.QSize(120, 16))
+        self.visualizerComboBox.setObjectName("visualizerComboBox")
+        self.horizontalLayout.addWidget(self.visualizerComboBox)
         self.verticalLayout.addWidget(self.parserGroupBox)
         self.parserSettingsGroupBox = QtWidgets.QGroupBox(self.widget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
@@ -105,23 +115,40 @@ class Ui_MainWindow(object):
         self.menubar.setObjectName("menubar")
         self.menuFile = QtWidgets.QMenu(self.menubar)
         self.menuFile.setObjectName("menuFile")
+        self.menuView = QtWidgets.QMenu(self.menubar)
+        self.menuView.setObjectName("menuView")
         self.menuHelp = QtWidgets.QMenu(self.menubar)
         self.menuHelp.setObjectName("menuHelp")
         MainWindow.setMenuBar(self.menubar)
         self.actionOpen = QtWidgets.QAction(MainWindow)
         self.actionOpen.setObjectName("actionOpen")
+        self.actionOpenFolder = QtWidgets.QAction(MainWindow)
+        self.actionOpenFolder.setObjectName("actionOpenFolder")
         self.actionClose = QtWidgets.QAction(MainWindow)
         self.actionClose.setObjectName("actionClose")
         self.actionExit = QtWidgets.QAction(MainWindow)
         self.actionExit.setObjectName("actionExit")
+        self.actionShowThumbnails = QtWidgets.QAction(MainWindow)
+        self.actionShowThumbnails.setObjectName("actionShowThumbnails")
+        self.actionShowPerformance = QtWidgets.QAction(MainWindow)
+        self.actionShowPerformance.setCheckable(True)
+        self.actionShowPerformance.setObjectName("actionShowPerformance")
+        self.actionExportTrace = QtWidgets.QAction(MainWindow)
+        self.actionExportTrace.setObjectName("actionExportTrace")
         self.actionAbout = QtWidgets.QAction(MainWindow)
         self.actionAbout.setObjectName("actionAbout")
         self.menuFile.addAction(self.actionOpen)
+        self.menuFile.addAction(self.actionOpenFolder)
         self.menuFile.addAction(self.actionClose)
         self.menuFile.addSeparator()
         self.menuFile.addAction(self.actionExit)
+        self.menuView.addAction(self.actionShowThumbnails)
+        self.menuView.addSeparator()
+        self.menuView.addAction(self.actionShowPerformance)
+        self.menuView.addAction(self.actionExportTrace)
         self.menuHelp.addAction(self.actionAbout)
         self.menubar.addAction(self.menuFile.menuAction())
+        self.menubar.addAction(self.menuView.menuAction())
         self.menubar.addAction(self.menuHelp.menuAction())
 
         self.retranslateUi(MainWindow)
@@ -130,23 +157,25 @@ class Ui_MainWindow(object):
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "Data Viewer"))
-        self.groups_treeWidget.headerItem().setText(0, _translate("MainWindow", "Sample"))
-        __sortingEnabled = self.groups_treeWidget.isSortingEnabled()
-        self.groups_treeWidget.setSortingEnabled(False)
-        self.groups_treeWidget.topLevelItem(0).setText(0, _translate("MainWindow", "Group1"))
-        self.groups_treeWidget.topLevelItem(0).child(0).setText(0, _translate("MainWindow", "Filename"))
-        self.groups_treeWidget.topLevelItem(0).child(1).setText(0, _translate("MainWindow", "Image"))
-        self.groups_treeWidget.setSortingEnabled(__sortingEnabled)
         self.parserGroupBox.setTitle(_translate("MainWindow", "Parser"))
         self.autoParserCheckBox.setText(_translate("MainWindow", "Auto parser"))
+        self.visualizerLabel.setText(_translate("MainWindow", "Visualizer"))
         self.parserSettingsGroupBox.setTitle(_translate("MainWindow", "Parser Settings"))
         self.menuFile.setTitle(_translate("MainWindow", "&File"))
+        self.menuView.setTitle(_translate("MainWindow", "&View"))
         self.menuHelp.setTitle(_translate("MainWindow", "&Help"))
         self.actionOpen.setText(_translate("MainWindow", "&Open..."))
         self.actionOpen.setShortcut(_translate("MainWindow", "Ctrl+O"))
+        self.actionOpenFolder.setText(_translate("MainWindow", "Open &Folder..."))
+        self.actionOpenFolder.setShortcut(_translate("MainWindow", "Ctrl+Shift+O"))
         self.actionClose.setText(_translate("MainWindow", "&Close"))
         self.actionClose.setShortcut(_translate("MainWindow", "Ctrl+W"))
         self.actionExit.setText(_translate("MainWindow", "&Exit"))
         self.actionExit.setShortcut(_translate("MainWindow", "Ctrl+Q"))
+        self.actionShowThumbnails.setText(_translate("MainWindow", "Show &Thumbnails"))
+        self.actionShowThumbnails.setShortcut(_translate("MainWindow", "Ctrl+T"))
+        self.actionShowPerformance.setText(_translate("MainWindow", "Show &Performance"))
+        self.actionShowPerformance.setShortcut(_translate("MainWindow", "Ctrl+Shift+P"))
+        self.actionExportTrace.setText(_translate("MainWindow", "&Export Performance Trace..."))
         self.actionAbout.setText(_translate("MainWindow", "About"))
 